@@ -1,4 +1,42 @@
 """ Make simple, pretty Sankey Diagrams """
 
-from .ausankey import sankey
+import importlib
 
+# Public names and the submodules providing them.
+# Submodules (and with them matplotlib and pandas) are only imported
+# when one of their names is first accessed, keeping `import ausankey` fast.
+_LAZY_NAMES = {
+    "sankey": "ausankey",
+    "render": "ausankey",
+    "Sankey": "ausankey",
+    "SankeyError": "ausankey",
+    "SankeyLayout": "layout",
+    "SankeyAnimation": "animate",
+    "sankey_facets": "facet",
+    "sankey_svg": "svg",
+    "sankey_thumbnail": "raster",
+    "AsyncRenderer": "aio",
+    "render_async": "aio",
+    "RenderServer": "server",
+    "render_remote": "server",
+    "generate_data": "generate",
+    "SankeyStats": "profiling",
+    "add_hook": "profiling",
+    "remove_hook": "profiling",
+    "hooked": "profiling",
+}
+
+__all__ = sorted(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(f".{_LAZY_NAMES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,129 @@
+"""
+Asyncio wrappers for rendering Sankey Diagrams without blocking the event loop.
+
+Layout and rasterisation are offloaded to a thread or process pool and the
+encoded image bytes are awaited.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+
+from .ausankey import SankeyError, render
+
+###########################################
+
+
+async def render_async(data, fmt="png", executor=None, **kwargs):
+    """Render Sankey Diagram to image bytes in an executor
+
+    Parameters
+    ----------
+    data : DataFrame
+        pandas dataframe of labels and weights in alternating columns
+
+    fmt : str
+        Image format, see `render`.
+
+    executor : Executor
+        Executor to run the render in.
+        Defaults to the default executor of the running event loop.
+
+    **kwargs : function arguments
+        Passed through to `render`, see the Sankey class for complete list of arguments.
+
+    Returns
+    -------
+
+    bytes
+        The encoded image.
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(render, data, fmt=fmt, **kwargs))
+
+
+###########################################
+
+
+class AsyncRenderer:
+    """Pool of workers for rendering Sankey Diagrams from asyncio code
+
+    Can be used as an async context manager, which closes the renderer on exit.
+
+    Parameters
+    ----------
+    executor : Executor
+        Executor to run the renders in. When not given a pool is created
+        according to `kind` and `max_workers`, and is shut down by `close()`.
+
+    kind : str
+        Type of pool to create if no executor is given.
+        Allowed values: `"thread"` or `"process"`.
+        With `"process"`, the data and all options must be picklable
+        (e.g., `value_fn` cannot be a lambda function).
+
+    max_workers : int
+        Number of workers of the created pool.
+
+    max_concurrency : int
+        Maximum number of renders submitted to the executor at once.
+        Further requests wait their turn in the event loop.
+        Defaults to `max_workers` when this is given, otherwise unlimited.
+
+    Notes
+    -----
+
+    Cancelling a request that is waiting for a free slot or is still queued
+    in the executor stops it from running at all.
+    A render that is already running in a worker cannot be interrupted;
+    it completes in the background and its result is discarded.
+    """
+
+    def __init__(self, executor=None, kind="thread", max_workers=None, max_concurrency=None):
+        """Assigns input arguments and creates the pool if needed"""
+
+        self.owns_executor = executor is None
+        if executor is None:
+            if kind == "thread":
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+            elif kind == "process":
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+            else:
+                msg = f"Unknown executor kind: {kind!r}"
+                raise SankeyError(msg)
+        self.executor = executor
+
+        self.max_concurrency = max_workers if max_concurrency is None else max_concurrency
+        self.semaphore = None  # created on first use so it binds to the running loop
+
+    ###########################################
+
+    async def render(self, data, fmt="png", **kwargs):
+        """Render Sankey Diagram to image bytes
+
+        See `render_async` for the arguments.
+        """
+
+        if self.max_concurrency is None:
+            return await render_async(data, fmt=fmt, executor=self.executor, **kwargs)
+
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self.semaphore:
+            return await render_async(data, fmt=fmt, executor=self.executor, **kwargs)
+
+    ###########################################
+
+    def close(self, wait=True):
+        """Shut down the pool if it was created by this renderer"""
+
+        if self.owns_executor:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.close)
@@ -0,0 +1,402 @@
+"""
+Animated transitions between Sankey Diagrams of a sequence of datasets.
+
+The layouts of all datasets are computed up front, to the same vertical
+scale and with one colour for each label. Nodes, flows, node labels and
+titles are matched by their labels across the datasets and drawn once, as a
+few collections and text artists, whose vertices, colours and positions are
+then updated in place for each frame of the animation. The update function
+returns the artists it changed, so it can be used with Matplotlib's
+`FuncAnimation` and blitting.
+"""
+
+import numpy as np
+
+from .ausankey import Sankey, SankeyError
+from .layout import label_colors, shared_height
+
+###########################################
+
+
+def frame_arrays(per_frame, collapse):
+    """Stack items matched by key across frames into one array
+
+    Items missing from a frame are copied from the nearest frame they are in,
+    collapsed to zero size so that they grow or shrink in place.
+
+    Parameters
+    ----------
+    per_frame : list of dict
+        Vector of numbers of each item of each frame, by key.
+
+    collapse : function
+        Takes an array of vectors and returns them with zero size.
+
+    Returns
+    -------
+
+    keys : list
+        Keys of all items, in order of first appearance.
+
+    values : np.array
+        Vector of each item in each frame, of shape `(frames, items, length of vectors)`.
+
+    present : np.array
+        Whether each item is in each frame, as `1.0` or `0.0`, of shape `(frames, items)`.
+    """
+
+    keys = list(dict.fromkeys(key for frame in per_frame for key in frame))
+    index = {key: kk for kk, key in enumerate(keys)}
+    size = len(next((vec for frame in per_frame for vec in frame.values()), ()))
+    values = np.zeros((len(per_frame), len(keys), size))
+    present = np.zeros((len(per_frame), len(keys)))
+    for ff, frame in enumerate(per_frame):
+        for key, vec in frame.items():
+            values[ff, index[key]] = vec
+            present[ff, index[key]] = 1
+
+    frames = np.arange(len(per_frame))
+    for kk in range(len(keys)):
+        where = np.flatnonzero(present[:, kk])
+        missing = present[:, kk] == 0
+        if missing.any():
+            nearest = where[np.abs(frames[:, None] - where).argmin(axis=1)]
+            values[missing, kk] = collapse(values[nearest[missing], kk])
+    return keys, values, present
+
+
+def collapse_nodes(nodes):
+    """Nodes `(x, width, y, height)` shrunk to zero height about their centre"""
+    collapsed = nodes.copy()
+    collapsed[:, 2] += nodes[:, 3] / 2
+    collapsed[:, 3] = 0
+    return collapsed
+
+
+def collapse_flows(flows):
+    """Flows `(x0, x1, bottom left, bottom right, top left, top right)` shrunk to zero width about their centre"""
+    mid = (flows[:, 2:4] + flows[:, 4:6]) / 2
+    return np.column_stack([flows[:, :2], mid, mid])
+
+
+def collapse_points(points):
+    """Points of text do not change size"""
+    return points
+
+
+###########################################
+
+
+class SankeyAnimation:
+    """Animation of a Sankey Diagram through a sequence of datasets
+
+    Parameters
+    ----------
+    frames : list
+        Datasets, each of labels and weights in alternating columns (any data accepted by `setup`).
+
+    ax : Axis
+        Matplotlib plot axis to draw into, by default the current axis of `pyplot`.
+
+    steps : int
+        Number of animation frames from one dataset to the next. With more than one,
+        the geometry is interpolated linearly between the datasets.
+
+    **kwargs : function arguments
+        Passed to the diagram of each dataset, see the Sankey class for complete list of arguments.
+        Unless given, `plot_height_nom` is set to the largest stage total of all datasets,
+        so that they are drawn to the same scale, and the labels of all datasets are
+        coloured together from `colormap`, unless given in `color_dict`.
+
+    Notes
+    -----
+
+    Nodes are matched by stage and label, flows by stage and their source and target labels,
+    node labels by stage, side and label, and titles by stage and text. Items only in some datasets
+    grow from, or shrink to, zero size where they are in the nearest dataset, and fade in or out.
+    Flows and their edges (`flow_edge`) are drawn as with `flow_batch`, nodes with their edges (`node_edge`)
+    as one collection. Percentages and flow values are not drawn.
+
+    Usage with Matplotlib's `FuncAnimation`:
+
+        anim = SankeyAnimation(monthly_data, steps=10, sort="top")
+        ani = anim.animate(interval=50)
+        ani.save("flows.gif")
+    """
+
+    def __init__(self, frames, ax=None, steps=1, **kwargs):
+        """Computes the layouts of all datasets and matches their items"""
+
+        frames = list(frames)
+        if not frames:
+            msg = "No datasets to animate"
+            raise SankeyError(msg)
+        if kwargs.get("streaming"):
+            msg = "Streaming diagrams cannot be animated"
+            raise SankeyError(msg)
+
+        options = dict(kwargs)
+        self.layouts = [self.layout(data, options) for data in frames]
+
+        # set up again to the largest stage total of all datasets, except those of that height
+        if options.get("plot_height_nom") is None:
+            options["plot_height_nom"] = shared_height(self.layouts)
+            self.layouts = [
+                sky if sky.plot_height_nom == options["plot_height_nom"] else self.layout(data, options)
+                for sky, data in zip(self.layouts, frames)
+            ]
+
+        all_labels = list(dict.fromkeys(label for sky in self.layouts for label in sky.all_labels))
+        self.color_dict = label_colors(all_labels, options.get("colormap", "viridis"), options.get("color_dict"))
+        for sky in self.layouts:
+            sky.color_dict = self.color_dict
+
+        self.ax = ax
+        self.steps = max(int(steps), 1)
+        self.artists = None
+        self.match_items()
+
+    @staticmethod
+    def layout(data, options):
+        """Set up the diagram of one dataset"""
+        sky = Sankey(**options)
+        sky.setup(data)
+        return sky
+
+    ###########################################
+
+    def match_items(self):
+        """Stack the geometry of the items of all layouts, matched by their labels"""
+
+        nodes, flows, labels, titles, frame = [], [], [], [], []
+        self.label_texts = []
+        for sky in self.layouts:
+            geom = sky.geometry()
+            xticks = np.asarray(geom["xticks"])
+
+            nodes.append(
+                {(nd["stage"], nd["label"]): (nd["x"], nd["width"], nd["y"], nd["height"]) for nd in geom["nodes"]}
+            )
+            flows.append(
+                {(fl["stage"], fl["source"], fl["target"]): (*fl["x"], *fl["y0"], *fl["y1"]) for fl in geom["flows"]}
+            )
+            items = {}
+            texts = {}
+            for lb in geom["labels"]:
+                key = (int(np.abs(xticks - lb["x"]).argmin()), lb["ha"], lb["text"])
+                items[key] = (lb["x"], lb["y"])
+                texts[key] = sky.label_text(lb["text"], lb["value"])
+            labels.append(items)
+            self.label_texts.append(texts)
+            titles.append(
+                {
+                    (int(np.abs(xticks - tt["x"]).argmin()), tt["text"], tt["va"]): (tt["x"], tt["y"])
+                    for tt in geom["titles"]
+                }
+            )
+            frame.append({"frame": (geom["width"], *geom["frame"])})
+
+        self.node_keys, self.node_values, self.node_present = frame_arrays(nodes, collapse_nodes)
+        self.flow_keys, self.flow_values, self.flow_present = frame_arrays(flows, collapse_flows)
+        self.label_keys, self.label_values, self.label_present = frame_arrays(labels, collapse_points)
+        self.title_keys, self.title_values, self.title_present = frame_arrays(titles, collapse_points)
+        _, self.frame_values, _ = frame_arrays(frame, collapse_points)
+
+    @property
+    def num_frames(self):
+        """Number of frames of the animation"""
+        return (len(self.layouts) - 1) * self.steps + 1
+
+    def interp(self, values, step):
+        """Values at a frame of the animation, interpolated between the datasets"""
+
+        pos = step / self.steps
+        ff = min(int(pos), len(self.layouts) - 1)
+        frac = pos - ff
+        if frac == 0:
+            return values[ff]
+        return (1 - frac) * values[ff] + frac * values[ff + 1]
+
+    ###########################################
+
+    def init(self):
+        """Create the artists, drawing the first dataset; the `init_func` of `FuncAnimation`
+
+        Returns
+        -------
+
+        artists : list
+            All artists of the animation.
+        """
+
+        from matplotlib.collections import LineCollection, PolyCollection
+        from matplotlib.colors import to_rgba_array
+
+        if self.artists is not None:
+            return self.update(0)
+
+        sky = self.layouts[0]
+        sky.ax = self.ax
+        sky.plot_init()
+        self.ax = ax = sky.ax
+
+        # axis limits enclosing the frames of all datasets
+        for width, bottom, top in self.frame_values[:, 0]:
+            ax.update_datalim([(0, bottom), (width, top)])
+        ax.autoscale_view()
+
+        frame_colors = [
+            sky.frame_color if sky.frame_side in (side, "both") else [1, 1, 1, 0] for side in ("bottom", "top")
+        ]
+        self.frame_lines = [ax.plot([0, 0], [0, 0], color=col, lw=sky.frame_lw)[0] for col in frame_colors]
+
+        # static colours, faded by presence on update
+        self.node_colors = to_rgba_array([self.color_dict[label] for _, label in self.node_keys])
+        self.node_colors[:, 3] *= sky.node_alpha
+        self.curve = sky.create_curve(0, 1)
+        strips = [
+            sky.combine_colours(self.color_dict[source], self.color_dict[target], len(self.curve))[:, :-1].T
+            for _, source, target in self.flow_keys
+        ]
+        self.edge_colors = np.concatenate(strips) if strips else np.zeros((0, 4))
+        self.flow_colors = self.edge_colors.copy()
+        self.flow_colors[:, 3] *= sky.flow_alpha
+
+        self.flow_collection = PolyCollection([], lw=0, edgecolor="none", snap=True)
+        self.edge_collection = LineCollection([], lw=sky.flow_lw, snap=True) if sky.flow_edge else None
+        self.node_collection = PolyCollection([], lw=sky.node_lw if sky.node_edge else 0, snap=True)
+        for collection in (self.flow_collection, self.edge_collection, self.node_collection):
+            if collection is not None:
+                ax.add_collection(collection, autolim=False)
+
+        ha = [key[1] for key in self.label_keys]
+        self.label_artists = sky.make_texts([(0, 0, "", hh, "center") for hh in ha], "label")
+        self.title_artists = sky.make_texts([(0, 0, text, "center", va) for _, text, va in self.title_keys], "title")
+
+        self.artists = [
+            *self.frame_lines,
+            self.flow_collection,
+            *([] if self.edge_collection is None else [self.edge_collection]),
+            self.node_collection,
+            *self.label_artists,
+            *self.title_artists,
+        ]
+        return self.update(0)
+
+    def update(self, step):
+        """Update the artists in place to a frame of the animation; the `func` of `FuncAnimation`
+
+        Parameters
+        ----------
+        step : int
+            Frame, from `0` to `num_frames - 1`. Frame `n * steps` is the `n`th dataset.
+
+        Returns
+        -------
+
+        artists : list
+            All artists of the animation.
+        """
+
+        if self.artists is None:
+            return self.init()
+
+        width, bottom, top = self.interp(self.frame_values, step)[0]
+        for line, yy in zip(self.frame_lines, (bottom, top)):
+            line.set_data([0, width], [yy, yy])
+
+        x, dx, y, dy = self.interp(self.node_values, step).T
+        verts = np.stack([np.column_stack(corner) for corner in ((x, y), (x + dx, y), (x + dx, y + dy), (x, y + dy))])
+        self.node_collection.set_verts(verts.transpose(1, 0, 2))
+        present = self.interp(self.node_present, step)
+        colors = self.node_colors.copy()
+        colors[:, 3] *= present
+        self.node_collection.set_facecolor(colors)
+        if self.layouts[0].node_edge:
+            colors[:, 3] = present  # opaque edges, as in `Sankey.draw_node`
+            self.node_collection.set_edgecolor(colors)
+
+        verts = self.flow_verts(self.interp(self.flow_values, step))
+        present = np.repeat(self.interp(self.flow_present, step), len(self.curve) - 1)
+        self.flow_collection.set_verts(verts)
+        colors = self.flow_colors.copy()
+        colors[:, 3] *= present
+        self.flow_collection.set_facecolor(colors)
+        if self.edge_collection is not None:
+            # bottom and top edge of each strip, as in `Sankey.draw_flow_batch`
+            self.edge_collection.set_segments(np.concatenate([verts[:, [0, 1]], verts[:, [3, 2]]]))
+            colors = self.edge_colors.copy()
+            colors[:, 3] *= present
+            self.edge_collection.set_color(np.tile(colors, (2, 1)))
+
+        nearest = round(step / self.steps)
+        texts = self.label_texts[nearest]
+        points = self.interp(self.label_values, step)
+        alpha = self.interp(self.label_present, step)
+        for text, key, (x, y), aa in zip(self.label_artists, self.label_keys, points, alpha):
+            text.set_position((x, y))
+            text.set_text(texts.get(key, str(key[2])))
+            text.set_alpha(aa)
+
+        alpha = self.interp(self.title_present, step)
+        for text, (x, y), aa in zip(self.title_artists, self.interp(self.title_values, step), alpha):
+            text.set_position((x, y))
+            text.set_alpha(aa)
+
+        return self.artists
+
+    def flow_verts(self, flows):
+        """Quadrilaterals of the strips of all flows, as in `Sankey.draw_flow_batch`"""
+
+        x0, x1, bot_l, bot_r, top_l, top_r = flows.T[:, :, None]
+        xx = x0 + (x1 - x0) * np.linspace(0, 1, len(self.curve))
+        yd = bot_l + (bot_r - bot_l) * self.curve
+        yu = top_l + (top_r - top_l) * self.curve
+        verts = np.stack(
+            [
+                np.stack([xx[:, :-1], yd[:, :-1]], axis=-1),
+                np.stack([xx[:, 1:], yd[:, 1:]], axis=-1),
+                np.stack([xx[:, 1:], yu[:, 1:]], axis=-1),
+                np.stack([xx[:, :-1], yu[:, :-1]], axis=-1),
+            ],
+            axis=2,
+        )
+        return verts.reshape(-1, 4, 2)
+
+    ###########################################
+
+    def animate(self, fig=None, interval=200, blit=True, **kwargs):
+        """Make a Matplotlib `FuncAnimation` of all frames
+
+        Parameters
+        ----------
+        fig : Figure
+            Figure to animate, by default that of the axis.
+
+        interval : float
+            Delay between frames in milliseconds.
+
+        blit : bool
+            Whether to redraw only the animated artists.
+
+        **kwargs : function arguments
+            Passed through to `FuncAnimation`.
+
+        Returns
+        -------
+
+        FuncAnimation
+        """
+
+        from matplotlib.animation import FuncAnimation
+
+        self.init()
+        return FuncAnimation(
+            fig or self.ax.figure,
+            self.update,
+            frames=self.num_frames,
+            init_func=self.init,
+            interval=interval,
+            blit=blit,
+            **kwargs,
+        )
@@ -6,18 +6,55 @@ Produces simple Sankey Diagrams with matplotlib.
 Forked from: Anneya Golob & marcomanz & pierre-sassoulas & jorwoods
 """
 
+import copy
+import io
 import logging
+import time
+import warnings
 
-import matplotlib as mpl
 import matplotlib.patheffects as path_effects
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.text import Text
+from matplotlib.transforms import TransformedPatchPath
+
+from .hittest import HitIndex
+from .layout import SankeyLayout, cull_overlaps, spread_overlaps
+from .profiling import instrument_draw, phase
 
 ###########################################
 
 logger = logging.getLogger("ausankey")
 
+# approximate time to draw and save a single artist, to convert `time_budget` to a number of artists
+ARTIST_SECONDS = 2e-3
+
+# simplifications applied in turn when over `max_artists` or `time_budget`
+BUDGET_FLOW_POINTS = 16
+BUDGET_VALUE_OFMAX = 0.05
+BUDGET_PERCENT = 5
+BUDGET_OTHER_OFMAX = (0.01, 0.02, 0.05, 0.1, 0.2)
+
+# text options that are collected into a shared `FontProperties`
+FONT_KEYS = {
+    "family": "family",
+    "fontfamily": "family",
+    "name": "family",
+    "fontname": "family",
+    "size": "size",
+    "fontsize": "size",
+    "style": "style",
+    "fontstyle": "style",
+    "variant": "variant",
+    "fontvariant": "variant",
+    "weight": "weight",
+    "fontweight": "weight",
+    "stretch": "stretch",
+    "fontstretch": "stretch",
+}
+
 
 def sankey(data, **kwargs):
     """Make Sankey Diagram
@@ -30,678 +67,357 @@ def sankey(data, **kwargs):
     Returns
     -------
 
-    None (yet)
+    Sankey
+        The diagram object, with the layout, the axis (`ax`) and,
+        if requested, the statistics (`stats`).
     """
 
     sky = Sankey(**kwargs)
     sky.setup(data)
+    sky.plot()
+    return sky
 
-    sky.plot_init()
-    sky.plot_frame()
-
-    # draw each sankey
-    for ii in range(sky.num_flow):
-        sky.subplot(ii)
-
-    sky.ax.set_xticks(sky.xticks)
-    # draw titles
-    if sky.titles is not None:
-        sky.ax.set_xticklabels(sky.titles)
-        for ii in range(sky.num_flow):
-            sky.plot_titles(ii)
-
-
-###########################################
 
+def render(data, fmt="png", dpi=None, figsize=None, **kwargs):
+    """Render Sankey Diagram to image bytes
 
-class SankeyError(Exception):
-    pass
-
-
-###########################################
-
-
-class Sankey:
-    """Sankey Diagram
+    The figure is created directly rather than through `pyplot`, so no global
+    figure state is touched and the function is safe to call from worker
+    threads or processes.
 
     Parameters
     ----------
     data : DataFrame
         pandas dataframe of labels and weights in alternating columns
 
-    ax : Axis
-        Matplotlib plot axis to use
-
-    node_edges: bool
-        Whether to plot edges around each node.
-
-    node_lw : float
-        Linewidth for node edges.
-
-    node_width : float
-        Normalised horizontal width of the data bars
-        (1.0 = 100% of plot width)
-
-    node_gap : float
-        Normalised vertical gap between successive data bars
-        (1.0 = 100% of nominal plot height).
-
-    node_alpha : float
-        Opacity of the nodes (`0.0` = transparent, `1.0` = opaque).
-
-    color_dict : dict
-        Dictionary of colors to use for each label `{'label': 'color'}`
-
-    colormap : str
-        Matplotlib colormap name to automatically assign colours.
-        `color_dict` can overide these on an individual basis if needed
-
-    fontsize : int
-        Font size of the node labels and titles. Passed through to Matplotlib's text
-        option `fontsize`.
+    fmt : str
+        Image format passed to Matplotlib's `savefig`, e.g. `"png"`, `"svg"` or `"pdf"`.
 
-    fontfamily: str
-        Font family of the node labels and titles. Passed through to Matplotlib's text
-        option `fontfamily`.
+    dpi : float
+        Resolution of the figure and the saved image.
+        Defaults to Matplotlib's `figure.dpi` setting.
 
-    fontcolor: color
-        Font colour of the node labels and titles. Passed through to Matplotlib's text
-        option `color`.
+    figsize : (float, float)
+        Width and height of the figure in inches.
+        Defaults to Matplotlib's `figure.figsize` setting.
 
-    flow_edge : bool
-        Whether to draw an edge to the flows.
-        Doesn't always look great when there is lots of branching and overlap.
-
-    flow_lw : float
-        Linewidth for flow edges.
-
-    flow_alpha : float
-        Opacity of the flows (`0.0` = transparent, `1.0` = opaque)
-
-    frame_side : str
-        Whether to place a frame (horizontal rule) above or below the plot.
-        Allowed values: `"none"`, `"top"`, `"bottom"`, or `"both"`
-
-    frame_gap : str
-        Normalised vertical gap between the top/bottom of the plot and the frame
-        (1.0 = 100% of plot height)
-
-    frame_color : color
-        Color of frame
-
-    label_dict : dict
-        Dictionary of labels to optionally replace the labels in the data
-        (e.g., to provide abbreviations or human readable alternatives).
-        Format: `{'orig_label': 'printed_label'}`
-
-    label_width : float
-        Normalised horizontal space to reserve outside the plot
-        on the left and the right for labels
-        (1.0 = 100% of plot width)
-
-    label_gap : float
-        Normalised horizontal gap between the left/right of the
-        plot edges and the label
-        (1.0 = 100% of plot width)
-
-    label_loc : array or str
-        label_loc : strA
-        label_loc : [str1, strM, strN]
-        label_loc : [str1, str2,..., strN]
-
-        Position to place labels next to the nodes. Each str can be one of:
-        `"left"`, `"right"`, `"both"`, `"center"`,  `"top"`, or `"none"`.
-
-        Three syntax variations: if just one string is provided (`strA`), use this as the option for all flows.
-        If three strings provided, the first (`str1`) is the first, the third string (`strN`) is the last,
-        and the second string (`strM`) is used as the option for all middle flows.
-
-        * `str1`: position of value(s) in first flow
-        * `strM`: position of value(s) in middle flows
-        * `strN`: position of value(s) in last flow
+    **kwargs : function arguments
+        See the Sankey class for complete list of arguments.
 
-        Finally, a separate string can be provided for each flow.
+    Returns
+    -------
 
-    label_largest: bool
-        Only the label the largest valued of all nodes for each label.
+    bytes
+        The encoded image.
+    """
 
-    label_duplicate : bool
-        When set False, will only print a middle label if that label didn't
-        appear in the previous stage. This minimises chart clutter but might
-        be confusing in cases, hence defaulting to True.
+    fig = Figure(figsize=figsize, dpi=dpi)
+    sky = Sankey(ax=fig.add_subplot(), **kwargs)
+    sky.setup(data)
+    sky.plot()
 
-    label_font : dict
-        Dictionary of Matplotlib text options to be passed to the labels.
+    buf = io.BytesIO()
+    sky.savefig(buf, format=fmt, dpi=dpi or "figure")
+    return buf.getvalue()
 
-    label_path_effects : dict
-        Dictionary of Matplotlib.patheffects options to be passed to the labels.
 
-    label_values : bool
-        Whether to include the value of the node size with the node label text.
+###########################################
 
-    label_value_sep : str
-        If values are included in the label, this defined the separator.
 
-    label_thresh : float
-        Only print labels when their node is greater or equal to this value.
+class SankeyError(Exception):
+    pass
 
-    label_thresh_ofsum : float
-        Only print labels when their node value is greater or equal than this percentage of the total of this stage.
 
-    label_thresh_ofmax : float
-        Only print labels when their node value is greater or equal than this percentage of the maximum total across all stages.
+###########################################
 
-    other_thresh : float
-        Sets threshold to recategorise nodes that are below a certain value.
-        Up to three dictionary keys can be set:
 
-        * `"val": v` — set node to other if it is less than `v`
-        * `"ofsum": s` — set node to other if it is less than `s` fraction
-                       of the summed total of all nodes in the current stage
-        * `"ofmax": m` — set node to other if is is less than `m` fraction
-                       of the maximum summed total across all stages
+class Sankey(SankeyLayout):
+    """Sankey Diagram
 
-        If any of these criteria are met the reclassification will occur.
+    Parameters
+    ----------
+    ax : Axis
+        Matplotlib plot axis to use
 
-    other_thresh_ofsum : float
-        Sets threshold to recategorise nodes that are below a certain value.
-        Up to three dictionary keys can be set:
+    hover : function
+        Called as `hover(item, event)` when the mouse moves onto a different node or flow
+        in interactive sessions, or off them with `item` set to `None`; see `connect_hover`.
 
-        * `"val": v` — set node to other if it is less than `v`
-        * `"ofsum": s` — set node to other if it is less than `s` fraction
-                       of the summed total of all nodes in the current stage
-        * `"ofmax": m` — set node to other if is is less than `m` fraction
-                       of the maximum summed total across all stages
+    **kwargs : function arguments
+        All other arguments, such as `node_width`, `label_loc` and `fontsize`,
+        are those of the `SankeyLayout` class; see there for the complete list.
+    """
 
-        If any of these criteria are met the reclassification will occur.
+    def __init__(self, ax=None, hover=None, **kwargs):
+        """Assigns all input arguments to the class as variables with appropriate defaults"""
+        super().__init__(**kwargs)
+        self.ax = ax
+        self.hover = hover
+        self.hit_index = None
+        self.configured = {}
+        if self.stats is not None:
+            instrument_draw(self, self.stats)
 
-    other_thresh_ofmax : float
-        Sets threshold to recategorise nodes that are below a certain value.
-        Up to three dictionary keys can be set:
+    ###########################################
 
-        * `"val": v` — set node to other if it is less than `v`
-        * `"ofsum": s` — set node to other if it is less than `s` fraction
-                       of the summed total of all nodes in the current stage
-        * `"ofmax": m` — set node to other if is is less than `m` fraction
-                       of the maximum summed total across all stages
+    def setup(self, data):
+        """Calculates all parameters needed to plot the graph"""
 
-        If any of these criteria are met the reclassification will occur.
+        # options simplified by `fit_budget` only apply to the layout they were simplified for
+        for name, value in self.configured.items():
+            setattr(self, name, value)
+        self.configured = {}
 
-    other_name : str
-        The string used to rename nodes to if they are classified as “other”.
+        start = time.perf_counter()
+        super().setup(data)
+        self.calc_colors()
+        self.hit_index = None
 
-    percent_loc : array or str
-        percent_loc : strA
-        percent_loc : [str1, strM, strN]
-        percent_loc : [str1, str2,..., strN]
+        self.degradations = []
+        if not self.streaming and (self.max_artists is not None or self.time_budget is not None):
+            self.fit_budget(time.perf_counter() - start)
 
-        Position to place percentage labels next to the nodes. Each str can be one of:
-        `"left"`, `"right"`, `"center"`, or `"none"`.
+    ###########################################
 
-        Three syntax variations: if just one string is provided (`strA`), use this as the option for all nodes.
-        If three strings provided, the first (`str1`) is the first, the third string (`strN`) is the last,
-        and the second string (`strM`) is used as the option for all middle ones.
+    def estimate_artists(self):
+        """Number of Matplotlib artists that `plot` will create"""
 
-        * `str1`: position of value(s) in first
-        * `strM`: position of value(s) in middle
-        * `strN`: position of value(s) in last
+        num_nodes = sum(len(self.node_items[ii]) for ii in range(self.num_flow))
+        num_text = sum(
+            len(self.label_items[ii]) + len(self.percent_items[ii]) + len(self.value_items[ii])
+            for ii in range(self.num_flow)
+        )
+        if self.titles is not None:
+            num_text += sum(len(self.title_items[ii]) for ii in range(self.num_flow))
+        num_flows = sum(llen > 0 and rlen > 0 for ii in range(self.num_flow) for *_, llen, rlen in self.flows[ii])
 
-        Finally, a separate string can be provided for each node.
+        per_node = 2 if self.node_edge else 1
+        per_strip = 3 if self.flow_edge else 1
+        per_flow = (2 if self.flow_edge else 1) if self.flow_batch else per_strip * (len(self.create_curve(0, 1)) - 1)
+        num_frame = 2
+        return per_node * num_nodes + per_flow * num_flows + num_text + num_frame
 
-    percent_loc_ht : array or float
-        percent_loc_ht : numA
-        percent_loc_ht : [num1, numM, numN]
-        percent_loc_ht : [num1, num2,..., numN]
+    def fit_budget(self, elapsed=0):
+        """Simplify the diagram until it fits within `max_artists` and `time_budget`
 
-        Vertical position to place percentage value, a normalised position between 0 and 1 relative to the bottom and top of the node. Default = 0.5.
+        The simplifications are applied in turn until the estimated number of artists is small enough:
 
-    percent_thresh : float
-        Only print percentage labels greater or equal to this value. In normalised units where 1 = 100%.
+        1. reduce the flow curves to `BUDGET_FLOW_POINTS` points;
+        2. draw each flow as a single collection (`flow_batch`);
+        3. remove value labels smaller than `BUDGET_VALUE_OFMAX` of the largest stage total
+           and percentage labels smaller than `BUDGET_PERCENT`;
+        4. increase `other_thresh_ofmax` through `BUDGET_OTHER_OFMAX`, recalculating the layout.
 
-    percent_thresh : float
-        Only print percentage labels if the value of the node is greater or equal to this value.
+        Each step is appended to `degradations` as a `(name, value)` pair. The options changed
+        apply to the current layout only: their configured values are kept in `configured`
+        and restored by the next `setup`.
 
-    percent_format : str
-        String formatting specification passed internally to the `format()` function.
+        The number of artists that fit in `time_budget` is an estimate from the typical
+        time to draw and save one artist (`ARTIST_SECONDS`); no drawing is timed.
 
-    percent_font : dict
-        Dictionary of Matplotlib text options to be passed to the percentage labels.
+        Parameters
+        ----------
+        elapsed : float
+            Time already spent, deducted from `time_budget`.
+        """
 
-    sort : int
-        Sorting routine to use for the data.
-        * `"top"`: data is sorted with largest entries on top
-        * `"bottom"`: data is sorted with largest entries on bottom
-        * `"none"`: data is presented in the same order as it (first) appears in the DataFrame
+        budget = np.inf if self.max_artists is None else self.max_artists
+        if self.time_budget is not None:
+            budget = min(budget, (self.time_budget - elapsed) / ARTIST_SECONDS)
 
-    sort_dict : dict
-        Override the weight sum used to sort nodes by the value specified in the dict.
-        Typically used to force particular categories to the top or bottom.
+        estimate = self.estimate_artists()
+        if estimate <= budget:
+            return
 
-    titles : list of str
-        Array of title strings for each columns
+        def simplify(name, value):
+            self.configured.setdefault(name, getattr(self, name))
+            setattr(self, name, value)
+
+        def degrade(name, value):
+            self.degradations.append((name, value))
+            return self.estimate_artists() <= budget
+
+        def drop_small_labels():
+            value_min = BUDGET_VALUE_OFMAX * self.plot_height_nom
+            for ii in range(self.num_flow):
+                self.value_items[ii] = [item for item in self.value_items[ii] if item[2] >= value_min]
+                self.percent_items[ii] = [item for item in self.percent_items[ii] if item[2] >= BUDGET_PERCENT]
+
+        fitted = False
+        if not self.flow_batch and len(self.create_curve(0, 1)) > BUDGET_FLOW_POINTS:
+            simplify("flow_points", BUDGET_FLOW_POINTS)
+            fitted = degrade("flow_points", BUDGET_FLOW_POINTS)
+        if not fitted and not self.flow_batch:
+            simplify("flow_batch", True)
+            fitted = degrade("flow_batch", True)
+        if not fitted:
+            drop_small_labels()
+            fitted = degrade("drop_labels", BUDGET_VALUE_OFMAX)
+        for thresh in BUDGET_OTHER_OFMAX:
+            if fitted:
+                break
+            if thresh <= self.other_thresh_ofmax:
+                continue
+            simplify("other_thresh_ofmax", thresh)
+            SankeyLayout.setup(self, self.data)
+            self.calc_colors()
+            drop_small_labels()
+            fitted = degrade("other_thresh_ofmax", thresh)
+
+        logger.warning(
+            "Estimated %d artists exceeds budget of %d; simplified with %s to %d artists",
+            estimate,
+            budget,
+            self.degradations,
+            self.estimate_artists(),
+        )
 
-    title_gap : float
-        Normalised vertical gap between the column and the title string
-        (1.0 = 100% of plot height)
+    ###########################################
 
-    title_side : str
-        Whether to place the titles above or below the plot.
-        Allowed values: `"top"`, `"bottom"`, or `"both"`
+    @phase()
+    def plot(self):
+        """Draw the complete diagram after `setup` has been called"""
+
+        self.plot_init()
+        self.plot_frame()
+        if self.label_overlap not in (None, "none"):
+            # data units per pixel, from the limits set by the frame, to measure labels
+            ylim = self.ax.get_ylim()
+            self.y_per_pixel = (ylim[1] - ylim[0]) / self.ax.get_window_extent().height
+
+        # draw each sankey, autoscaling once at the end rather than after every artist;
+        # when streaming, each section is laid out just before it is drawn
+        autoscale = (self.ax.get_autoscalex_on(), self.ax.get_autoscaley_on())
+        self.ax.set_autoscale_on(False)
+        try:
+            for ii in self.layout_sections():
+                self.fit_labels(ii)
+                self.subplot(ii)
+                if self.streaming and self.titles is not None:
+                    self.plot_titles(ii)
+        finally:
+            self.ax.set_autoscalex_on(autoscale[0])
+            self.ax.set_autoscaley_on(autoscale[1])
+        self.ax.autoscale_view()
+
+        self.ax.set_xticks(self.xticks)
+        # draw titles
+        if self.titles is not None:
+            self.ax.set_xticklabels(self.titles)
+            if not self.streaming:
+                for ii in range(self.num_flow):
+                    self.plot_titles(ii)
+
+        if self.hover is not None:
+            self.connect_hover(self.hover)
+
+        if self.stats is not None:
+            logger.debug("Artists drawn: %s", self.stats.artists)
 
-    title_loc : str
-        Whether to place the titles next to each node of the plot
-        or outside the frame.
-        Allowed values: `"inner"` or `"outer"`
+    ###########################################
 
-    title_font : dict
-        Dictionary of Matplotlib text options to be passed to the titles.
+    @phase()
+    def savefig(self, fname, **kwargs):
+        """Save the figure containing the diagram; see Matplotlib's `Figure.savefig` for the arguments"""
+        self.ax.figure.savefig(fname, **kwargs)
 
-    valign : str
-        Vertical alignment of the data bars at each stage,
-        with respect to the whole plot.
-        Allowed values: `"top"`, `"bottom"`, or `"center"`
+    ###########################################
 
-    value_loc : array or str
-        value_loc : strA
-        value_loc : [str1, strM, strN]
-        value_loc : [str1, str2,..., strN]
+    def item_at(self, x, y):
+        """Node or flow at a position in data coordinates
 
-        Position to place values next to the nodes corresponding to the sizes.
-        These are placed within the flows at the beginning (left) and end (right) of each one.
-        Each str can be one of: `"left"`, `"right"`, `"both"`, or `"none"`
+        Uses a `HitIndex` of the diagram, built on first use, so each query
+        takes logarithmic time in the number of nodes and flows.
 
-        Three syntax variations: if just one string is provided (`strA`), use this as the option for all flows.
-        If three strings provided, the first (`str1`) is the first, the third string (`strN`) is the last,
-        and the second string (`strM`) is used as the option for all middle flows.
+        Returns
+        -------
 
-        * `str1`: position of value(s) in first flow
-        * `strM`: position of value(s) in middle flows
-        * `strN`: position of value(s) in last flow
+        item : dict or None
+            See `HitIndex.query`.
+        """
 
-        Finally, a separate string can be provided for each flow.
+        if self.hit_index is None:
+            self.hit_index = HitIndex(self)
+        return self.hit_index.query(x, y)
 
-    value_format : str
-        String formatting specification passed internally to the `format()` function.
+    def connect_hover(self, callback):
+        """Call a function when the mouse moves onto a different node or flow of the diagram
 
-    value_fn : lambda function
-        Alternative to value_format. Transform the value label using the specified lambda function; the output must be a string. E.g.:
+        Parameters
+        ----------
+        callback : function
+            Called as `callback(item, event)`, with `item` as returned by `item_at`
+            (`None` when moving off the nodes and flows) and the Matplotlib mouse event,
+            e.g. to show a tooltip with `item["label"]` or `item["value"]`.
 
-            value_fn = lambda x: f"${round(x)}"
+        Returns
+        -------
 
-    value_gap : float
-        Horizontal space fraction between the edge of the node and the value label.
-        Defaults to `label_gap`.
+        int
+            Connection id, to disconnect with `ax.figure.canvas.mpl_disconnect`.
+        """
 
-    value_font : dict
-        Dictionary of Matplotlib text options to be passed to the value labels.
+        self.hover_item = None
 
-    value_thresh : float
-        Only print labels larger than this absolute value threshold.
+        def on_move(event):
+            item = self.item_at(event.xdata, event.ydata) if event.inaxes is self.ax else None
+            if item != self.hover_item:
+                self.hover_item = item
+                callback(item, event)
 
-    value_thresh_ofsum : float
-        Only print labels larger than this threshold as a fraction of the sum of all node weights in the stage.
+        return self.ax.figure.canvas.mpl_connect("motion_notify_event", on_move)
 
-    value_thresh_ofmax : float
-        Only print labels larger than this threshold as a fraction of the maximum of the summed weights across all stages.
+    ###########################################
 
-    value_duplicate : bool
-        When `True` (default), all values are printed. When `False`, only print a right value if it is not equal to the preceding left value.
+    def copy(self, ax=None):
+        """Copy of the diagram after `setup`, to draw the same layout on another axis
 
-    verbose : int
-        When greater than zero, prints debug information to the terminal.
-    """
+        The layout is shared with the original, except for the label and value
+        items that `plot` may drop or move (see `label_overlap`), so the
+        original can be drawn again or copied any number of times.
 
-    def __init__(
-        self,
-        ax=None,
-        color_dict=None,
-        colormap="viridis",
-        flow_edge=None,
-        flow_alpha=0.6,
-        flow_lw=1,
-        fontcolor="black",
-        fontfamily="sans-serif",
-        fontsize=12,
-        frame_side="none",
-        frame_gap=0.1,
-        frame_color=None,
-        frame_lw=1,
-        label_dict=None,
-        label_width=0,
-        label_gap=0.02,
-        label_loc=("left", "none", "right"),
-        label_font=None,
-        label_path_effects=None,
-        label_duplicate=None,
-        label_largest=None,
-        label_values=None,
-        label_value_sep="\n",
-        label_thresh=0,
-        label_thresh_ofsum=0,
-        label_thresh_ofmax=0,
-        node_lw=1,
-        node_width=0.02,
-        node_gap=0.05,
-        node_alpha=1,
-        node_edge=None,
-        other_thresh=0,
-        other_thresh_ofmax=0,
-        other_thresh_ofsum=0,
-        other_name="Other",
-        percent_loc="none",
-        percent_loc_ht=0.5,
-        percent_thresh=0,
-        percent_thresh_val=0,
-        percent_thresh_ofmax=0,
-        percent_format="2.0f",
-        percent_font=None,
-        sort="bottom",  # "top", "bottom", "none"
-        sort_dict=None,
-        titles=None,
-        title_gap=0.05,
-        title_side="top",  # "bottom", "both"
-        title_loc="inner",  # "outer"
-        title_font=None,
-        valign="bottom",  # "top","center"
-        value_format=".0f",
-        value_fn=None,
-        value_gap=None,
-        value_font=None,
-        value_loc=("both", "right", "right"),
-        value_thresh=0,
-        value_thresh_ofsum=0,
-        value_thresh_ofmax=0,
-        value_duplicate=None,
-        verbose=0,
-    ):
-        """Assigns all input arguments to the class as variables with appropriate defaults"""
-        self.ax = ax
-        self.color_dict = color_dict or {}
-        self.colormap = colormap
-        self.flow_edge = flow_edge or False
-        self.flow_alpha = flow_alpha
-        self.flow_lw = flow_lw
-        self.fontcolor = fontcolor
-        self.fontsize = fontsize
-        self.fontfamily = fontfamily
-        self.frame_side = frame_side
-        self.frame_gap = frame_gap
-        self.frame_color = frame_color or [0, 0, 0, 1]
-        self.frame_lw = frame_lw
-        self.label_dict = label_dict or {}
-        self.label_width = label_width
-        self.label_gap = label_gap
-        self.label_loc = label_loc
-        self.label_font = label_font or {}
-        self.label_path_effects = label_path_effects
-        self.label_thresh = label_thresh
-        self.label_thresh_ofsum = label_thresh_ofsum
-        self.label_thresh_ofmax = label_thresh_ofmax
-        self.label_duplicate = True if label_duplicate is None else label_duplicate
-        self.label_largest = False if label_largest is None else label_largest
-        self.label_values = False if label_values is None else label_values
-        self.label_value_sep = label_value_sep
-        self.node_lw = node_lw
-        self.node_width = node_width
-        self.node_gap = node_gap
-        self.node_alpha = node_alpha
-        self.node_edge = node_edge or False
-        self.other_name = other_name
-        self.other_thresh = other_thresh
-        self.other_thresh_ofmax = other_thresh_ofmax
-        self.other_thresh_ofsum = other_thresh_ofsum
-        self.percent_loc = percent_loc
-        self.percent_loc_ht = percent_loc_ht
-        self.percent_thresh = percent_thresh
-        self.percent_thresh_val = percent_thresh_val
-        self.percent_thresh_ofmax = percent_thresh_ofmax
-        self.percent_format = percent_format
-        self.percent_font = percent_font
-        self.sort = sort
-        self.sort_dict = sort_dict or {}
-        self.titles = titles
-        self.title_font = title_font or {"fontweight": "bold"}
-        self.title_gap = title_gap
-        self.title_loc = title_loc
-        self.title_side = title_side
-        self.valign = valign
-        self.value_format = value_format
-        self.value_fn = value_fn
-        self.value_gap = label_gap if value_gap is None else value_gap
-        self.value_font = value_font or {}
-        self.value_loc = value_loc
-        self.value_thresh = value_thresh
-        self.value_thresh_ofsum = value_thresh_ofsum
-        self.value_thresh_ofmax = value_thresh_ofmax
-        self.value_duplicate = True if value_duplicate is None else value_duplicate
-        self.verbose = verbose
-
-        logger.setLevel(logging.INFO)
-        if self.verbose > 1:
-            logger.setLevel(logging.DEBUG)
+        Parameters
+        ----------
+        ax : Axis
+            Matplotlib plot axis of the copy.
 
-    ###########################################
+        Returns
+        -------
 
-    def setup(self, data):
-        """Calculates all parameters needed to plot the graph"""
+        Sankey
+            The copy, ready for `plot`.
+        """
 
-        self.data = data.fillna(np.nan).replace([np.nan], [None])
-        # replaces NaN etc with None
-
-        num_col = len(self.data.columns)
-        self.data.columns = range(num_col)  # force numeric column headings
-        self.num_stages = int(num_col / 2)  # number of stages
-        self.num_flow = self.num_stages - 1
-
-        short_num = 3
-
-        # arg syntactic sugar
-        def fix_length(str_or_array, nmax):
-            if isinstance(str_or_array, (float, str)):
-                return np.repeat(str_or_array, nmax)
-            if len(str_or_array) == short_num and nmax == short_num - 1:
-                return np.concatenate([[str_or_array[0]], [str_or_array[2]]])
-            if len(str_or_array) == short_num and nmax > short_num:
-                return np.concatenate([[str_or_array[0]], np.repeat(str_or_array[1], nmax - 2), [str_or_array[2]]])
-            return str_or_array
-
-        self.value_loc = fix_length(self.value_loc, self.num_flow)
-        self.label_loc = fix_length(self.label_loc, self.num_stages)
-        self.percent_loc = fix_length(self.percent_loc, self.num_stages)
-        self.percent_loc_ht = fix_length(self.percent_loc_ht, self.num_stages)
-
-        # sizes
-        self.node_sizes = {}
-        self.nodes_uniq = {}
-
-        self.node_pos_voffset = {}
-        self.node_pos_bot = {}
-        self.node_pos_top = {}
-
-        # weight and reclassify
-        self.weight_labels()
-        for ii in range(self.num_stages):
-            logger.debug("\nStage: %s", ii)
-            for nn, lbl in enumerate([x for x in self.data[2 * ii] if x is not None]):
-                val = self.node_sizes[ii][lbl]
-                if (
-                    val < self.other_thresh
-                    or val < self.other_thresh_ofsum * self.weight_sum[ii]
-                    or val < self.other_thresh_ofmax * self.plot_height_nom
-                ):
-                    logger.debug("Making OTHER: %s", self.data.iat[nn, 2 * ii])
-                    self.data.iat[nn, 2 * ii] = self.other_name
-        self.weight_labels()
-
-        # sort and calc
-        for ii in range(self.num_stages):
-            self.node_sizes[ii] = self.sort_node_sizes(self.node_sizes[ii], self.sort)
-
-        self.calc_plot_height()
-        self.calc_plot_dimens()
-
-        self.x_lr = {}
-        self.nodesize_l = {}
-        self.nodesize_r = {}
-        self.node_pairs = {}
-        self.xticks = np.empty(self.num_stages)
-        for ii in range(self.num_flow):
-            x_left = (
-                self.x_node_width + self.x_label_gap + self.x_label_width + ii * (self.sub_width + self.x_node_width)
-            )
-            if ii == 0:
-                self.xticks[ii] = self.x_label_gap + self.x_node_width / 2
-            self.xticks[ii + 1] = x_left + self.sub_width + self.x_node_width / 2
-            self.x_lr[ii] = (x_left, x_left + self.sub_width)
-            self.nodesize_l[ii] = {}
-            self.nodesize_r[ii] = {}
-            self.node_pairs[ii] = []
-            for lbl_l in self.node_sizes[ii]:
-                self.nodesize_l[ii][lbl_l] = {}
-                self.nodesize_r[ii][lbl_l] = {}
-                for lbl_r in self.node_sizes[ii + 1]:
-                    ind = (self.data[2 * ii] == lbl_l) & (self.data[2 * ii + 2] == lbl_r)
-                    if not any(ind):
-                        continue
-                    self.node_pairs[ii].append((lbl_l, lbl_r))
-                    self.nodesize_l[ii][lbl_l][lbl_r] = self.data[2 * ii + 1][ind].sum()
-                    self.nodesize_r[ii][lbl_l][lbl_r] = self.data[2 * ii + 3][ind].sum()
-
-        # All node sizes and positions
-        for ii in range(self.num_flow):
-            self.node_pos_voffset[ii] = [{}, {}]
-            self.node_pos_bot[ii] = [{}, {}]
-            self.node_pos_top[ii] = [{}, {}]
-            prev_label = None  # avoid lint error
-            for lr in [0, 1]:
-                for i, (label, node_height) in enumerate(self.node_sizes[ii + lr].items()):
-                    this_side_height = self.node_indiv_heights[ii][lr].get(label, 0)
-                    self.node_pos_voffset[ii][lr][label] = self.vscale * (node_height - this_side_height)
-                    if i == 0:
-                        tmp_top = self.voffset[ii + lr]
-                    else:
-                        tmp_top = self.node_pos_top[ii][lr][prev_label] + self.y_node_gap
-                    self.node_pos_bot[ii][lr][label] = tmp_top
-                    self.node_pos_top[ii][lr][label] = tmp_top + node_height
-                    prev_label = label
-
-        # labels
-        label_record = self.data[range(0, 2 * self.num_stages, 2)].to_records(index=False)
-        flattened = [item for sublist in label_record for item in sublist]
-        self.all_labels = pd.Series(flattened).unique()
-
-        # If no color_dict given, make one
-        color_dict_new = {}
-        cmap = getattr(mpl.cm, self.colormap, None)
-        color_palette = cmap(np.linspace(0, 1, len(self.all_labels)))
-        for i, label in enumerate(self.all_labels):
-            color_dict_new[label] = self.color_dict.get(label, color_palette[i])
-        self.color_dict = color_dict_new
+        if self.streaming:
+            msg = "Streaming diagrams are laid out while drawn and cannot be copied"
+            raise SankeyError(msg)
+
+        new = copy.copy(self)
+        new.ax = ax
+        new.label_items = dict(self.label_items)
+        new.value_items = dict(self.value_items)
+        new.configured = dict(self.configured)
+        if self.stats is not None:
+            for name in [name for name in vars(new) if name.startswith("draw_")]:
+                delattr(new, name)
+            instrument_draw(new, self.stats)
+        return new
 
     ###########################################
 
     def plot_init(self):
         # initialise plot
-        self.ax = self.ax or plt.gca()
-        self.ax.axis("off")
-
-    ###########################################
-
-    def weight_labels(self):
-        """Calculates sizes of each node, taking into account discontinuities"""
-        self.weight_sum = np.empty(self.num_stages)
-
-        self.node_indiv_heights = {}
-        self.nodes_largest = {}
-
-        for ii in range(self.num_stages):
-            self.nodes_uniq[ii] = pd.Series(self.data[2 * ii]).dropna().unique()
-
-        for ii in range(self.num_stages):
-            self.node_sizes[ii] = {}
-            self.node_indiv_heights[ii] = {}
-            self.node_indiv_heights[ii][0] = {}
-            if ii > 0:
-                self.node_indiv_heights[ii - 1][1] = {}
-            for lbl in self.nodes_uniq[ii]:
-                i_p = 2 if ii > 0 else 0
-                i_n = 2 if ii < self.num_flow else 0
-                ind_this = self.data[2 * ii] == lbl
-                none_prev = self.data[2 * ii - i_p].isna()
-                none_next = self.data[2 * ii + i_n].isna()
-
-                ind_cont = ind_this & ~none_prev & ~none_next
-                ind_only = ind_this & none_prev & none_next
-                ind_stop = ind_this & ~none_prev & none_next
-                ind_strt = ind_this & none_prev & ~none_next
-
-                weight_cont = self.data[2 * ii + 1][ind_cont].sum()
-                weight_only = self.data[2 * ii + 1][ind_only].sum()
-                weight_stop = self.data[2 * ii + 1][ind_stop].sum()
-                weight_strt = self.data[2 * ii + 1][ind_strt].sum()
-
-                if ii == 0:
-                    self.node_indiv_heights[ii][0][lbl] = weight_cont + weight_only + weight_stop
-                elif ii == self.num_stages:
-                    self.node_indiv_heights[ii - 1][1][lbl] = weight_cont + weight_only + weight_strt
-                else:
-                    self.node_indiv_heights[ii][0][lbl] = weight_cont + weight_only + weight_stop
-                    self.node_indiv_heights[ii - 1][1][lbl] = weight_cont + weight_only + weight_strt
-                self.node_sizes[ii][lbl] = weight_cont + weight_only + max(weight_stop, weight_strt)
-                self.nodes_largest[lbl] = (
-                    self.node_sizes[ii][lbl]
-                    if self.node_sizes[ii][lbl] > self.nodes_largest.get(lbl, 0)
-                    else self.nodes_largest.get(lbl, 0)
-                )
-
-            self.weight_sum[ii] = pd.Series(self.node_sizes[ii].values()).sum()
-
-        self.plot_height_nom = max(self.weight_sum)
-
-    ###########################################
-
-    def calc_plot_height(self):
-        """Calculate column heights, offsets, and total plot height"""
-
-        vscale_dict = {"top": 1, "center": 0.5, "bottom": 0}
-        self.vscale = vscale_dict.get(self.valign, 0)
-
-        self.voffset = np.empty(self.num_stages)
-        col_hgt = np.empty(self.num_stages)
-        for ii in range(self.num_stages):
-            col_hgt[ii] = self.weight_sum[ii] + (len(self.nodes_uniq[ii]) - 1) * self.node_gap * self.plot_height_nom
-            self.voffset[ii] = self.vscale * (col_hgt[0] - col_hgt[ii])
-
-        self.plot_height = max(col_hgt)
-
-    ###########################################
+        if self.ax is None:
+            import matplotlib.pyplot as plt  # only needed here, and slow to import
 
-    def calc_plot_dimens(self):
-        """Calculate absolute size of plot dimens based on scaling factors"""
-
-        # overall dimensions
-        self.sub_width = self.plot_height
-        self.plot_width_nom = (self.num_stages - 1) * self.sub_width
-        self.plot_width = (
-            (self.num_stages - 1) * self.sub_width
-            + 2 * self.plot_width_nom * (self.label_gap + self.label_width)
-            + self.num_stages * self.plot_width_nom * self.node_width
-        )
-
-        # vertical positions
-        self.y_node_gap = self.node_gap * self.plot_height_nom
-        self.y_title_gap = self.title_gap * self.plot_height_nom
-        self.y_frame_gap = self.frame_gap * self.plot_height_nom
-        self.y_label_gap = self.label_gap * self.plot_height_nom
-
-        # horizontal positions
-        self.x_node_width = self.node_width * self.plot_width_nom
-        self.x_label_width = self.label_width * self.plot_width_nom
-        self.x_label_gap = self.label_gap * self.plot_width_nom
-        self.x_value_gap = self.value_gap * self.plot_width_nom
+            self.ax = plt.gca()
+        self.ax.axis("off")
+        self.text_props_cache = {}
+        self.text_heights_cache = {}
 
     ###########################################
 
+    @phase()
     def plot_frame(self):
         """Plot frame on top/bottom edges.
 
@@ -714,146 +430,47 @@ class Sankey:
 
         self.ax.plot(
             [0, self.plot_width],
-            min(self.voffset) + (self.plot_height) + self.y_frame_gap + [0, 0],
+            self.y_frame[1] + np.array([0, 0]),
             color=self.frame_color if frame_top else [1, 1, 1, 0],
             lw=self.frame_lw,
         )
 
         self.ax.plot(
             [0, self.plot_width],
-            min(self.voffset) - self.y_frame_gap + [0, 0],
+            self.y_frame[0] + np.array([0, 0]),
             color=self.frame_color if frame_bot else [1, 1, 1, 0],
             lw=self.frame_lw,
         )
 
     ###########################################
 
+    @phase(staged=True)
     def subplot(self, ii):
         """Subroutine for plotting horizontal sections of the Sankey plot
 
-        Some special-casing is used for plotting/labelling differently
-        for the first and last cases.
+        Everything drawn has been positioned by `setup`; the first section
+        also draws the nodes and labels of the first stage.
         """
 
-        # Abbrev
-
-        x_lr = self.x_lr[ii]
-
-        # Draw nodes
-
-        for lr in [0, 1] if ii == 0 else [1]:
-            for label in self.node_sizes[ii + lr]:
-                self.draw_node(
-                    x_lr[lr] - self.x_node_width * (1 - lr),
-                    self.x_node_width,
-                    self.node_pos_bot[ii][lr][label],
-                    self.node_sizes[ii + lr][label],
-                    label,
-                )
-
-        # Draw node labels
-
-        for lr in [0, 1] if ii == 0 else [1]:
-            label_bool = ii + lr == 0 or ii + lr == self.num_flow or self.label_duplicate
-            loc = self.label_loc[ii + lr]
-            if not label_bool:
-                continue
-
-            for label in self.node_sizes[ii + lr]:
-                val = self.node_sizes[ii + lr][label]
-                if (val is None) or (val == 0):
-                    continue
-
-                check_not_largest = self.label_largest and (val < self.nodes_largest[label])
-                check_less_thresh = (
-                    val < self.label_thresh
-                    or val < self.label_thresh_ofsum * self.weight_sum[ii + lr]
-                    or val < self.label_thresh_ofmax * self.plot_height_nom
-                )
-                if check_less_thresh or check_not_largest:
-                    continue
-
-                if loc in ("left", "both"):
-                    xx = x_lr[lr] - self.x_label_gap + (lr - 1) * self.x_node_width
-
-                    if label_bool or label not in self.node_sizes[ii]:
-                        yy = self.node_pos_bot[ii][lr][label] + val / 2
-                        self.draw_label(xx, yy, label, "right", val)
+        for node in self.node_items[ii]:
+            self.draw_node(*node)
 
-                if loc in ("center"):
-                    xx = x_lr[lr] + (2 * lr - 1) * self.x_node_width / 2
-
-                    if label_bool or label not in self.node_sizes[ii]:
-                        yy = self.node_pos_bot[ii][lr][label] + val / 2
-                        self.draw_label(xx, yy, label, "center", val)
-
-                if loc in ("top"):
-                    xx = x_lr[lr] + (2 * lr - 1) * self.x_node_width / 2
-
-                    if label_bool or label not in self.node_sizes[ii]:
-                        yy = self.node_pos_bot[ii][lr][label] + val + self.y_label_gap
-                        self.draw_label(xx, yy, label, "center", val)
-
-                if loc in ("right", "both"):
-                    xx = x_lr[lr] + self.x_label_gap + lr * self.x_node_width
-
-                    if label_bool or label not in self.node_sizes[ii]:
-                        yy = self.node_pos_bot[ii][lr][label] + val / 2
-                        self.draw_label(xx, yy, label, "left", val)
-
-        # percent labels
-
-        for lr in [0, 1] if ii == 0 else [1]:
-            loc = self.percent_loc[ii + lr]
-            ht = self.percent_loc_ht[ii + lr]
-
-            for label in self.node_sizes[ii + lr]:
-                absval = self.node_sizes[ii + lr][label]
-                val = 100 * self.node_sizes[ii + lr][label] / self.weight_sum[ii + lr]
-                valstr = f"{format(val,self.percent_format)}%"
-                if (
-                    (val < 100 * self.percent_thresh)
-                    or (absval < self.percent_thresh_val)
-                    or (absval < self.percent_thresh_ofmax * self.plot_height_nom)
-                ):
-                    continue
-
-                yy = self.node_pos_bot[ii][lr][label] + ht * self.node_sizes[ii + lr][label]
-
-                if loc in ("left"):
-                    xx = x_lr[lr] - self.x_label_gap + (lr - 1) * self.x_node_width
-                    self.draw_percent(xx, yy, valstr, "right", font=self.percent_font)
-
-                if loc in ("center"):
-                    xx = x_lr[lr] + (2 * lr - 1) * self.x_node_width / 2
-                    self.draw_percent(xx, yy, valstr, "center", font=self.percent_font)
-
-                if loc in ("right"):
-                    xx = x_lr[lr] + self.x_label_gap + lr * self.x_node_width
-                    self.draw_percent(xx, yy, valstr, "left", font=self.percent_font)
+        self.draw_labels(ii)
+        self.draw_percents(ii)
 
         # Plot flows
 
-        for lbl_l, lbl_r in self.node_pairs[ii]:
-            lbot = self.node_pos_voffset[ii][0][lbl_l] + self.node_pos_bot[ii][0][lbl_l]
-            rbot = self.node_pos_voffset[ii][1][lbl_r] + self.node_pos_bot[ii][1][lbl_r]
-            llen = self.nodesize_l[ii][lbl_l][lbl_r]
-            rlen = self.nodesize_r[ii][lbl_l][lbl_r]
-            lbl_lr = [lbl_l, lbl_r]
-            bot_lr = [lbot, rbot]
-            len_lr = [llen, rlen]
-
+        x_lr = self.x_lr[ii]
+        for lbl_l, lbl_r, lbot, rbot, llen, rlen in self.flows[ii]:
             ys_d = self.create_curve(lbot, rbot)
             ys_u = self.create_curve(lbot + llen, rbot + rlen)
 
-            # Update bottom edges at each label
-            # so next strip starts at the right place
-            self.node_pos_bot[ii][0][lbl_l] += llen
-            self.node_pos_bot[ii][1][lbl_r] += rlen
-
             xx = np.linspace(x_lr[0], x_lr[1], len(ys_d))
             cc = self.combine_colours(self.color_dict[lbl_l], self.color_dict[lbl_r], len(ys_d))
 
+            if self.flow_batch:
+                self.draw_flow_batch(xx, ys_d, ys_u, cc)
+                continue
             for jj in range(len(ys_d) - 1):
                 self.draw_flow(
                     xx[[jj, jj + 1]],
@@ -862,251 +479,308 @@ class Sankey:
                     cc[:, jj],
                 )
 
-            sides = []
-            if self.value_loc[ii] in ("left", "both"):
-                sides.append(0)
-            if self.value_loc[ii] in ("right", "both"):
-                sides.append(1)
-            for lr in sides:
-                val = len_lr[lr]
-                if (
-                    val < self.value_thresh
-                    or val < self.value_thresh_ofsum * self.weight_sum[ii + lr]
-                    or val < self.value_thresh_ofmax * self.plot_height_nom
-                ):
-                    continue  # dont plot flow label if less than threshold(s)
-                if self.label_values and self.node_sizes[ii + lr][lbl_lr[lr]] == len_lr[lr]:
-                    continue  # dont plot flow label if equal the adjacent node label
-                if not (self.value_duplicate) and lr == 1 and len_lr[0] == len_lr[1]:
-                    continue  # don't plot right flow label is equal to left flow label
-                if self.label_values and lr == 0 and len_lr[0] == self.node_sizes[ii + 1][lbl_r]:
-                    continue  # don't plot left value if it is same as succeeding flow value
-
-                self.draw_value(
-                    x_lr[lr] + (1 - 2 * lr) * self.x_value_gap,
-                    bot_lr[lr] + len_lr[lr] / 2,
-                    val,
-                    ("left", "right")[lr],
-                )
+        self.draw_values(ii)
 
     ###########################################
 
+    @phase(staged=True)
     def plot_titles(self, ii):
         """Subroutine for placing titles"""
 
-        x_lr = self.x_lr[ii]
-
-        title_x = [x_lr[0] - self.x_node_width / 2, x_lr[1] + self.x_node_width / 2]
-
-        for lr in [0, 1] if ii == 0 else [1]:
-            last_label = list(self.node_sizes[ii + lr])[-1]
-            if self.title_side in ("top", "both"):
-                if self.title_loc == "outer":
-                    yt = min(self.voffset) + self.y_title_gap + self.y_frame_gap + self.plot_height
-                elif self.title_loc == "inner":
-                    yt = self.y_title_gap + self.node_pos_top[ii][lr][last_label]
-                self.draw_title(title_x[lr], yt, self.titles[ii + lr], "bottom")
-
-            if self.title_side in ("bottom", "both"):
-                if self.title_loc == "outer":
-                    yt = min(self.voffset) - self.y_title_gap - self.y_frame_gap
-                elif self.title_loc == "inner":
-                    yt = self.voffset[ii + lr] - self.y_title_gap
-                self.draw_title(title_x[lr], yt, self.titles[ii + lr], "top")
+        self.draw_titles(ii)
 
     ###########################################
 
     def draw_node(self, x, dx, y, dy, label):
-        """Draw a single node"""
+        """Draw a single node, returning the list of artists created"""
         edge_lw = self.node_lw if self.node_edge else 0
-        self.ax.fill_between(
-            [x, x + dx],
-            y,
-            y + dy,
-            facecolor=self.color_dict[label],
-            alpha=self.node_alpha,
-            lw=edge_lw,
-            snap=True,
-        )
-        if self.node_edge:
+        artists = [
             self.ax.fill_between(
                 [x, x + dx],
                 y,
                 y + dy,
-                edgecolor=self.color_dict[label],
-                facecolor="none",
+                facecolor=self.color_dict[label],
+                alpha=self.node_alpha,
                 lw=edge_lw,
                 snap=True,
+                rasterized=self.node_rasterized,
+            )
+        ]
+        if self.node_edge:
+            artists.append(
+                self.ax.fill_between(
+                    [x, x + dx],
+                    y,
+                    y + dy,
+                    edgecolor=self.color_dict[label],
+                    facecolor="none",
+                    lw=edge_lw,
+                    snap=True,
+                    rasterized=self.node_rasterized,
+                )
             )
+        return artists
 
     ###########################################
 
     def draw_flow(self, xx, yd, yu, col):
-        """Draw a single flow"""
+        """Draw a single flow, returning the list of artists created"""
         if (yd[0] == yu[0]) or (yd[-1] == yu[-1]):
-            return
-        self.ax.fill_between(
-            xx,
-            yd,
-            yu,
-            color=col,
-            alpha=self.flow_alpha,
-            lw=0,
-            edgecolor="none",
-            snap=True,
-        )
+            return []
+        artists = [
+            self.ax.fill_between(
+                xx,
+                yd,
+                yu,
+                color=col,
+                alpha=self.flow_alpha,
+                lw=0,
+                edgecolor="none",
+                snap=True,
+                rasterized=self.flow_rasterized,
+            )
+        ]
         # edges:
         if self.flow_edge:
-            self.ax.plot(
+            artists += self.ax.plot(
                 xx,
                 yd,
                 color=col,
                 lw=self.flow_lw,
                 snap=True,
+                rasterized=self.flow_rasterized,
             )
-            self.ax.plot(
+            artists += self.ax.plot(
                 xx,
                 yu,
                 color=col,
                 lw=self.flow_lw,
                 snap=True,
+                rasterized=self.flow_rasterized,
             )
+        return artists
 
     ###########################################
 
-    def draw_label(self, x, y, label, ha, val=None, font=None):
-        """Place a single label"""
-
-        valstr = ""
-        font = font or self.label_font
-        if self.label_values and val is not None:
-            value_fn = self.value_fn or (lambda val: f"{self.label_value_sep}{format(val,self.value_format)}")
-            valstr = value_fn(val)
-
-        h_text = self.ax.text(
-            x,
-            y,
-            self.label_dict.get(label, label) + valstr,
-            {
-                "ha": ha,
-                "va": "center",
-                "fontfamily": self.fontfamily,
-                "fontsize": self.fontsize,
-                "color": self.fontcolor,
-                **font,
-            },
+    def draw_flow_batch(self, xx, yd, yu, cc):
+        """Draw all strips of a single flow as one collection, returning the list of artists created
+
+        Equivalent to calling `draw_flow` for each strip, with colour `cc[:, jj]` for strip `jj`.
+        """
+        if (yd[0] == yu[0]) or (yd[-1] == yu[-1]):
+            return []
+
+        # quadrilateral of each strip
+        x0, x1 = xx[:-1], xx[1:]
+        verts = np.stack(
+            [
+                np.column_stack([x0, yd[:-1]]),
+                np.column_stack([x1, yd[1:]]),
+                np.column_stack([x1, yu[1:]]),
+                np.column_stack([x0, yu[:-1]]),
+            ],
+            axis=1,
         )
-        if self.label_path_effects is not None:
-            h_text.set_path_effects(
-                [
-                    path_effects.Stroke(**self.label_path_effects),
-                    path_effects.Normal(),  # fill
-                ]
+        artists = [
+            PolyCollection(
+                verts,
+                facecolors=cc[:, :-1].T,
+                alpha=self.flow_alpha,
+                lw=0,
+                edgecolor="none",
+                snap=True,
+                rasterized=self.flow_rasterized,
+            )
+        ]
+        # edges:
+        if self.flow_edge:
+            segments = [np.column_stack([xx, yy])[jj : jj + 2] for yy in (yd, yu) for jj in range(len(xx) - 1)]
+            artists.append(
+                LineCollection(
+                    segments,
+                    colors=np.tile(cc[:, :-1].T, (2, 1)),
+                    lw=self.flow_lw,
+                    snap=True,
+                    rasterized=self.flow_rasterized,
+                )
             )
+        for artist in artists:
+            self.ax.add_collection(artist, autolim=False)  # within the nodes
+        return artists
 
     ###########################################
 
-    def draw_percent(self, x, y, label, ha, font=None):
-        """Place a single label"""
-
-        font = font or self.label_font
-        self.ax.text(
-            x,
-            y,
-            self.label_dict.get(label, label),
-            {
-                "ha": ha,
-                "va": "center",
-                "fontfamily": self.fontfamily,
-                "fontsize": self.fontsize,
-                "color": self.fontcolor,
-                **font,
-            },
-        )
+    @phase(staged=True)
+    def fit_labels(self, ii):
+        """Drop or move overlapping node labels and flow values of a section, see `label_overlap`
 
-    ###########################################
+        The height of a line of text is measured once per kind of text with the renderer.
+        Labels are compared within each column, i.e. those of a section with the same
+        horizontal position and alignment, and are treated as vertical intervals.
+        """
 
-    def draw_value(self, x, y, val, ha, format_=None, font=None):
-        """Place a single value label"""
-
-        format_ = format_ or self.value_format
-        font = font or self.value_font
-        self.ax.text(
-            x,
-            y,
-            f"{format(val,format_)}",
-            {
-                "ha": ha,
-                "va": "center",
-                "fontfamily": self.fontfamily,
-                "fontsize": self.fontsize,
-                "color": self.fontcolor,
-                **font,
-            },
-        )
+        if self.label_overlap in (None, "none"):
+            return
+        if self.label_overlap not in ("drop", "offset"):
+            msg = f"Unknown label_overlap: {self.label_overlap!r}"
+            raise SankeyError(msg)
+
+        line_heights = self.text_heights_cache
+
+        def text_height(kind, text):
+            key = (kind, text.count("\n") + 1)
+            if key not in line_heights:
+                probe = Text(0, 0, "\n".join(["Ag"] * key[1]), **self.text_props(kind))
+                probe.set_figure(self.ax.figure)
+                line_heights[key] = self.y_per_pixel * probe.get_window_extent().height
+            return line_heights[key]
+
+        def fit(items, texts, priority, kind):
+            heights = np.array([text_height(kind, text) for text in texts])
+            columns = {}
+            for nn, item in enumerate(items):
+                columns.setdefault((item[0], item[3]), []).append(nn)
+
+            keep = np.ones(len(items), dtype=bool)
+            ys = np.array([item[1] for item in items], dtype=float)
+            for ind in columns.values():
+                if self.label_overlap == "drop":
+                    lo = ys[ind] - heights[ind] / 2
+                    keep[ind] = cull_overlaps(lo.tolist(), (lo + heights[ind]).tolist(), np.asarray(priority)[ind])
+                else:
+                    ys[ind] = spread_overlaps(ys[ind], heights[ind])
+            logger.debug("%s labels: %d of %d overlapping dropped", kind, (~keep).sum(), len(items))
+            return [(item[0], yy, *item[2:]) for item, yy, kept in zip(items, ys.tolist(), keep) if kept]
 
-    ###########################################
+        items = self.label_items[ii]
+        texts = [self.label_text(label, val) for _, _, label, _, val in items]
+        self.label_items[ii] = fit(items, texts, [item[4] for item in items], "label")
 
-    def draw_title(self, x, y, label, va):
-        """Place a single title"""
-        self.ax.text(
-            x,
-            y,
-            label,
-            {
-                "ha": "center",
-                "va": va,
-                "fontfamily": self.fontfamily,
-                "fontsize": self.fontsize,
-                "color": self.fontcolor,
-                **self.title_font,
-            },
-        )
+        items = self.value_items[ii]
+        texts = [self.value_text(val) for _, _, val, _ in items]
+        self.value_items[ii] = fit(items, texts, [item[2] for item in items], "value")
 
     ###########################################
 
-    def sort_node_sizes(self, lbl, sorting):
-        """Sorts list of labels and their weights into a dictionary"""
-
-        if sorting == "top":
-            s = 1
-        elif sorting == "bottom":
-            s = -1
-        elif sorting == "center":
-            s = 1
-        else:
-            s = 0
-
-        sort_arr = sorted(
-            lbl.items(),
-            key=lambda item: s * self.sort_dict.get(item[0], item[1]),
-            # sorting = 0,1,-1 affects this
+    def text_props(self, kind):
+        """Keyword arguments shared by all text artists of one kind
+
+        The font options are collected into a single `FontProperties` object,
+        and the other options are passed to each `Text` as they are.
+        The result is cached for each kind until the next `plot_init`.
+
+        Parameters
+        ----------
+        kind : str
+            One of `"label"`, `"percent"`, `"value"` or `"title"`.
+        """
+
+        if kind in self.text_props_cache:
+            return self.text_props_cache[kind]
+
+        font = {
+            "label": self.label_font,
+            "percent": self.percent_font or self.label_font,
+            "value": self.value_font,
+            "title": self.title_font,
+        }[kind]
+        props = {"fontfamily": self.fontfamily, "fontsize": self.fontsize, "color": self.fontcolor, **font}
+
+        if "fontproperties" not in props and "font" not in props:
+            fontprops = {FONT_KEYS[key]: props.pop(key) for key in list(props) if key in FONT_KEYS}
+            props["fontproperties"] = FontProperties(**fontprops)
+        if kind == "label" and self.label_path_effects is not None:
+            props["path_effects"] = [
+                path_effects.Stroke(**self.label_path_effects),
+                path_effects.Normal(),  # fill
+            ]
+        props.update(
+            transform=self.ax.transData,
+            clip_on=False,
+            clip_path=TransformedPatchPath(self.ax.patch),
         )
 
-        sorted_labels = dict(sort_arr)
+        self.text_props_cache[kind] = props
+        return props
 
-        if sorting == "center":
-            # this kinda works but i dont think it's a good idea because you lose perception of relative sizes
-            # probably has an off-by-one even/odd error
-            sorted_labels = sorted_labels[1::2] + sorted_labels[-1::-2]
+    def make_texts(self, items, kind):
+        """Create text artists in bulk
 
-        return sorted_labels
+        Parameters
+        ----------
+        items : list
+            Tuples `(x, y, text, ha, va)`.
+
+        kind : str
+            Kind of text, see `text_props`.
+
+        Returns
+        -------
+
+        list of Text
+        """
+
+        props = self.text_props(kind)
+        texts = [Text(x, y, text, ha=ha, va=va, **props) for x, y, text, ha, va in items]
+        for text in texts:
+            self.ax.add_artist(text)
+        return texts
+
+    def draw_labels(self, ii):
+        """Place all node labels of a section, returning the list of artists created"""
+        items = [(x, y, self.label_text(label, val), ha, "center") for x, y, label, ha, val in self.label_items[ii]]
+        return self.make_texts(items, "label")
+
+    def draw_percents(self, ii):
+        """Place all percentage labels of a section, returning the list of artists created"""
+        texts = [self.percent_text(val) for _, _, val, _ in self.percent_items[ii]]
+        items = [
+            (x, y, self.label_dict.get(text, text), ha, "center")
+            for (x, y, _, ha), text in zip(self.percent_items[ii], texts)
+        ]
+        return self.make_texts(items, "percent")
+
+    def draw_values(self, ii):
+        """Place all flow value labels of a section, returning the list of artists created"""
+        items = [(x, y, self.value_text(val), ha, "center") for x, y, val, ha in self.value_items[ii]]
+        return self.make_texts(items, "value")
+
+    def draw_titles(self, ii):
+        """Place all titles of a section, returning the list of artists created"""
+        items = [(x, y, title, "center", va) for x, y, title, va in self.title_items[ii]]
+        return self.make_texts(items, "title")
 
     ###########################################
 
-    def create_curve(self, lpoint, rpoint):
-        """Create array of y values for each strip"""
+    def single_text(self, name, item, kind, font=None):
+        """Place a single text for the deprecated single-text methods, through `make_texts`"""
 
-        num_div = 20
-        num_arr = 50
+        warnings.warn(
+            f"Sankey.{name}() is deprecated; texts are drawn in bulk by draw_{kind}s() and make_texts()",
+            DeprecationWarning,
+            stacklevel=3,
+        )
+        (text,) = self.make_texts([item], kind)
+        if font:
+            text.update(font)
+        return text
 
-        # half at left value, half at right, convolve
+    def draw_label(self, x, y, label, ha, val=None, font=None):
+        """Place a single label (deprecated, see `draw_labels`)"""
+        return self.single_text("draw_label", (x, y, self.label_text(label, val), ha, "center"), "label", font)
 
-        ys = np.array(num_arr * [lpoint] + num_arr * [rpoint])
+    def draw_percent(self, x, y, label, ha, font=None):
+        """Place a single percentage label (deprecated, see `draw_percents`)"""
+        text = self.label_dict.get(label, label)
+        return self.single_text("draw_percent", (x, y, text, ha, "center"), "percent", font)
 
-        ys = np.convolve(ys, 1 / num_div * np.ones(num_div), mode="valid")
+    def draw_value(self, x, y, val, ha, format_=None, font=None):
+        """Place a single value label (deprecated, see `draw_values`)"""
+        return self.single_text("draw_value", (x, y, self.value_text(val, format_), ha, "center"), "value", font)
 
-        return np.convolve(ys, 1 / num_div * np.ones(num_div), mode="valid")
+    def draw_title(self, x, y, label, va):
+        """Place a single title (deprecated, see `draw_titles`)"""
+        return self.single_text("draw_title", (x, y, label, "center", va), "title")
 
     ###########################################
 
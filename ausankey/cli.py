@@ -0,0 +1,260 @@
+"""
+Command-line batch rendering of Sankey Diagrams.
+
+Run as `python -m ausankey` (or the `ausankey` script) with CSV or Parquet
+files, or glob patterns of them, to render each to an image:
+
+    python -m ausankey data/*.csv --options style.toml --format svg --workers 4
+
+The options file holds `Sankey` arguments as a JSON object or a TOML table,
+plus `dpi` and `figsize` for the figure. Each file is read and rendered
+independently, in parallel processes with `--workers`, and its timings printed.
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import importlib
+import json
+import os
+import sys
+import time
+
+###########################################
+
+FORMATS = ("png", "svg", "pdf")
+
+
+def find_inputs(patterns):
+    """Paths matching the glob patterns, in order and without duplicates
+
+    Patterns without glob characters are taken as paths even if they do not exist,
+    so that missing files are reported when read.
+    """
+
+    paths = {}
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        paths.update(dict.fromkeys(matches))
+    return list(paths)
+
+
+def import_extra(name, feature):
+    """Import an optional dependency of the command line, naming the `cli` extra if it is missing"""
+
+    try:
+        return importlib.import_module(name)
+    except ImportError as err:
+        from .ausankey import SankeyError
+
+        package = name.split(".")[0]
+        msg = f"{feature} requires the {package!r} package: pip install {package} (or ausankey[cli])"
+        raise SankeyError(msg) from err
+
+
+def read_options(path):
+    """Read `Sankey` arguments from a JSON or TOML file (by its extension)
+
+    Lists given for `stages` are converted to slices, e.g. `[2, 6]` for `slice(2, 6)`.
+    """
+
+    if path is None:
+        return {}
+
+    if os.path.splitext(path)[1].lower() == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            tomllib = import_extra("tomli", "Reading TOML options")
+        with open(path, "rb") as file:
+            options = tomllib.load(file)
+    else:
+        with open(path) as file:
+            options = json.load(file)
+
+    return parse_options(options, f"Options file {path!r}")
+
+
+def parse_options(options, source="Options"):
+    """Check options read from JSON or TOML, converting lists given for `stages` to slices"""
+
+    if not isinstance(options, dict):
+        msg = f"{source} must contain an object/table of arguments"
+        raise TypeError(msg)
+    if isinstance(options.get("stages"), list):
+        options["stages"] = slice(*options["stages"])
+    return options
+
+
+def read_input(path):
+    """Read the data of a CSV or Parquet file (by its extension)"""
+
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        pq = import_extra("pyarrow.parquet", "Reading Parquet files")
+        return pq.read_table(path)
+
+    import pandas as pd
+
+    return pd.read_csv(path)
+
+
+def output_path(path, out_dir, fmt):
+    """Path of the image of an input file: same name with the extension of the format"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path) if out_dir is None else out_dir, f"{stem}.{fmt}")
+
+
+def duplicate_outputs(paths, outs):
+    """Output paths shared by more than one input (e.g. `a.csv` and `a.parquet`), with those inputs"""
+
+    inputs = {}
+    for path, out in zip(paths, outs):
+        inputs.setdefault(os.path.normcase(os.path.abspath(out)), (out, []))[1].append(path)
+    return {out: sources for out, sources in inputs.values() if len(sources) > 1}
+
+
+###########################################
+
+
+def render_file(path, out, fmt, options):
+    """Read, render and write one file
+
+    Returns
+    -------
+
+    times : (float, float)
+        Seconds taken to read the data, and to render and write the image.
+    """
+
+    from .ausankey import render
+
+    start = time.perf_counter()
+    data = read_input(path)
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    image = render(data, fmt=fmt, **options)
+    with open(out, "wb") as file:
+        file.write(image)
+    return read_time, time.perf_counter() - start
+
+
+def render_files(paths, out_dir=None, fmt="png", options=None, workers=1):
+    """Render files, yielding the outcome of each in order
+
+    Parameters
+    ----------
+    paths : list of str
+        CSV or Parquet files.
+
+    out_dir : str
+        Directory to write the images into, by default the directory of each input.
+
+    fmt : str
+        Image format.
+
+    options : dict
+        Arguments passed to `render`.
+
+    workers : int
+        Number of processes to render in. With `1` the files are rendered in this process.
+
+    Yields
+    ------
+
+    path, out, result : str, str, tuple or Exception
+        Input and output paths, and either the read and render times or the error raised.
+
+    Raises
+    ------
+
+    SankeyError
+        If inputs would be written to the same output, before any is rendered.
+    """
+
+    options = options or {}
+    outs = [output_path(path, out_dir, fmt) for path in paths]
+    clashes = duplicate_outputs(paths, outs)
+    if clashes:
+        from .ausankey import SankeyError
+
+        out, sources = next(iter(clashes.items()))
+        msg = f"Inputs {', '.join(sources)} would all be written to {out}"
+        raise SankeyError(msg)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if workers <= 1:
+        for path, out in zip(paths, outs):
+            try:
+                result = render_file(path, out, fmt, options)
+            except Exception as err:  # noqa: BLE001 - reported per file
+                result = err
+            yield path, out, result
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_file, path, out, fmt, options) for path, out in zip(paths, outs)]
+        for path, out, future in zip(paths, outs, futures):
+            error = future.exception()
+            yield path, out, future.result() if error is None else error
+
+
+###########################################
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m ausankey",
+        description="Render Sankey Diagrams of CSV or Parquet files to images.",
+    )
+    parser.add_argument("inputs", nargs="+", metavar="INPUT", help="data files or glob patterns, e.g. 'data/*.csv'")
+    parser.add_argument("-c", "--options", metavar="FILE", help="JSON or TOML file of Sankey arguments")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="png", help="image format (default: png)")
+    parser.add_argument("-o", "--out-dir", metavar="DIR", help="directory for the images (default: next to each input)")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="number of parallel processes (default: 1)")
+    parser.add_argument("--dpi", type=float, help="resolution of the images, overriding the options file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point of `python -m ausankey`
+
+    Returns
+    -------
+
+    status : int
+        Exit status: `0` if all files were rendered, `1` if any failed,
+        `2` if no inputs matched or several would be written to the same image.
+    """
+
+    args = parse_args(argv)
+    options = read_options(args.options)
+    if args.dpi is not None:
+        options["dpi"] = args.dpi
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        print("No input files matched", file=sys.stderr)
+        return 2
+    clashes = duplicate_outputs(paths, [output_path(path, args.out_dir, args.format) for path in paths])
+    for out, sources in clashes.items():
+        print(f"{out}: would be written by each of {', '.join(sources)}", file=sys.stderr)
+    if clashes:
+        return 2
+
+    start = time.perf_counter()
+    failed = 0
+    for path, out, result in render_files(paths, args.out_dir, args.format, options, args.workers):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"{path}: failed: {type(result).__name__}: {result}", file=sys.stderr)
+        else:
+            read_time, render_time = result
+            print(f"{path} -> {out}  read {read_time:.3f} s  render {render_time:.3f} s")
+
+    total = time.perf_counter() - start
+    print(f"{len(paths) - failed} of {len(paths)} files rendered in {total:.3f} s")
+    return 1 if failed else 0
@@ -0,0 +1,186 @@
+"""
+Small multiples: one Sankey Diagram per group of the data, in a grid of axes.
+
+All diagrams share one colour for each label and, optionally, the same
+vertical scale, so that they can be compared at a glance. The layouts are
+computed in parallel and then drawn into the axes of one figure.
+"""
+
+import concurrent.futures
+import math
+
+from .ausankey import Sankey, SankeyError
+from .layout import label_colors, shared_height
+
+###########################################
+
+
+def facet_groups(data, by=None):
+    """Name and data of each group, without the columns grouped by
+
+    Parameters
+    ----------
+    data : DataFrame, DataFrameGroupBy or dict
+        Data grouped with `DataFrame.groupby`, a DataFrame to group by the columns `by`,
+        or a dict of DataFrames by name.
+
+    by : str or list of str
+        Columns to group a DataFrame by.
+
+    Returns
+    -------
+
+    groups : list of (name, DataFrame)
+    """
+
+    if isinstance(data, dict):
+        return list(data.items())
+    if by is not None:
+        data = data.groupby(by, sort=False)
+    if not hasattr(data, "groups"):
+        msg = "Small multiples need grouped data: a DataFrameGroupBy, a DataFrame and `by`, or a dict of DataFrames"
+        raise SankeyError(msg)
+
+    keys = data.keys if isinstance(data.keys, list) else [data.keys]
+    groups = []
+    for name, frame in data:
+        drop = [key for key in keys if isinstance(key, str) and key in frame.columns]
+        groups.append((name[0] if isinstance(name, tuple) and len(name) == 1 else name, frame.drop(columns=drop)))
+    return groups
+
+
+def layout_facet(data, options):
+    """Set up the diagram of one group, in a worker"""
+    sky = Sankey(**options)
+    sky.setup(data)
+    return sky
+
+
+###########################################
+
+
+def sankey_facets(
+    data,
+    by=None,
+    ncols=None,
+    share_scale=True,
+    facet_titles=True,
+    fig=None,
+    figsize=None,
+    executor=None,
+    kind="thread",
+    max_workers=None,
+    **kwargs,
+):
+    """Make Sankey Diagrams of groups of the data as small multiples
+
+    Parameters
+    ----------
+    data : DataFrameGroupBy, DataFrame or dict
+        Data grouped with `DataFrame.groupby`, a DataFrame to group by the columns `by`,
+        or a dict of DataFrames by name. Apart from the columns grouped by,
+        each group has labels and weights in alternating columns.
+
+    by : str or list of str
+        Columns to group a DataFrame by.
+
+    ncols : int
+        Number of columns of the grid of axes, by default as many as needed for a square grid.
+
+    share_scale : bool
+        Whether to draw all diagrams to the same vertical scale, setting `plot_height_nom`
+        to the largest stage total of all groups and sharing the vertical axis limits.
+        The layouts are set up once to find their totals as drawn, and those of smaller
+        groups again to that height. Otherwise each diagram fills its axes.
+
+    facet_titles : bool
+        Whether to title each axes with the name of its group.
+
+    fig : Figure
+        Matplotlib figure to add the axes to, by default a new `pyplot` figure.
+
+    figsize : (float, float)
+        Width and height of the new figure in inches.
+
+    executor : Executor
+        Executor to compute the layouts in. When not given a pool is created
+        according to `kind` and `max_workers`, and shut down afterwards.
+
+    kind : str
+        Type of pool to create if no executor is given.
+        Allowed values: `"thread"` or `"process"`.
+        With `"process"`, the data and all options must be picklable
+        (e.g., `value_fn` cannot be a lambda function).
+
+    max_workers : int
+        Number of workers of the created pool.
+
+    **kwargs : function arguments
+        Passed to each diagram, see the Sankey class for complete list of arguments.
+        The labels of all groups are coloured together from `colormap`, unless given in `color_dict`.
+
+    Returns
+    -------
+
+    fig, diagrams : Figure, dict
+        The figure, and the `Sankey` object of each group by name, each with its axis (`ax`).
+    """
+
+    groups = facet_groups(data, by)
+    if not groups:
+        msg = "No groups to plot"
+        raise SankeyError(msg)
+
+    options = dict(kwargs)
+    rescale = share_scale and options.get("plot_height_nom") is None
+
+    owns_executor = executor is None
+    if executor is None:
+        if kind == "thread":
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        elif kind == "process":
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            msg = f"Unknown executor kind: {kind!r}"
+            raise SankeyError(msg)
+    try:
+        futures = [executor.submit(layout_facet, frame, options) for _, frame in groups]
+        layouts = [future.result() for future in futures]
+
+        # set up again to the largest stage total of all groups, except the groups of that height
+        if rescale:
+            options["plot_height_nom"] = shared_height(layouts)
+            futures = {
+                nn: executor.submit(layout_facet, frame, options)
+                for nn, (sky, (_, frame)) in enumerate(zip(layouts, groups))
+                if sky.plot_height_nom != options["plot_height_nom"]
+            }
+            for nn, future in futures.items():
+                layouts[nn] = future.result()
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
+
+    # one colour table for the labels of all groups, in order of first appearance
+    all_labels = list(dict.fromkeys(label for sky in layouts for label in sky.all_labels))
+    color_dict = label_colors(all_labels, options.get("colormap", "viridis"), options.get("color_dict"))
+
+    if fig is None:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=figsize)
+    ncols = ncols or math.ceil(math.sqrt(len(groups)))
+    nrows = math.ceil(len(groups) / ncols)
+    axes = fig.subplots(nrows, ncols, sharey=share_scale, squeeze=False).ravel()
+    for ax in axes[len(groups) :]:
+        ax.remove()
+
+    diagrams = {}
+    for (name, _), sky, ax in zip(groups, layouts, axes):
+        sky.ax = ax
+        sky.color_dict = color_dict
+        sky.plot()
+        if facet_titles:
+            ax.set_title(str(name))
+        diagrams[name] = sky
+    return fig, diagrams
@@ -0,0 +1,109 @@
+"""
+Generate synthetic data for Sankey Diagrams.
+
+Rows are drawn at random in the alternating label/weight format expected
+by `sankey()`, for benchmarks, stress tests and examples. Everything is
+vectorized with NumPy so that inputs of millions of rows take seconds.
+"""
+
+import numpy as np
+
+###########################################
+
+
+def generate_data(
+    rows,
+    stages=3,
+    labels=10,
+    label_skew=1.0,
+    weight_skew=2.0,
+    gaps=0.0,
+    seed=None,
+    label_prefix="L",
+    categorical=True,
+):
+    """Make a random dataset for a Sankey Diagram
+
+    Parameters
+    ----------
+    rows : int
+        Number of rows.
+
+    stages : int
+        Number of stages, i.e. of label/weight column pairs.
+
+    labels : int or list of int
+        Number of distinct labels in each stage, or a list with one count per stage.
+        Labels are named `label_prefix` followed by their rank, `"L0"`, `"L1"`, etc.,
+        so labels of the same rank are shared between stages.
+
+    label_skew : float
+        Exponent of the Zipf distribution of label popularity:
+        the label of rank `k` is chosen with probability proportional to `1 / (k + 1) ** label_skew`.
+        `0` gives uniformly distributed labels.
+
+    weight_skew : float
+        Exponent of the Zipf distribution of the row weights (must be greater than `1`).
+        Smaller values give heavier tails. Each row has the same weight in all stages it is present in.
+
+    gaps : float
+        Probability that a row starts after the first stage, and (independently)
+        that it stops before the last stage. Missing stages have `None` labels and NaN weights,
+        as in `docs/example_plastics.py`. Every row is present in at least one stage.
+
+    seed : int or np.random.Generator
+        Seed for reproducible datasets.
+
+    label_prefix : str
+        Prefix of the label names.
+
+    categorical : bool
+        Whether to return label columns as pandas Categoricals, which is much faster
+        and smaller for large datasets than columns of strings.
+
+    Returns
+    -------
+
+    data : DataFrame
+        Labels and weights in alternating columns.
+    """
+
+    import pandas as pd
+
+    if not weight_skew > 1:
+        msg = f"weight_skew must be greater than 1, got {weight_skew!r}"
+        raise ValueError(msg)
+
+    rng = np.random.default_rng(seed)
+    num_labels = np.broadcast_to(labels, (stages,))
+
+    # contiguous range of stages in which each row is present
+    first = np.zeros(rows, dtype=np.intp)
+    last = np.full(rows, stages - 1, dtype=np.intp)
+    if gaps > 0 and stages > 1:
+        starts = rng.random(rows) < gaps
+        first[starts] = rng.integers(1, stages, size=starts.sum())
+        stops = rng.random(rows) < gaps
+        last[stops] = rng.integers(0, stages - 1, size=stops.sum())
+        first, last = np.minimum(first, last), np.maximum(first, last)
+
+    # discrete power law with the tail of a Zipf distribution, by inverse transform sampling
+    weight = np.floor((1 - rng.random(rows)) ** (-1 / (weight_skew - 1)))
+
+    columns = {}
+    for ii in range(stages):
+        present = (first <= ii) & (ii <= last)
+
+        popularity = 1 / np.arange(1, num_labels[ii] + 1) ** label_skew
+        codes = rng.choice(num_labels[ii], size=rows, p=popularity / popularity.sum())
+        codes[~present] = -1
+
+        names = [f"{label_prefix}{nn}" for nn in range(num_labels[ii])]
+        if categorical:
+            columns[2 * ii] = pd.Categorical.from_codes(codes, categories=names)
+        else:
+            lookup = np.array([*names, None], dtype=object)
+            columns[2 * ii] = lookup[codes]
+        columns[2 * ii + 1] = np.where(present, weight, np.nan)
+
+    return pd.DataFrame(columns)
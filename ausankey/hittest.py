@@ -0,0 +1,186 @@
+"""
+Hit-testing of the nodes and flows of a Sankey Diagram.
+
+`HitIndex` maps a position in data coordinates to the node or flow drawn
+there, for tooltips and other interaction. The diagram is split horizontally
+into the columns of nodes of each stage and the strips of the flow curves of
+each section, found by bisection; within each, the vertical extents of the
+nodes or flows are held in an `IntervalTree`, so that a query takes
+logarithmic time in the number of items. Only NumPy is required.
+"""
+
+import numpy as np
+
+###########################################
+
+
+class IntervalTree:
+    """Static centred interval tree for finding the intervals containing a point
+
+    Parameters
+    ----------
+    lo, hi : np.array
+        Lower and upper ends of the intervals (inclusive).
+    """
+
+    def __init__(self, lo, hi):
+        self.lo = np.asarray(lo, dtype=float)
+        self.hi = np.asarray(hi, dtype=float)
+        self.root = self.build(np.arange(len(self.lo)))
+
+    def build(self, ids):
+        """Node of the intervals `ids`: centre, intervals containing it sorted by each end, and subtrees"""
+
+        if not len(ids):
+            return None
+        lo, hi = self.lo[ids], self.hi[ids]
+        center = np.median(np.concatenate([lo, hi]))
+        here = (lo <= center) & (hi >= center)
+        by_lo = ids[here][np.argsort(lo[here], kind="stable")]
+        by_hi = ids[here][np.argsort(-hi[here], kind="stable")]
+        return (
+            center,
+            by_lo,
+            self.lo[by_lo],
+            by_hi,
+            -self.hi[by_hi],
+            self.build(ids[hi < center]),
+            self.build(ids[lo > center]),
+        )
+
+    def query(self, y):
+        """Indices of the intervals containing `y`, in no particular order"""
+
+        found = []
+        node = self.root
+        while node is not None:
+            center, by_lo, lo, by_hi, neg_hi, left, right = node
+            if y < center:
+                found.append(by_lo[: np.searchsorted(lo, y, side="right")])
+                node = left
+            elif y > center:
+                found.append(by_hi[: np.searchsorted(neg_hi, -y, side="right")])
+                node = right
+            else:
+                found.append(by_lo)
+                break
+        return np.concatenate(found) if found else np.zeros(0, dtype=int)
+
+
+###########################################
+
+
+class HitIndex:
+    """Index of the nodes and flows of a diagram after `setup`, for finding the item at a position
+
+    Flows are tested against their curves as drawn, including where they cross.
+    The interval trees of the strips of the flow curves are built when first queried.
+
+    Parameters
+    ----------
+    sky : SankeyLayout
+        The diagram, after `setup`.
+    """
+
+    def __init__(self, sky):
+        sky.layout_all()
+        self.curve = sky.create_curve(0, 1)
+        xticks = np.asarray(sky.xticks)
+
+        # columns of nodes and sections of flows, as (x_start, x_end, kind, data)
+        columns = {}
+        self.nodes = []
+        self.flows = []
+        for ii in sorted(sky.node_items):
+            for x, dx, y, dy, label in sky.node_items[ii]:
+                stage = int(np.abs(xticks - (x + dx / 2)).argmin())
+                columns.setdefault(stage, (x, x + dx, []))[2].append(len(self.nodes))
+                self.nodes.append({"stage": stage, "label": label, "x": x, "y": y, "width": dx, "height": dy})
+
+        slabs = []
+        for stage, (x0, x1, ids) in columns.items():
+            ids = np.array(ids)
+            lo = np.array([self.nodes[nn]["y"] for nn in ids])
+            hi = lo + np.array([self.nodes[nn]["height"] for nn in ids])
+            slabs.append((x0, x1, "node", (ids, IntervalTree(lo, hi))))
+
+        for ii in sorted(sky.flows):
+            ids = []
+            for lbl_l, lbl_r, lbot, rbot, llen, rlen in sky.flows[ii]:
+                if llen > 0 and rlen > 0:
+                    ids.append(len(self.flows))
+                self.flows.append(
+                    {
+                        "stage": ii,
+                        "source": lbl_l,
+                        "target": lbl_r,
+                        "x": list(sky.x_lr[ii]),
+                        "y0": [lbot, rbot],
+                        "y1": [lbot + llen, rbot + rlen],
+                        "value": [llen, rlen],
+                    }
+                )
+            x0, x1 = sky.x_lr[ii]
+            slabs.append((x0, x1, "flow", (np.array(ids, dtype=int), {})))
+
+        # bottom and top of each flow at its left and right ends
+        self.flow_ends = np.array([(*fl["y0"], *fl["y1"]) for fl in self.flows], dtype=float).reshape(-1, 4)
+
+        slabs.sort(key=lambda slab: slab[0])
+        self.slabs = slabs
+        self.starts = np.array([slab[0] for slab in slabs])
+
+    ###########################################
+
+    def query(self, x, y):
+        """Node or flow at a position in data coordinates
+
+        Where flows overlap, the one drawn last (on top) is returned.
+
+        Returns
+        -------
+
+        item : dict or None
+            Dict with key `kind`, either `"node"` or `"flow"`, and the keys of the
+            item as in `SankeyLayout.geometry()`; `None` if there is no item at the position.
+        """
+
+        if x is None or y is None:
+            return None
+        nn = np.searchsorted(self.starts, x, side="right") - 1
+        if nn < 0 or x > self.slabs[nn][1]:
+            return None
+        x0, x1, kind, (ids, tree) = self.slabs[nn]
+
+        if kind == "node":
+            hits = ids[tree.query(y)]
+            return {"kind": "node", **self.nodes[hits.max()]} if len(hits) else None
+
+        # strip of the curves containing x, and the flows whose hull over the strip contains y
+        xs = np.linspace(x0, x1, len(self.curve))
+        jj = min(max(np.searchsorted(xs, x, side="right") - 1, 0), len(xs) - 2)
+        if jj not in tree:
+            tree[jj] = self.strip_tree(ids, jj)
+        candidates = ids[tree[jj].query(y)]
+        if not len(candidates):
+            return None
+
+        # exact test on the curves, linear within the strip
+        frac = (x - xs[jj]) / (xs[jj + 1] - xs[jj])
+        bottom, top = self.flow_curves(candidates, [(1 - frac) * self.curve[jj] + frac * self.curve[jj + 1]])
+        hits = candidates[(bottom[:, 0] <= y) & (y <= top[:, 0])]
+        return {"kind": "flow", **self.flows[hits.max()]} if len(hits) else None
+
+    def strip_tree(self, ids, jj):
+        """Interval tree of the vertical extents of flows over strip `jj` of their curves"""
+
+        bottom, top = self.flow_curves(ids, self.curve[[jj, jj + 1]])
+        return IntervalTree(bottom.min(axis=1), top.max(axis=1))
+
+    def flow_curves(self, ids, shape):
+        """Bottom and top of flows `ids` at points of their curves, one row per flow
+
+        The points are given by the values of the curve profile, `shape`, between `0` (left) and `1` (right).
+        """
+        bot_l, bot_r, top_l, top_r = self.flow_ends[ids].T[:, :, None]
+        return bot_l + (bot_r - bot_l) * shape, top_l + (top_r - top_l) * shape
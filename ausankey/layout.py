@@ -0,0 +1,1863 @@
+"""
+Layout of Sankey Diagrams, independent of any plotting library.
+
+Only NumPy is required. pandas is used to read DataFrames when it is
+installed, and Matplotlib is only imported to look up a colormap.
+"""
+
+import bisect
+import functools
+import logging
+import os
+
+import numpy as np
+
+from .profiling import SankeyStats, phase
+
+###########################################
+
+logger = logging.getLogger("ausankey")
+
+
+def _pandas():
+    """Return the pandas module, or None if it is not installed"""
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    return pd
+
+
+def factorize(values):
+    """Encode labels as integer codes in order of first appearance
+
+    Parameters
+    ----------
+
+    values : array
+        Labels of one stage; `None` or NaN marks a gap.
+
+    Returns
+    -------
+
+    codes : np.array
+        Integer code of each label, `-1` for gaps.
+
+    uniques : np.array
+        The unique labels (object array), indexed by code.
+    """
+
+    pd = _pandas()
+    if pd is not None:
+        codes, uniques = pd.factorize(values)
+        return np.asarray(codes, dtype=np.intp), np.asarray(uniques, dtype=object)
+
+    lookup = {}
+    codes = np.fromiter(
+        (-1 if (x is None or x != x) else lookup.setdefault(x, len(lookup)) for x in values),  # noqa: PLR0124
+        dtype=np.intp,
+        count=len(values),
+    )
+    uniques = np.empty(len(lookup), dtype=object)
+    uniques[:] = list(lookup)
+    return codes, uniques
+
+
+def stage_columns(num_columns, stages=None):
+    """Indices of the label and weight columns of a window of stages
+
+    Parameters
+    ----------
+
+    num_columns : int
+        Number of columns of the data, two per stage.
+
+    stages : slice
+        Window of stages, by default all.
+
+    Returns
+    -------
+
+    columns : list of int
+        Label and weight column of each stage in the window, in turn.
+    """
+
+    window = range(num_columns // 2)[stages or slice(None)]
+    return [col for ss in window for col in (2 * ss, 2 * ss + 1)]
+
+
+def read_columns(data, stages=None):
+    """Split data into its label and weight columns
+
+    Parameters
+    ----------
+
+    data : DataFrame or array
+        Labels and weights in alternating columns, as a pandas DataFrame
+        or any two-dimensional array-like of rows.
+
+    stages : slice
+        Window of the stages to read, by default all.
+
+    Returns
+    -------
+
+    labels : list
+        Label column of each stage.
+
+    weights : list
+        Weight column of each stage as float arrays (NaN for gaps).
+    """
+
+    if hasattr(data, "iloc"):
+        columns = stage_columns(data.shape[1], stages)
+        labels = [data.iloc[:, col] for col in columns[0::2]]
+        weights = [data.iloc[:, col].to_numpy(dtype=float, na_value=np.nan) for col in columns[1::2]]
+        return labels, weights
+
+    arr = np.asarray(data, dtype=object)
+    columns = stage_columns(arr.shape[1], stages)
+    labels = [arr[:, col] for col in columns[0::2]]
+    weights = [arr[:, col].astype(float) for col in columns[1::2]]
+    return labels, weights
+
+
+def is_matrix(item):
+    """Whether an item of the data is a flow matrix, see `read_matrices`"""
+    if isinstance(item, tuple):
+        item = item[0] if item else None
+    return np.ndim(item) == 2
+
+
+def read_matrices(matrices, stages=None):
+    """Convert flow matrices into the label codes and weights of each stage
+
+    Each flow becomes a row that is only present in the two stages it connects,
+    as in a table with gaps in the other stages, but without building the table.
+
+    Parameters
+    ----------
+
+    matrices : list
+        One matrix per pair of adjacent stages, of the weights flowing from the labels of
+        a stage (rows) to the labels of the next (columns). Each is either a DataFrame with
+        the labels as index and columns, a tuple `(matrix, row_labels, column_labels)`,
+        or a matrix alone, labelled by position. Matrices may be NumPy arrays or SciPy sparse arrays.
+
+    stages : slice
+        Window of the stages to read, by default all. Only the matrices within the window are used,
+        so it must be of consecutive stages.
+
+    Returns
+    -------
+
+    codes : dict
+        Integer code of the label of each row, by stage (`-1` for gaps).
+
+    uniques : dict
+        The unique labels of each stage, in order of first appearance, indexed by code.
+
+    weights : list
+        Weight of each row in each stage (NaN for gaps).
+    """
+
+    window = range(len(matrices) + 1)[stages or slice(None)]
+    if window.step != 1 and len(window) > 1:
+        msg = "Flow matrices can only be read for a window of consecutive stages"
+        raise ValueError(msg)
+    matrices = matrices[window.start : window.start + len(window) - 1]
+
+    sections = []
+    for item in matrices:
+        if hasattr(item, "iloc"):
+            item = (item.to_numpy(dtype=float), item.index, item.columns)
+        elif not isinstance(item, tuple):
+            item = (item, range(item.shape[0]), range(item.shape[1]))
+        matrix, row_labels, col_labels = item
+        if hasattr(matrix, "tocoo"):
+            coo = matrix.tocoo()
+            rows, cols, vals = coo.row, coo.col, np.asarray(coo.data, dtype=float)
+        else:
+            matrix = np.asarray(matrix, dtype=float)
+            rows, cols = np.nonzero(matrix)
+            vals = matrix[rows, cols]
+        ind = np.isfinite(vals) & (vals != 0)
+        sections.append((rows[ind], cols[ind], vals[ind], list(row_labels), list(col_labels)))
+
+    starts = np.cumsum([0] + [len(section[2]) for section in sections])
+    codes = {}
+    uniques = {}
+    weights = []
+    for ss in range(len(sections) + 1):
+        # index of the label of each row into the candidates, -1 for gaps
+        index = np.full(starts[-1], -1, dtype=np.intp)
+        weight = np.full(starts[-1], np.nan)
+        candidates = []
+        if ss > 0:
+            _, cols, vals, _, col_labels = sections[ss - 1]
+            index[starts[ss - 1] : starts[ss]] = cols
+            weight[starts[ss - 1] : starts[ss]] = vals
+            candidates += col_labels
+        if ss < len(sections):
+            rows, _, vals, row_labels, _ = sections[ss]
+            index[starts[ss] : starts[ss + 1]] = rows + len(candidates)
+            weight[starts[ss] : starts[ss + 1]] = vals
+            candidates += row_labels
+
+        # merge labels of both matrices
+        codes[ss], uniques[ss] = compact_codes(index, candidates)
+        weights.append(weight)
+
+    return codes, uniques, weights
+
+
+def compact_codes(index, labels):
+    """Encode labels given by index into a list as codes in order of first appearance
+
+    Labels that are not used are dropped, and repeated labels are merged.
+
+    Parameters
+    ----------
+
+    index : np.array
+        Index of the label of each row into `labels`, `-1` for gaps.
+
+    labels : list
+        The labels.
+
+    Returns
+    -------
+
+    codes : np.array
+        Integer code of each label, `-1` for gaps.
+
+    uniques : np.array
+        The unique labels (object array), indexed by code.
+    """
+
+    used, first = np.unique(index[index >= 0], return_index=True)
+    used = used[np.argsort(first, kind="stable")]
+    used_codes, uniques = factorize(object_array(labels)[used])
+    lookup = np.full(len(labels) + 1, -1, dtype=np.intp)
+    lookup[used] = used_codes
+    return lookup[index], uniques
+
+
+def is_arrow(data):
+    """Whether the data is a PyArrow table or a path to a Parquet file"""
+    return isinstance(data, (str, os.PathLike)) or type(data).__module__.startswith("pyarrow")
+
+
+def read_arrow(source, stages=None):
+    """Read the label codes and weights of each stage from Arrow data
+
+    Requires PyArrow. Label columns are dictionary encoded, if not already,
+    and their indices used as the codes, so labels are never converted
+    to Python objects row by row.
+
+    Parameters
+    ----------
+
+    source : pyarrow.Table, str or path
+        Table, or path of a Parquet file, of labels and weights in alternating columns.
+
+    stages : slice
+        Window of the stages to read, by default all. Only their columns are read from Parquet files.
+
+    Returns
+    -------
+
+    codes : dict
+        Integer code of the label of each row, by stage (`-1` for gaps).
+
+    uniques : dict
+        The unique labels of each stage, in order of first appearance, indexed by code.
+
+    weights : list
+        Weight of each row in each stage (NaN for gaps).
+    """
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(source, (str, os.PathLike)):
+        import pyarrow.parquet as pq
+
+        names = pq.read_schema(source).names
+        table = pq.read_table(source, columns=[names[col] for col in stage_columns(len(names), stages)])
+    else:
+        table = source.select(stage_columns(source.num_columns, stages))
+
+    codes = {}
+    uniques = {}
+    weights = []
+    for ss in range(table.num_columns // 2):
+        labels = table.column(2 * ss)
+        if not pa.types.is_dictionary(labels.type):
+            labels = pc.dictionary_encode(labels)
+        chunks = labels.unify_dictionaries().chunks
+        dictionary = chunks[0].dictionary.to_pylist() if chunks else []
+        index = [pc.fill_null(chunk.indices, -1).to_numpy() for chunk in chunks]
+        index = np.concatenate(index).astype(np.intp) if index else np.empty(0, dtype=np.intp)
+        codes[ss], uniques[ss] = compact_codes(index, dictionary)
+        weights.append(table.column(2 * ss + 1).to_numpy().astype(float, copy=False))
+
+    return codes, uniques, weights
+
+
+def count_stages(data):
+    """Number of stages of the data, without reading the columns
+
+    Parameters
+    ----------
+
+    data : DataFrame, array, pyarrow.Table or path
+        Labels and weights in alternating columns.
+
+    Returns
+    -------
+
+    num_stages : int
+        Number of label/weight column pairs.
+    """
+
+    if isinstance(data, (str, os.PathLike)):
+        import pyarrow.parquet as pq
+
+        return len(pq.read_schema(data).names) // 2
+    if is_arrow(data):
+        return data.num_columns // 2
+    return np.shape(data)[1] // 2
+
+
+def read_data(data, stages=None):
+    """Read the label codes and weights of each stage from any of the supported inputs
+
+    Parameters
+    ----------
+
+    data : DataFrame, array, list of matrices, pyarrow.Table or path
+        See `read_columns`, `read_matrices` and `read_arrow`.
+
+    stages : slice
+        Window of the stages to read, by default all.
+
+    Returns
+    -------
+
+    codes : dict
+        Integer code of the label of each row, by stage (`-1` for gaps).
+
+    uniques : dict
+        The unique labels of each stage, in order of first appearance, indexed by code.
+
+    weights : list
+        Weight of each row in each stage (NaN for gaps).
+    """
+
+    if is_arrow(data):
+        return read_arrow(data, stages)
+    if isinstance(data, (list, tuple)) and data and all(is_matrix(item) for item in data):
+        return read_matrices(data, stages)
+
+    labels, weights = read_columns(data, stages)
+    codes = {}
+    uniques = {}
+    for ss, column in enumerate(labels):
+        codes[ss], uniques[ss] = factorize(column)
+    return codes, uniques, weights
+
+
+@functools.lru_cache(maxsize=4096)
+def format_value(val, format_spec):
+    """Format a number, caching the strings of repeated values"""
+    return format(val, format_spec)
+
+
+def cull_overlaps(lo, hi, priority):
+    """Select intervals that do not overlap, preferring those of higher priority
+
+    Intervals are considered in order of decreasing priority and kept if they
+    do not overlap any interval already kept, which are held sorted for bisection.
+    Finding the neighbours of an interval takes logarithmic time, but inserting it into
+    the sorted lists moves the intervals after it, so the worst case is quadratic in the
+    number of intervals; that move is a fast memory copy for columns of labels.
+
+    Parameters
+    ----------
+
+    lo, hi : array
+        Lower and upper ends of each interval.
+
+    priority : array
+        Priority of each interval.
+
+    Returns
+    -------
+
+    keep : np.array
+        Boolean mask of the intervals kept.
+    """
+
+    keep = np.zeros(len(lo), dtype=bool)
+    starts = []
+    ends = []
+    for nn in np.argsort(-np.asarray(priority), kind="stable").tolist():
+        kk = bisect.bisect_left(starts, lo[nn])
+        if (kk > 0 and ends[kk - 1] > lo[nn]) or (kk < len(starts) and starts[kk] < hi[nn]):
+            continue
+        starts.insert(kk, lo[nn])
+        ends.insert(kk, hi[nn])
+        keep[nn] = True
+    return keep
+
+
+def spread_overlaps(centers, heights):
+    """Move intervals upwards until they do not overlap
+
+    Parameters
+    ----------
+
+    centers : array
+        Centre of each interval.
+
+    heights : array
+        Height of each interval.
+
+    Returns
+    -------
+
+    centers : np.array
+        New centre of each interval; the lowest interval is not moved.
+    """
+
+    centers = np.asarray(centers, dtype=float)
+    heights = np.asarray(heights, dtype=float)
+    moved = centers.copy()
+    top = -np.inf
+    for nn in np.argsort(centers, kind="stable").tolist():
+        bottom = max(centers[nn] - heights[nn] / 2, top)
+        moved[nn] = bottom + heights[nn] / 2
+        top = bottom + heights[nn]
+    return moved
+
+
+def object_array(items):
+    """One-dimensional object array of the items (which may themselves be sequences)"""
+    arr = np.empty(len(items), dtype=object)
+    arr[:] = list(items)
+    return arr
+
+
+def bin_sums(keys, weights, num_bins):
+    """Sum of the weights in each bin, treating NaN weights as zero
+
+    Parameters
+    ----------
+
+    keys : np.array
+        Bin of each item, from `0` to `num_bins`; items in bin `num_bins` are left out.
+
+    weights : np.array
+        Weight of each item. Only copied if NaN weights are counted.
+
+    num_bins : int
+        Number of bins.
+
+    Returns
+    -------
+
+    sums : np.array
+        Sum of the weights in each bin.
+    """
+
+    sums = np.bincount(keys, weights=weights, minlength=num_bins + 1)[:num_bins]
+    if np.isnan(sums).any():
+        sums = np.bincount(keys, weights=np.nan_to_num(weights), minlength=num_bins + 1)[:num_bins]
+    return sums
+
+
+def stacked(groups, sizes):
+    """Offset of each item when items of the same group are stacked in order
+
+    Parameters
+    ----------
+
+    groups : np.array
+        Integer group of each item.
+
+    sizes : np.array
+        Size of each item.
+
+    Returns
+    -------
+
+    offsets : np.array
+        Sum of the sizes of the preceding items in the same group.
+    """
+
+    order = np.argsort(groups, kind="stable")
+    sorted_sizes = sizes[order]
+    cumsum = np.cumsum(sorted_sizes) - sorted_sizes
+    first = np.r_[True, groups[order][1:] != groups[order][:-1]]
+    start = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+    offsets = np.empty_like(cumsum)
+    offsets[order] = cumsum - cumsum[start]
+    return offsets
+
+
+def label_colors(labels, colormap="viridis", color_dict=None):
+    """Colour of each label, spread over a colormap in order, unless given in `color_dict`
+
+    Imports Matplotlib to look up the colormap, unless all labels are in `color_dict`.
+
+    Parameters
+    ----------
+
+    labels : list
+        Labels, in the order of their colours in the colormap.
+
+    colormap : str
+        Matplotlib colormap name.
+
+    color_dict : dict
+        Colours of some or all labels, taking precedence over the colormap.
+
+    Returns
+    -------
+
+    color_dict : dict
+        Colour of each label.
+    """
+
+    color_dict = color_dict or {}
+    if all(label in color_dict for label in labels if label is not None):
+        return color_dict
+
+    from matplotlib import cm
+
+    color_palette = getattr(cm, colormap, None)(np.linspace(0, 1, len(labels)))
+    return {label: color_dict.get(label, color_palette[i]) for i, label in enumerate(labels)}
+
+
+def shared_height(layouts):
+    """Largest stage total of layouts after `setup()`, the `plot_height_nom` to draw them all to the same scale
+
+    The totals are those drawn (`weight_sum`), i.e. after reclassification to `other_name`.
+    """
+    return max(float(np.max(sky.weight_sum)) for sky in layouts)
+
+
+###########################################
+
+
+class SankeyLayout:
+    """Layout of a Sankey Diagram
+
+    Calculates the position and size of all nodes, flows, labels and titles
+    without plotting anything. This is the base of the `Sankey` class, which
+    draws the layout with Matplotlib, and can be used on its own to obtain
+    the geometry for other renderers; see `geometry()`.
+
+    Parameters
+    ----------
+    data : DataFrame
+        pandas dataframe of labels and weights in alternating columns
+
+    node_edges: bool
+        Whether to plot edges around each node.
+
+    node_lw : float
+        Linewidth for node edges.
+
+    node_width : float
+        Normalised horizontal width of the data bars
+        (1.0 = 100% of plot width)
+
+    node_gap : float
+        Normalised vertical gap between successive data bars
+        (1.0 = 100% of nominal plot height).
+
+    node_alpha : float
+        Opacity of the nodes (`0.0` = transparent, `1.0` = opaque).
+
+    node_rasterized : bool
+        Whether to rasterize the nodes when saving to a vector format; see `flow_rasterized`.
+
+    color_dict : dict
+        Dictionary of colors to use for each label `{'label': 'color'}`
+
+    colormap : str
+        Matplotlib colormap name to automatically assign colours.
+        `color_dict` can overide these on an individual basis if needed
+
+    fontsize : int
+        Font size of the node labels and titles. Passed through to Matplotlib's text
+        option `fontsize`.
+
+    fontfamily: str
+        Font family of the node labels and titles. Passed through to Matplotlib's text
+        option `fontfamily`.
+
+    fontcolor: color
+        Font colour of the node labels and titles. Passed through to Matplotlib's text
+        option `color`.
+
+    flow_edge : bool
+        Whether to draw an edge to the flows.
+        Doesn't always look great when there is lots of branching and overlap.
+
+    flow_lw : float
+        Linewidth for flow edges.
+
+    flow_alpha : float
+        Opacity of the flows (`0.0` = transparent, `1.0` = opaque)
+
+    flow_batch : bool
+        Draw all strips of each flow as a single Matplotlib collection
+        rather than one artist per strip. Much faster for many flows.
+
+    flow_points : int
+        Number of points along each flow curve; each flow is drawn as `flow_points - 1` strips.
+        Defaults to the full resolution of 62 points.
+
+    flow_rasterized : bool
+        Whether to rasterize the flows when saving to a vector format (PDF, SVG, etc.).
+        Labels, values and titles remain vector text. Consecutive flows are merged
+        into a single image whose resolution is the `dpi` given to `savefig` (or `render`),
+        which keeps files small for diagrams with many flows.
+
+    frame_side : str
+        Whether to place a frame (horizontal rule) above or below the plot.
+        Allowed values: `"none"`, `"top"`, `"bottom"`, or `"both"`
+
+    frame_gap : str
+        Normalised vertical gap between the top/bottom of the plot and the frame
+        (1.0 = 100% of plot height)
+
+    frame_color : color
+        Color of frame
+
+    label_dict : dict
+        Dictionary of labels to optionally replace the labels in the data
+        (e.g., to provide abbreviations or human readable alternatives).
+        Format: `{'orig_label': 'printed_label'}`
+
+    label_width : float
+        Normalised horizontal space to reserve outside the plot
+        on the left and the right for labels
+        (1.0 = 100% of plot width)
+
+    label_gap : float
+        Normalised horizontal gap between the left/right of the
+        plot edges and the label
+        (1.0 = 100% of plot width)
+
+    label_loc : array or str
+        label_loc : strA
+        label_loc : [str1, strM, strN]
+        label_loc : [str1, str2,..., strN]
+
+        Position to place labels next to the nodes. Each str can be one of:
+        `"left"`, `"right"`, `"both"`, `"center"`,  `"top"`, or `"none"`.
+
+        Three syntax variations: if just one string is provided (`strA`), use this as the option for all flows.
+        If three strings provided, the first (`str1`) is the first, the third string (`strN`) is the last,
+        and the second string (`strM`) is used as the option for all middle flows.
+
+        * `str1`: position of value(s) in first flow
+        * `strM`: position of value(s) in middle flows
+        * `strN`: position of value(s) in last flow
+
+        Finally, a separate string can be provided for each flow.
+
+    label_largest: bool
+        Only the label the largest valued of all nodes for each label.
+
+    label_duplicate : bool
+        When set False, will only print a middle label if that label didn't
+        appear in the previous stage. This minimises chart clutter but might
+        be confusing in cases, hence defaulting to True.
+
+    label_font : dict
+        Dictionary of Matplotlib text options to be passed to the labels.
+
+    label_path_effects : dict
+        Dictionary of Matplotlib.patheffects options to be passed to the labels.
+
+    label_overlap : str
+        What to do with node labels and flow values that overlap others in the same column,
+        using their size as measured when drawing.
+        Allowed values: `"none"` (draw all, the default), `"drop"` (omit those overlapping
+        labels of larger nodes or flows), or `"offset"` (move labels up until they no longer overlap).
+
+    label_values : bool
+        Whether to include the value of the node size with the node label text.
+
+    label_value_sep : str
+        If values are included in the label, this defined the separator.
+
+    label_thresh : float
+        Only print labels when their node is greater or equal to this value.
+
+    label_thresh_ofsum : float
+        Only print labels when their node value is greater or equal than this percentage of the total of this stage.
+
+    label_thresh_ofmax : float
+        Only print labels when their node value is greater or equal than this percentage of the maximum total across all stages.
+
+    max_artists : int
+        Maximum number of Matplotlib artists to draw. If the diagram would need more,
+        it is simplified step by step until it fits: fewer `flow_points`, `flow_batch`,
+        removing small value and percentage labels, and increasing `other_thresh_ofmax`.
+        The steps taken are listed in the `degradations` attribute of `Sankey`,
+        and only apply to the current layout: the next `setup` starts from the options as given.
+
+    other_thresh : float
+        Sets threshold to recategorise nodes that are below a certain value.
+        Up to three dictionary keys can be set:
+
+        * `"val": v` — set node to other if it is less than `v`
+        * `"ofsum": s` — set node to other if it is less than `s` fraction
+                       of the summed total of all nodes in the current stage
+        * `"ofmax": m` — set node to other if is is less than `m` fraction
+                       of the maximum summed total across all stages
+
+        If any of these criteria are met the reclassification will occur.
+
+    other_thresh_ofsum : float
+        Sets threshold to recategorise nodes that are below a certain value.
+        Up to three dictionary keys can be set:
+
+        * `"val": v` — set node to other if it is less than `v`
+        * `"ofsum": s` — set node to other if it is less than `s` fraction
+                       of the summed total of all nodes in the current stage
+        * `"ofmax": m` — set node to other if is is less than `m` fraction
+                       of the maximum summed total across all stages
+
+        If any of these criteria are met the reclassification will occur.
+
+    other_thresh_ofmax : float
+        Sets threshold to recategorise nodes that are below a certain value.
+        Up to three dictionary keys can be set:
+
+        * `"val": v` — set node to other if it is less than `v`
+        * `"ofsum": s` — set node to other if it is less than `s` fraction
+                       of the summed total of all nodes in the current stage
+        * `"ofmax": m` — set node to other if is is less than `m` fraction
+                       of the maximum summed total across all stages
+
+        If any of these criteria are met the reclassification will occur.
+
+    other_name : str
+        The string used to rename nodes to if they are classified as “other”.
+
+    plot_height_nom : float
+        Nominal height of the diagram, in units of the weights, to which the gaps and the
+        `_ofmax` label thresholds are relative. Defaults to the largest total of the stages.
+        Give several diagrams the same value to draw them to the same vertical scale.
+
+    percent_loc : array or str
+        percent_loc : strA
+        percent_loc : [str1, strM, strN]
+        percent_loc : [str1, str2,..., strN]
+
+        Position to place percentage labels next to the nodes. Each str can be one of:
+        `"left"`, `"right"`, `"center"`, or `"none"`.
+
+        Three syntax variations: if just one string is provided (`strA`), use this as the option for all nodes.
+        If three strings provided, the first (`str1`) is the first, the third string (`strN`) is the last,
+        and the second string (`strM`) is used as the option for all middle ones.
+
+        * `str1`: position of value(s) in first
+        * `strM`: position of value(s) in middle
+        * `strN`: position of value(s) in last
+
+        Finally, a separate string can be provided for each node.
+
+    percent_loc_ht : array or float
+        percent_loc_ht : numA
+        percent_loc_ht : [num1, numM, numN]
+        percent_loc_ht : [num1, num2,..., numN]
+
+        Vertical position to place percentage value, a normalised position between 0 and 1 relative to the bottom and top of the node. Default = 0.5.
+
+    percent_thresh : float
+        Only print percentage labels greater or equal to this value. In normalised units where 1 = 100%.
+
+    percent_thresh : float
+        Only print percentage labels if the value of the node is greater or equal to this value.
+
+    percent_format : str
+        String formatting specification passed internally to the `format()` function.
+
+    percent_font : dict
+        Dictionary of Matplotlib text options to be passed to the percentage labels.
+
+    sort : int
+        Sorting routine to use for the data.
+        * `"top"`: data is sorted with largest entries on top
+        * `"bottom"`: data is sorted with largest entries on bottom
+        * `"none"`: data is presented in the same order as it (first) appears in the DataFrame
+
+    sort_dict : dict
+        Override the weight sum used to sort nodes by the value specified in the dict.
+        Typically used to force particular categories to the top or bottom.
+
+    stages : slice
+        Window of the stages of the data to plot, e.g. `slice(10, 16)`. Only the columns of these
+        stages are read and processed, and the result is the same as plotting that subset of the columns:
+        rows present before or after the window are drawn as continuing at its edges.
+        Other per-stage options, such as `titles` or `label_loc`, refer to the stages in the window.
+
+    streaming : bool
+        Lay out and draw the diagram one section (pair of stages) at a time, releasing the data of
+        each section once drawn, so the memory for the rows is proportional to a few stages rather than all of them.
+        `setup` then reads the data one stage at a time to calculate the totals that fix the scale.
+        The laid-out nodes, flows and texts of all sections are kept, for `geometry`, `Sankey.item_at`
+        and the SVG and raster writers (which lay out any sections not drawn yet), so they grow linearly
+        with the number of stages but not with the number of rows.
+        Data can be a DataFrame, an array, a PyArrow table or a Parquet file, but not flow matrices.
+        `max_artists` and `time_budget` are not applied.
+
+    stats : bool or SankeyStats
+        Collect the time of each phase of the layout and drawing, and the number of artists drawn.
+        When `True` a new `SankeyStats` object is created;
+        pass an existing one to accumulate statistics over several diagrams.
+        Either way it is available as the `stats` attribute.
+        Each phase is also logged to the `ausankey` logger at debug level.
+
+    titles : list of str
+        Array of title strings for each columns
+
+    title_gap : float
+        Normalised vertical gap between the column and the title string
+        (1.0 = 100% of plot height)
+
+    title_side : str
+        Whether to place the titles above or below the plot.
+        Allowed values: `"top"`, `"bottom"`, or `"both"`
+
+    title_loc : str
+        Whether to place the titles next to each node of the plot
+        or outside the frame.
+        Allowed values: `"inner"` or `"outer"`
+
+    title_font : dict
+        Dictionary of Matplotlib text options to be passed to the titles.
+
+    time_budget : float
+        Approximate time limit in seconds for laying out and drawing the diagram.
+        The number of artists that can be drawn in the remaining time is estimated
+        from a typical time per artist, not measured, and used as for `max_artists`.
+
+    valign : str
+        Vertical alignment of the data bars at each stage,
+        with respect to the whole plot.
+        Allowed values: `"top"`, `"bottom"`, or `"center"`
+
+    value_loc : array or str
+        value_loc : strA
+        value_loc : [str1, strM, strN]
+        value_loc : [str1, str2,..., strN]
+
+        Position to place values next to the nodes corresponding to the sizes.
+        These are placed within the flows at the beginning (left) and end (right) of each one.
+        Each str can be one of: `"left"`, `"right"`, `"both"`, or `"none"`
+
+        Three syntax variations: if just one string is provided (`strA`), use this as the option for all flows.
+        If three strings provided, the first (`str1`) is the first, the third string (`strN`) is the last,
+        and the second string (`strM`) is used as the option for all middle flows.
+
+        * `str1`: position of value(s) in first flow
+        * `strM`: position of value(s) in middle flows
+        * `strN`: position of value(s) in last flow
+
+        Finally, a separate string can be provided for each flow.
+
+    value_format : str
+        String formatting specification passed internally to the `format()` function.
+
+    value_fn : lambda function
+        Alternative to value_format. Transform the value label using the specified lambda function; the output must be a string. E.g.:
+
+            value_fn = lambda x: f"${round(x)}"
+
+    value_gap : float
+        Horizontal space fraction between the edge of the node and the value label.
+        Defaults to `label_gap`.
+
+    value_font : dict
+        Dictionary of Matplotlib text options to be passed to the value labels.
+
+    value_thresh : float
+        Only print labels larger than this absolute value threshold.
+
+    value_thresh_ofsum : float
+        Only print labels larger than this threshold as a fraction of the sum of all node weights in the stage.
+
+    value_thresh_ofmax : float
+        Only print labels larger than this threshold as a fraction of the maximum of the summed weights across all stages.
+
+    value_duplicate : bool
+        When `True` (default), all values are printed. When `False`, only print a right value if it is not equal to the preceding left value.
+
+    verbose : int
+        When greater than zero, prints debug information to the terminal.
+    """
+
+    def __init__(
+        self,
+        color_dict=None,
+        colormap="viridis",
+        flow_edge=None,
+        flow_alpha=0.6,
+        flow_batch=None,
+        flow_lw=1,
+        flow_points=None,
+        flow_rasterized=None,
+        fontcolor="black",
+        fontfamily="sans-serif",
+        fontsize=12,
+        frame_side="none",
+        frame_gap=0.1,
+        frame_color=None,
+        frame_lw=1,
+        label_dict=None,
+        label_width=0,
+        label_gap=0.02,
+        label_loc=("left", "none", "right"),
+        label_font=None,
+        label_path_effects=None,
+        label_overlap="none",
+        label_duplicate=None,
+        label_largest=None,
+        label_values=None,
+        label_value_sep="\n",
+        label_thresh=0,
+        label_thresh_ofsum=0,
+        label_thresh_ofmax=0,
+        max_artists=None,
+        node_lw=1,
+        node_width=0.02,
+        node_gap=0.05,
+        node_alpha=1,
+        node_edge=None,
+        node_rasterized=None,
+        other_thresh=0,
+        other_thresh_ofmax=0,
+        other_thresh_ofsum=0,
+        other_name="Other",
+        percent_loc="none",
+        percent_loc_ht=0.5,
+        plot_height_nom=None,
+        percent_thresh=0,
+        percent_thresh_val=0,
+        percent_thresh_ofmax=0,
+        percent_format="2.0f",
+        percent_font=None,
+        sort="bottom",  # "top", "bottom", "none"
+        sort_dict=None,
+        stages=None,
+        stats=None,
+        streaming=None,
+        titles=None,
+        title_gap=0.05,
+        title_side="top",  # "bottom", "both"
+        title_loc="inner",  # "outer"
+        title_font=None,
+        time_budget=None,
+        valign="bottom",  # "top","center"
+        value_format=".0f",
+        value_fn=None,
+        value_gap=None,
+        value_font=None,
+        value_loc=("both", "right", "right"),
+        value_thresh=0,
+        value_thresh_ofsum=0,
+        value_thresh_ofmax=0,
+        value_duplicate=None,
+        verbose=0,
+    ):
+        """Assigns all input arguments to the class as variables with appropriate defaults"""
+        self.color_dict = color_dict or {}
+        self.colormap = colormap
+        self.flow_edge = flow_edge or False
+        self.flow_alpha = flow_alpha
+        self.flow_batch = flow_batch or False
+        self.flow_points = flow_points
+        self.flow_lw = flow_lw
+        self.flow_rasterized = flow_rasterized or False
+        self.fontcolor = fontcolor
+        self.fontsize = fontsize
+        self.fontfamily = fontfamily
+        self.frame_side = frame_side
+        self.frame_gap = frame_gap
+        self.frame_color = frame_color or [0, 0, 0, 1]
+        self.frame_lw = frame_lw
+        self.label_dict = label_dict or {}
+        self.label_width = label_width
+        self.label_gap = label_gap
+        self.label_loc = label_loc
+        self.label_font = label_font or {}
+        self.label_path_effects = label_path_effects
+        self.label_thresh = label_thresh
+        self.label_thresh_ofsum = label_thresh_ofsum
+        self.label_thresh_ofmax = label_thresh_ofmax
+        self.max_artists = max_artists
+        self.label_duplicate = True if label_duplicate is None else label_duplicate
+        self.label_largest = False if label_largest is None else label_largest
+        self.label_overlap = label_overlap
+        self.label_values = False if label_values is None else label_values
+        self.label_value_sep = label_value_sep
+        self.node_lw = node_lw
+        self.node_width = node_width
+        self.node_gap = node_gap
+        self.node_alpha = node_alpha
+        self.node_edge = node_edge or False
+        self.node_rasterized = node_rasterized or False
+        self.other_name = other_name
+        self.other_thresh = other_thresh
+        self.other_thresh_ofmax = other_thresh_ofmax
+        self.other_thresh_ofsum = other_thresh_ofsum
+        self.percent_loc = percent_loc
+        self.plot_height_fixed = plot_height_nom
+        self.percent_loc_ht = percent_loc_ht
+        self.percent_thresh = percent_thresh
+        self.percent_thresh_val = percent_thresh_val
+        self.percent_thresh_ofmax = percent_thresh_ofmax
+        self.percent_format = percent_format
+        self.percent_font = percent_font
+        self.sort = sort
+        self.sort_dict = sort_dict or {}
+        self.stages = stages
+        self.streaming = False if streaming is None else streaming
+        self.stats = SankeyStats() if stats is True else (stats or None)
+        self.titles = titles
+        self.title_font = title_font or {"fontweight": "bold"}
+        self.time_budget = time_budget
+        self.title_gap = title_gap
+        self.title_loc = title_loc
+        self.title_side = title_side
+        self.valign = valign
+        self.value_format = value_format
+        self.value_fn = value_fn
+        self.value_gap = label_gap if value_gap is None else value_gap
+        self.value_font = value_font or {}
+        self.value_loc = value_loc
+        self.value_thresh = value_thresh
+        self.value_thresh_ofsum = value_thresh_ofsum
+        self.value_thresh_ofmax = value_thresh_ofmax
+        self.value_duplicate = True if value_duplicate is None else value_duplicate
+        self.verbose = verbose
+
+        logger.setLevel(logging.INFO)
+        if self.verbose > 1:
+            logger.setLevel(logging.DEBUG)
+
+    ###########################################
+
+    @phase()
+    def setup(self, data):
+        """Calculates all parameters needed to plot the graph
+
+        Parameters
+        ----------
+        data : DataFrame, array, list of matrices, pyarrow.Table or path
+            Labels and weights in alternating columns, as a pandas DataFrame, rows of an array,
+            a PyArrow table or the path of a Parquet file (see `read_arrow`);
+            or a list of flow matrices between adjacent stages (see `read_matrices`).
+        """
+
+        self.data = data
+        if self.streaming:
+            if isinstance(data, (list, tuple)) and data and all(is_matrix(item) for item in data):
+                msg = "Streaming is not supported for flow matrices"
+                raise ValueError(msg)
+            if not (hasattr(data, "iloc") or is_arrow(data)):
+                self.data = np.asarray(data, dtype=object)  # convert once rather than for every stage
+            self.stage_window = range(count_stages(self.data))[self.stages or slice(None)]
+            self.node_codes = {}
+            self.nodes_uniq = {}
+            self.weights = {}
+            self.num_stages = len(self.stage_window)
+        else:
+            self.node_codes, self.nodes_uniq, self.weights = read_data(data, self.stages)
+            self.num_stages = len(self.weights)  # number of stages
+        self.num_flow = self.num_stages - 1
+        self.sections = range(self.num_flow)
+
+        short_num = 3
+
+        # arg syntactic sugar
+        def fix_length(str_or_array, nmax):
+            if isinstance(str_or_array, (float, str)):
+                return np.repeat(str_or_array, nmax)
+            if len(str_or_array) == short_num and nmax == short_num - 1:
+                return np.concatenate([[str_or_array[0]], [str_or_array[2]]])
+            if len(str_or_array) == short_num and nmax > short_num:
+                return np.concatenate([[str_or_array[0]], np.repeat(str_or_array[1], nmax - 2), [str_or_array[2]]])
+            return str_or_array
+
+        self.value_loc = fix_length(self.value_loc, self.num_flow)
+        self.label_loc = fix_length(self.label_loc, self.num_stages)
+        self.percent_loc = fix_length(self.percent_loc, self.num_stages)
+        self.percent_loc_ht = fix_length(self.percent_loc_ht, self.num_stages)
+
+        # sizes
+        self.node_sizes = {}
+
+        if self.streaming:
+            self.scan_stages()
+            self.calc_plot_height()
+            self.calc_plot_dimens()
+            self.sections = range(0)  # none laid out yet
+            return
+
+        # weight and reclassify
+        self.weight_labels()
+        self.plot_height_raw = max(self.weight_sum)
+        for ii in range(self.num_stages):
+            self.reclassify(ii)
+        self.weight_labels()
+
+        # sort and calc
+        for ii in range(self.num_stages):
+            self.node_sizes[ii] = self.sort_node_sizes(self.node_sizes[ii], self.sort)
+
+        self.calc_plot_height()
+        self.calc_plot_dimens()
+        self.calc_node_pos()
+        self.calc_flows()
+        self.calc_labels()
+        self.calc_titles()
+
+        # labels, in order of first appearance reading the data row by row
+        first_seen = [seen for ii in range(self.num_stages) for seen in self.first_seen(ii)]
+        self.all_labels = list(dict.fromkeys(label for _, _, label in sorted(first_seen, key=lambda x: x[:2])))
+
+    ###########################################
+
+    def scan_stages(self):
+        """Weight and reclassify the stages one at a time, keeping only their totals (for `streaming`)"""
+
+        self.weight_sum = np.empty(self.num_stages)
+        self.num_nodes = np.empty(self.num_stages, dtype=int)
+        self.node_indiv_heights = {}
+        self.nodes_largest = {}
+
+        # the largest total before reclassification is only needed for `other_thresh_ofmax`
+        self.plot_height_raw = 0
+        if self.other_thresh_ofmax:
+            for ii in range(self.num_stages):
+                self.load_stages(ii - 1, ii + 1)
+                self.weight_stage(ii)
+            self.plot_height_raw = max(self.weight_sum)
+
+        first_seen = {}
+        for ii in range(self.num_stages):
+            self.load_stages(ii - 1, ii + 1)
+            self.weight_stage(ii)
+            self.reclassify(ii)
+            self.weight_stage(ii)
+            for label, size in self.node_sizes[ii].items():
+                self.nodes_largest[label] = max(size, self.nodes_largest.get(label, 0))
+            for row, stage, label in self.first_seen(ii):
+                first_seen[label] = min(first_seen.get(label, (row, stage)), (row, stage))
+        self.load_stages(0, -1)
+
+        self.plot_height_nom = max(self.weight_sum) if self.plot_height_fixed is None else self.plot_height_fixed
+        self.all_labels = sorted(first_seen, key=first_seen.get)
+
+    def load_stages(self, first, last):
+        """Read the data of stages `first` to `last` if needed, and release that of all others (for `streaming`)"""
+
+        keep = range(max(first, 0), min(last, self.num_stages - 1) + 1)
+        for stage_data in (self.node_codes, self.nodes_uniq, self.weights, self.node_sizes, self.node_indiv_heights):
+            for ss in [ss for ss in stage_data if ss not in keep]:
+                del stage_data[ss]
+
+        for ss in keep:
+            if ss not in self.node_codes:
+                col = self.stage_window[ss]
+                codes, uniques, weights = read_data(self.data, slice(col, col + 1))
+                self.node_codes[ss], self.nodes_uniq[ss], self.weights[ss] = codes[0], uniques[0], weights[0]
+
+    def layout_sections(self):
+        """Iterate over the indices of the sections to draw
+
+        When `streaming`, each section is laid out just before it is yielded,
+        and the data of the previous sections is released.
+        """
+
+        if not self.streaming:
+            yield from range(self.num_flow)
+            return
+
+        # the items of all sections are kept, as they grow with the stages but not the rows,
+        # for `geometry`, hit-testing and the writers; those of the texts once fitted by `Sankey.plot`
+        names = ("node_items", "flows", "label_items", "percent_items", "value_items", "title_items")
+        kept = {name: {} for name in names}
+        ready = -1  # last stage weighted, reclassified and sorted
+        for ii in range(self.num_flow):
+            self.load_stages(ii - 1, ii + 2)
+            for ss in range(ready + 1, ii + 2):
+                self.weight_stage(ss)
+                self.reclassify(ss)
+                self.weight_stage(ss)
+                self.node_sizes[ss] = self.sort_node_sizes(self.node_sizes[ss], self.sort)
+            ready = ii + 1
+
+            self.sections = range(ii, ii + 1)
+            self.calc_node_pos()
+            self.calc_flows()
+            self.calc_labels()
+            self.calc_titles()
+            yield ii
+            for name, items in kept.items():
+                items.update(getattr(self, name))
+        self.load_stages(0, -1)
+        for name, items in kept.items():
+            setattr(self, name, items)
+        self.sections = range(self.num_flow)
+
+    def layout_all(self):
+        """Lay out all sections, if not done yet when `streaming`, e.g. before writing the diagram"""
+
+        if self.streaming and self.sections != range(self.num_flow):
+            for _ in self.layout_sections():
+                pass
+
+    def first_seen(self, ii):
+        """First row of each label of a stage, as `(row, stage, label)`; the label of gaps is `None`"""
+
+        # codes are numbered in order of first appearance, so each appears first where their running maximum increases
+        codes = self.node_codes[ii]
+        running = np.maximum.accumulate(codes) if len(codes) else codes
+        rows = np.flatnonzero(np.diff(running, prepend=-1) > 0)
+        seen = [(row, ii, self.nodes_uniq[ii][code]) for row, code in zip(rows.tolist(), running[rows].tolist())]
+
+        gaps = np.flatnonzero(codes < 0)
+        if len(gaps):
+            seen.append((int(gaps[0]), ii, None))
+        return seen
+
+    ###########################################
+
+    @phase()
+    def weight_labels(self):
+        """Calculates sizes of each node, taking into account discontinuities"""
+        self.weight_sum = np.empty(self.num_stages)
+        self.num_nodes = np.empty(self.num_stages, dtype=int)
+
+        self.node_indiv_heights = {}
+        self.nodes_largest = {}
+
+        for ii in range(self.num_stages):
+            self.weight_stage(ii)
+            for lbl, size in self.node_sizes[ii].items():
+                self.nodes_largest[lbl] = max(size, self.nodes_largest.get(lbl, 0))
+
+        self.plot_height_nom = max(self.weight_sum) if self.plot_height_fixed is None else self.plot_height_fixed
+
+    def weight_stage(self, ii):
+        """Calculates sizes of the nodes of one stage, from its rows and the gaps in the adjacent stages"""
+
+        self.node_sizes[ii] = {}
+        self.node_indiv_heights.setdefault(ii, {})[0] = {}
+        if ii > 0:
+            self.node_indiv_heights.setdefault(ii - 1, {})[1] = {}
+
+        # 0 = continuing, 1 = starting, 2 = stopping, 3 = only this stage
+        gaps = self.node_codes[ii] < 0
+        none_prev = self.node_codes[ii - 1] < 0 if ii > 0 else gaps
+        none_next = self.node_codes[ii + 1] < 0 if ii < self.num_flow else gaps
+
+        # bin rows by label and kind in place, with gaps in a last bin
+        num_uniq = len(self.nodes_uniq[ii])
+        key = 4 * self.node_codes[ii]
+        key += none_prev
+        key += none_next
+        key += none_next
+        np.putmask(key, gaps, 4 * num_uniq)
+        sums = bin_sums(key, self.weights[ii], 4 * num_uniq)
+        weight_cont, weight_strt, weight_stop, weight_only = sums.reshape(num_uniq, 4).T.tolist()
+
+        for nn, lbl in enumerate(self.nodes_uniq[ii]):
+            self.node_indiv_heights[ii][0][lbl] = weight_cont[nn] + weight_only[nn] + weight_stop[nn]
+            if ii > 0:
+                self.node_indiv_heights[ii - 1][1][lbl] = weight_cont[nn] + weight_only[nn] + weight_strt[nn]
+            self.node_sizes[ii][lbl] = weight_cont[nn] + weight_only[nn] + max(weight_stop[nn], weight_strt[nn])
+
+        self.weight_sum[ii] = np.sum(list(self.node_sizes[ii].values()))
+        self.num_nodes[ii] = num_uniq
+
+    def reclassify(self, ii):
+        """Relabel the nodes of a stage below the `other_thresh` thresholds as `other_name`
+
+        Uses the sizes from `weight_stage`, which needs to be repeated afterwards.
+        """
+
+        logger.debug("\nStage: %s", ii)
+        sizes = np.array([self.node_sizes[ii][lbl] for lbl in self.nodes_uniq[ii]])
+        other = (
+            (sizes < self.other_thresh)
+            | (sizes < self.other_thresh_ofsum * self.weight_sum[ii])
+            | (sizes < self.other_thresh_ofmax * self.plot_height_raw)
+        )
+        if not other.any():
+            return
+        logger.debug("Making OTHER: %s", self.nodes_uniq[ii][other])
+        # codes are in order of first appearance, so relabelling the unique labels keeps that order
+        relabel = self.nodes_uniq[ii].copy()
+        relabel[other] = self.other_name
+        codes, self.nodes_uniq[ii] = factorize(relabel)
+        self.node_codes[ii] = np.append(codes, -1)[self.node_codes[ii]]
+
+    ###########################################
+
+    @phase()
+    def calc_plot_height(self):
+        """Calculate column heights, offsets, and total plot height"""
+
+        vscale_dict = {"top": 1, "center": 0.5, "bottom": 0}
+        self.vscale = vscale_dict.get(self.valign, 0)
+
+        self.voffset = np.empty(self.num_stages)
+        col_hgt = np.empty(self.num_stages)
+        for ii in range(self.num_stages):
+            col_hgt[ii] = self.weight_sum[ii] + (self.num_nodes[ii] - 1) * self.node_gap * self.plot_height_nom
+            self.voffset[ii] = self.vscale * (col_hgt[0] - col_hgt[ii])
+
+        self.plot_height = max(col_hgt)
+
+    ###########################################
+
+    @phase()
+    def calc_plot_dimens(self):
+        """Calculate absolute size of plot dimens based on scaling factors"""
+
+        # overall dimensions
+        self.sub_width = self.plot_height
+        self.plot_width_nom = (self.num_stages - 1) * self.sub_width
+        self.plot_width = (
+            (self.num_stages - 1) * self.sub_width
+            + 2 * self.plot_width_nom * (self.label_gap + self.label_width)
+            + self.num_stages * self.plot_width_nom * self.node_width
+        )
+
+        # vertical positions
+        self.y_node_gap = self.node_gap * self.plot_height_nom
+        self.y_title_gap = self.title_gap * self.plot_height_nom
+        self.y_frame_gap = self.frame_gap * self.plot_height_nom
+        self.y_label_gap = self.label_gap * self.plot_height_nom
+
+        # horizontal positions
+        self.x_node_width = self.node_width * self.plot_width_nom
+        self.x_label_width = self.label_width * self.plot_width_nom
+        self.x_label_gap = self.label_gap * self.plot_width_nom
+        self.x_value_gap = self.value_gap * self.plot_width_nom
+
+        # sections and stages
+        self.x_lr = {}
+        self.xticks = np.empty(self.num_stages)
+        for ii in range(self.num_flow):
+            x_left = (
+                self.x_node_width + self.x_label_gap + self.x_label_width + ii * (self.sub_width + self.x_node_width)
+            )
+            if ii == 0:
+                self.xticks[ii] = self.x_label_gap + self.x_node_width / 2
+            self.xticks[ii + 1] = x_left + self.sub_width + self.x_node_width / 2
+            self.x_lr[ii] = (x_left, x_left + self.sub_width)
+
+        # frame
+        self.y_frame = (
+            min(self.voffset) - self.y_frame_gap,
+            min(self.voffset) + self.plot_height + self.y_frame_gap,
+        )
+
+    ###########################################
+
+    @phase()
+    def calc_node_pos(self):
+        """Calculate vertical position of each node"""
+
+        self.node_pos_voffset = {}
+        self.node_pos_bot = {}
+        self.node_pos_top = {}
+        self.node_items = {}
+        for ii in self.sections:
+            self.node_pos_voffset[ii] = [{}, {}]
+            self.node_pos_bot[ii] = [{}, {}]
+            self.node_pos_top[ii] = [{}, {}]
+            self.node_items[ii] = []
+            prev_label = None  # avoid lint error
+            for lr in [0, 1]:
+                for i, (label, node_height) in enumerate(self.node_sizes[ii + lr].items()):
+                    this_side_height = self.node_indiv_heights[ii][lr].get(label, 0)
+                    self.node_pos_voffset[ii][lr][label] = self.vscale * (node_height - this_side_height)
+                    if i == 0:
+                        tmp_top = self.voffset[ii + lr]
+                    else:
+                        tmp_top = self.node_pos_top[ii][lr][prev_label] + self.y_node_gap
+                    self.node_pos_bot[ii][lr][label] = tmp_top
+                    self.node_pos_top[ii][lr][label] = tmp_top + node_height
+                    prev_label = label
+
+            for lr in self.stage_sides(ii):
+                for label, node_height in self.node_sizes[ii + lr].items():
+                    self.node_items[ii].append(
+                        (
+                            self.x_lr[ii][lr] - self.x_node_width * (1 - lr),
+                            self.x_node_width,
+                            self.node_pos_bot[ii][lr][label],
+                            node_height,
+                            label,
+                        )
+                    )
+
+    ###########################################
+
+    @phase()
+    def calc_flows(self):
+        """Calculate the size and vertical position of each flow between two nodes
+
+        The flows of each section are held in `flow_arrays[ii]` as a sparse matrix
+        in coordinate form, sorted by row then column: `node_l` and `node_r` index the
+        nodes in the order of `node_sizes`, and `llen` and `rlen` are the weights
+        on the left and right. See `flow_matrix()`.
+        """
+
+        self.node_pairs = {}
+        self.flows = {}
+        self.flow_arrays = {}
+        for ii in self.sections:
+            self.node_pairs[ii] = []
+            self.flows[ii] = []
+
+            # rank of each label code in the sorted order of the nodes (gaps index the last entry)
+            rank = []
+            for lr in [0, 1]:
+                order = {lbl: nn for nn, lbl in enumerate(self.node_sizes[ii + lr])}
+                rank.append(np.array([order[lbl] for lbl in self.nodes_uniq[ii + lr]] + [0], dtype=np.intp))
+            num_l = len(self.node_sizes[ii])
+            num_r = len(self.node_sizes[ii + 1])
+
+            # pair of nodes of each row, with gaps in a last bin
+            codes_l = self.node_codes[ii]
+            codes_r = self.node_codes[ii + 1]
+            key = rank[0][codes_l] * num_r
+            key += rank[1][codes_r]
+            np.putmask(key, (codes_l < 0) | (codes_r < 0), num_l * num_r)
+            if num_l * num_r <= len(key):
+                pairs = np.flatnonzero(np.bincount(key, minlength=num_l * num_r + 1)[: num_l * num_r])
+                len_l = bin_sums(key, self.weights[ii], num_l * num_r)[pairs]
+                len_r = bin_sums(key, self.weights[ii + 1], num_l * num_r)[pairs]
+            else:
+                # more possible pairs than rows: number the pairs present instead
+                pairs, key = np.unique(key, return_inverse=True)
+                pairs = pairs[pairs < num_l * num_r]
+                len_l = bin_sums(key, self.weights[ii], len(pairs))
+                len_r = bin_sums(key, self.weights[ii + 1], len(pairs))
+
+            # nodes of each flow, as indices into the sorted nodes
+            node_l = pairs // num_r
+            node_r = pairs % num_r
+
+            # stack flows so each one starts where the previous ended:
+            # on the left in order of the right nodes, on the right in order of the left nodes
+            base = []
+            for lr in [0, 1]:
+                voffset = self.node_pos_voffset[ii][lr].values()
+                bot = self.node_pos_bot[ii][lr].values()
+                base.append(np.fromiter(voffset, dtype=float) + np.fromiter(bot, dtype=float))
+            lbot = base[0][node_l] + stacked(node_l, len_l)
+            rbot = base[1][node_r] + stacked(node_r, len_r)
+            self.flow_arrays[ii] = {
+                "node_l": node_l,
+                "node_r": node_r,
+                "lbot": lbot,
+                "rbot": rbot,
+                "llen": len_l,
+                "rlen": len_r,
+            }
+
+            labels_l = object_array(self.node_sizes[ii])[node_l].tolist()
+            labels_r = object_array(self.node_sizes[ii + 1])[node_r].tolist()
+            self.node_pairs[ii] = list(zip(labels_l, labels_r))
+            self.flows[ii] = list(zip(labels_l, labels_r, lbot.tolist(), rbot.tolist(), len_l.tolist(), len_r.tolist()))
+
+    def flow_matrix(self, ii, side="left", sparse=False):
+        """Weights of the flows of a section as a matrix of left by right nodes
+
+        Rows and columns are in the order of `node_sizes[ii]` and `node_sizes[ii + 1]`,
+        so row sums are the totals flowing out of each left node and column sums
+        the totals flowing into each right node (rows with gaps are not included).
+
+        Parameters
+        ----------
+        ii : int
+            Index of the section, between stages `ii` and `ii + 1`.
+
+        side : str
+            `"left"` for the weights in stage `ii`, or `"right"` for those in stage `ii + 1`.
+
+        sparse : bool
+            Whether to return a SciPy sparse array (requires SciPy) rather than a dense NumPy array.
+
+        Returns
+        -------
+
+        matrix : np.array or scipy.sparse.csr_array
+            Matrix of shape `(len(node_sizes[ii]), len(node_sizes[ii + 1]))`.
+        """
+
+        flows = self.flow_arrays[ii]
+        weights = flows[{"left": "llen", "right": "rlen"}[side]]
+        shape = (len(self.node_sizes[ii]), len(self.node_sizes[ii + 1]))
+        if sparse:
+            try:
+                from scipy.sparse import csr_array
+            except ImportError as err:
+                msg = "flow_matrix(sparse=True) requires SciPy"
+                raise ImportError(msg) from err
+
+            return csr_array((weights, (flows["node_l"], flows["node_r"])), shape=shape)
+
+        matrix = np.zeros(shape)
+        matrix[flows["node_l"], flows["node_r"]] = weights
+        return matrix
+
+    ###########################################
+
+    @phase()
+    def calc_masks(self):
+        """Calculate which node labels, percentages and flow values pass their thresholds
+
+        Sets `label_mask[s]` and `percent_mask[s]`, boolean arrays over the nodes of stage `s`
+        in the order of `node_sizes[s]`, and `value_mask[ii]`, a boolean array of shape
+        `(num_flows, 2)` for the left and right values of each flow in `flows[ii]`.
+        """
+
+        self.label_mask = {}
+        self.percent_mask = {}
+        self.value_mask = {}
+
+        sizes = {}
+        for ss in sorted({ii + lr for ii in self.sections for lr in [0, 1]}):
+            sizes[ss] = np.fromiter(self.node_sizes[ss].values(), dtype=float, count=len(self.node_sizes[ss]))
+            largest = np.array([self.nodes_largest[label] for label in self.node_sizes[ss]], dtype=float)
+
+            self.label_mask[ss] = (
+                (sizes[ss] != 0)
+                & (sizes[ss] >= self.label_thresh)
+                & (sizes[ss] >= self.label_thresh_ofsum * self.weight_sum[ss])
+                & (sizes[ss] >= self.label_thresh_ofmax * self.plot_height_nom)
+            )
+            if self.label_largest:
+                self.label_mask[ss] &= sizes[ss] >= largest
+
+            self.percent_mask[ss] = (
+                (100 * sizes[ss] / self.weight_sum[ss] >= 100 * self.percent_thresh)
+                & (sizes[ss] >= self.percent_thresh_val)
+                & (sizes[ss] >= self.percent_thresh_ofmax * self.plot_height_nom)
+            )
+
+        for ii in self.sections:
+            flows = self.flow_arrays[ii]
+            lens = np.column_stack([flows["llen"], flows["rlen"]])
+            node_l = sizes[ii][flows["node_l"]]
+            node_r = sizes[ii + 1][flows["node_r"]]
+
+            mask = (
+                (lens >= self.value_thresh)
+                & (lens >= self.value_thresh_ofsum * self.weight_sum[[ii, ii + 1]])
+                & (lens >= self.value_thresh_ofmax * self.plot_height_nom)
+            )
+            mask[:, 0] &= self.value_loc[ii] in ("left", "both")
+            mask[:, 1] &= self.value_loc[ii] in ("right", "both")
+            if self.label_values:
+                # values equal to the adjacent node label, or the left value equal to the succeeding node
+                mask[:, 0] &= (lens[:, 0] != node_l) & (lens[:, 0] != node_r)
+                mask[:, 1] &= lens[:, 1] != node_r
+            if not self.value_duplicate:
+                mask[:, 1] &= lens[:, 0] != lens[:, 1]
+            self.value_mask[ii] = mask
+
+    ###########################################
+
+    @phase()
+    def calc_labels(self):
+        """Calculate the position of the node labels, percentages and flow values to print"""
+
+        self.calc_masks()
+
+        self.label_items = {}
+        self.percent_items = {}
+        self.value_items = {}
+        for ii in self.sections:
+            x_lr = self.x_lr[ii]
+
+            # node labels
+            self.label_items[ii] = []
+            for lr in self.stage_sides(ii):
+                label_bool = ii + lr == 0 or ii + lr == self.num_flow or self.label_duplicate
+                loc = self.label_loc[ii + lr]
+                if not label_bool:
+                    continue
+
+                labels = list(self.node_sizes[ii + lr])
+                for nn in np.flatnonzero(self.label_mask[ii + lr]):
+                    label = labels[nn]
+                    val = self.node_sizes[ii + lr][label]
+
+                    yy = self.node_pos_bot[ii][lr][label] + val / 2
+                    if loc in ("left", "both"):
+                        xx = x_lr[lr] - self.x_label_gap + (lr - 1) * self.x_node_width
+                        self.label_items[ii].append((xx, yy, label, "right", val))
+
+                    if loc in ("center"):
+                        xx = x_lr[lr] + (2 * lr - 1) * self.x_node_width / 2
+                        self.label_items[ii].append((xx, yy, label, "center", val))
+
+                    if loc in ("top"):
+                        xx = x_lr[lr] + (2 * lr - 1) * self.x_node_width / 2
+                        yt = self.node_pos_bot[ii][lr][label] + val + self.y_label_gap
+                        self.label_items[ii].append((xx, yt, label, "center", val))
+
+                    if loc in ("right", "both"):
+                        xx = x_lr[lr] + self.x_label_gap + lr * self.x_node_width
+                        self.label_items[ii].append((xx, yy, label, "left", val))
+
+            # percent labels
+            self.percent_items[ii] = []
+            for lr in self.stage_sides(ii):
+                loc = self.percent_loc[ii + lr]
+                ht = self.percent_loc_ht[ii + lr]
+
+                labels = list(self.node_sizes[ii + lr])
+                for nn in np.flatnonzero(self.percent_mask[ii + lr]):
+                    label = labels[nn]
+                    absval = self.node_sizes[ii + lr][label]
+                    val = 100 * absval / self.weight_sum[ii + lr]
+
+                    yy = self.node_pos_bot[ii][lr][label] + ht * absval
+
+                    if loc in ("left"):
+                        xx = x_lr[lr] - self.x_label_gap + (lr - 1) * self.x_node_width
+                        self.percent_items[ii].append((xx, yy, val, "right"))
+
+                    if loc in ("center"):
+                        xx = x_lr[lr] + (2 * lr - 1) * self.x_node_width / 2
+                        self.percent_items[ii].append((xx, yy, val, "center"))
+
+                    if loc in ("right"):
+                        xx = x_lr[lr] + self.x_label_gap + lr * self.x_node_width
+                        self.percent_items[ii].append((xx, yy, val, "left"))
+
+            # flow values
+            flows = self.flow_arrays[ii]
+            nn, lr = np.nonzero(self.value_mask[ii])
+            left = lr == 0
+            bot = np.where(left, flows["lbot"][nn], flows["rbot"][nn])
+            val = np.where(left, flows["llen"][nn], flows["rlen"][nn])
+            xx = np.array(x_lr)[lr] + (1 - 2 * lr) * self.x_value_gap
+            self.value_items[ii] = list(
+                zip(xx.tolist(), (bot + val / 2).tolist(), val.tolist(), np.where(left, "left", "right").tolist())
+            )
+
+    ###########################################
+
+    @phase()
+    def calc_titles(self):
+        """Calculate the position of each title"""
+
+        self.title_items = {}
+        for ii in self.sections:
+            self.title_items[ii] = []
+            if self.titles is None:
+                continue
+
+            x_lr = self.x_lr[ii]
+            title_x = [x_lr[0] - self.x_node_width / 2, x_lr[1] + self.x_node_width / 2]
+
+            for lr in self.stage_sides(ii):
+                last_label = list(self.node_sizes[ii + lr])[-1]
+                if self.title_side in ("top", "both"):
+                    if self.title_loc == "outer":
+                        yt = min(self.voffset) + self.y_title_gap + self.y_frame_gap + self.plot_height
+                    elif self.title_loc == "inner":
+                        yt = self.y_title_gap + self.node_pos_top[ii][lr][last_label]
+                    self.title_items[ii].append((title_x[lr], yt, self.titles[ii + lr], "bottom"))
+
+                if self.title_side in ("bottom", "both"):
+                    if self.title_loc == "outer":
+                        yt = min(self.voffset) - self.y_title_gap - self.y_frame_gap
+                    elif self.title_loc == "inner":
+                        yt = self.voffset[ii + lr] - self.y_title_gap
+                    self.title_items[ii].append((title_x[lr], yt, self.titles[ii + lr], "top"))
+
+    ###########################################
+
+    @phase()
+    def calc_colors(self):
+        """Complete the colour dictionary for all labels
+
+        Labels not included in `color_dict` are assigned a colour from `colormap`,
+        for which Matplotlib is imported.
+        """
+
+        self.color_dict = label_colors(self.all_labels, self.colormap, self.color_dict)
+
+    ###########################################
+
+    def label_text(self, label, val=None):
+        """Text of a node label, followed by its value if `label_values` is set"""
+
+        valstr = ""
+        if self.label_values and val is not None:
+            if self.value_fn is None:
+                valstr = self.label_value_sep + format_value(val, self.value_format)
+            else:
+                valstr = self.value_fn(val)
+        return str(self.label_dict.get(label, label)) + valstr
+
+    def value_text(self, val, format_=None):
+        """Text of a flow value label"""
+        return format_value(val, format_ or self.value_format)
+
+    def percent_text(self, val):
+        """Text of a percentage label"""
+        return format_value(val, self.percent_format) + "%"
+
+    ###########################################
+
+    def stage_sides(self, ii):
+        """Sides of flow `ii` whose nodes belong to it: both for the first flow, otherwise the right"""
+        return [0, 1] if ii == 0 else [1]
+
+    ###########################################
+
+    def sort_node_sizes(self, lbl, sorting):
+        """Sorts list of labels and their weights into a dictionary"""
+
+        if sorting == "top":
+            s = 1
+        elif sorting == "bottom":
+            s = -1
+        elif sorting == "center":
+            s = 1
+        else:
+            s = 0
+
+        sort_arr = sorted(
+            lbl.items(),
+            key=lambda item: s * self.sort_dict.get(item[0], item[1]),
+            # sorting = 0,1,-1 affects this
+        )
+
+        sorted_labels = dict(sort_arr)
+
+        if sorting == "center":
+            # this kinda works but i dont think it's a good idea because you lose perception of relative sizes
+            # probably has an off-by-one even/odd error
+            sorted_labels = sorted_labels[1::2] + sorted_labels[-1::-2]
+
+        return sorted_labels
+
+    ###########################################
+
+    def create_curve(self, lpoint, rpoint):
+        """Create array of y values for each strip"""
+
+        num_div = 20
+        num_arr = 50
+
+        # half at left value, half at right, convolve
+
+        ys = np.array(num_arr * [lpoint] + num_arr * [rpoint])
+
+        ys = np.convolve(ys, 1 / num_div * np.ones(num_div), mode="valid")
+        ys = np.convolve(ys, 1 / num_div * np.ones(num_div), mode="valid")
+
+        if self.flow_points is None or self.flow_points >= len(ys):
+            return ys
+        return np.interp(np.linspace(0, len(ys) - 1, self.flow_points), np.arange(len(ys)), ys)
+
+    ###########################################
+
+    def geometry(self):
+        """Return the complete layout as plain Python data
+
+        All positions are in data coordinates, with the y axis pointing up.
+        Only numbers, strings and lists are used so the result can be
+        serialised directly, e.g. to JSON.
+
+        Returns
+        -------
+
+        geometry : dict
+            With keys:
+
+            * `"width"`, `"height"`: total width of the plot, and height of the tallest stage
+            * `"xticks"`: horizontal centre of each stage
+            * `"frame"`: vertical positions `[bottom, top]` of the frame lines
+            * `"nodes"`: list of dicts with keys `stage`, `label`, `x`, `y`, `width`, `height`
+            * `"flows"`: list of dicts with keys `stage` (of the left node), `source`, `target`,
+              `x` (left and right end), `y0` (bottom at left and right), `y1` (top at left and right),
+              `value` (size at left and right)
+            * `"labels"`, `"percents"`, `"values"`, `"titles"`: lists of dicts with keys
+              `x`, `y`, `text` or `value`, and the alignment `ha` or `va`
+        """
+
+        self.layout_all()
+        geom = {
+            "width": float(self.plot_width),
+            "height": float(self.plot_height),
+            "xticks": self.xticks.tolist(),
+            "frame": [float(y) for y in self.y_frame],
+            "nodes": [],
+            "flows": [],
+            "labels": [],
+            "percents": [],
+            "values": [],
+            "titles": [],
+        }
+
+        for ii in range(self.num_flow):
+            for x, dx, y, dy, label in self.node_items[ii]:
+                stage = ii if x < self.x_lr[ii][0] else ii + 1  # nodes on the left end at the flows
+                geom["nodes"].append({"stage": stage, "label": label, "x": x, "y": y, "width": dx, "height": dy})
+            for lbl_l, lbl_r, lbot, rbot, llen, rlen in self.flows[ii]:
+                geom["flows"].append(
+                    {
+                        "stage": ii,
+                        "source": lbl_l,
+                        "target": lbl_r,
+                        "x": list(self.x_lr[ii]),
+                        "y0": [lbot, rbot],
+                        "y1": [lbot + llen, rbot + rlen],
+                        "value": [llen, rlen],
+                    }
+                )
+            for x, y, label, ha, val in self.label_items[ii]:
+                geom["labels"].append({"x": x, "y": y, "text": label, "ha": ha, "value": val})
+            for x, y, val, ha in self.percent_items[ii]:
+                geom["percents"].append({"x": x, "y": y, "value": val, "ha": ha})
+            for x, y, val, ha in self.value_items[ii]:
+                geom["values"].append({"x": x, "y": y, "value": val, "ha": ha})
+            for x, y, title, va in self.title_items[ii]:
+                geom["titles"].append({"x": x, "y": y, "text": title, "va": va})
+
+        return _plain(geom)
+
+
+def _plain(obj):
+    """Convert NumPy scalars in nested lists and dicts to Python numbers"""
+    if isinstance(obj, dict):
+        return {key: _plain(val) for key, val in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(val) for val in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
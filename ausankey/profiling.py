@@ -0,0 +1,284 @@
+"""
+Opt-in instrumentation of the Sankey pipeline.
+
+Pipeline methods are decorated with `phase`, which records their wall time
+in a `SankeyStats` object when one is given as the `stats` option, and
+calls any hooks registered with `add_hook` before and after the phase.
+Without either the decorated methods only cost two checks, and the
+`draw_*` methods are not wrapped at all.
+"""
+
+import contextlib
+import functools
+import logging
+import os
+import threading
+import time
+
+###########################################
+
+logger = logging.getLogger("ausankey")
+
+# registered hooks and the phases they apply to (None for all), as a tuple of pairs
+# that is replaced rather than changed, so that running phases read it without locking
+_HOOKS = ()
+_HOOKS_LOCK = threading.Lock()
+
+
+class SankeyStats:
+    """Timings and artist counts collected while making a Sankey Diagram
+
+    Pass an instance as the `stats` option (or `stats=True` to create one,
+    available afterwards as the `stats` attribute). The same instance
+    can be reused to accumulate over several diagrams.
+
+    Times are wall times in seconds, and include the time of nested phases
+    (e.g. `setup` includes `weight_labels`).
+
+    Attributes
+    ----------
+    times : dict
+        Total time of each phase, by name.
+
+    calls : dict
+        Number of calls of each phase, by name.
+
+    stage_times : dict
+        Time of each per-stage phase (`subplot`, `plot_titles`), by `(name, stage)`.
+
+    draw_times : dict
+        Total time of each `draw_*` method, by name.
+
+    artists : dict
+        Number of Matplotlib artists created by each `draw_*` method, by name.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self.stage_times = {}
+        self.draw_times = {}
+        self.artists = {}
+
+    ###########################################
+
+    def add_time(self, name, seconds, stage=None):
+        """Record one call of a phase"""
+        self.times[name] = self.times.get(name, 0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if stage is not None:
+            key = (name, stage)
+            self.stage_times[key] = self.stage_times.get(key, 0) + seconds
+
+    def add_draw(self, name, seconds, artists):
+        """Record one call of a `draw_*` method"""
+        self.draw_times[name] = self.draw_times.get(name, 0) + seconds
+        self.artists[name] = self.artists.get(name, 0) + artists
+
+    @property
+    def total_artists(self):
+        """Number of artists created by all `draw_*` methods"""
+        return sum(self.artists.values())
+
+    ###########################################
+
+    def as_dict(self):
+        """All statistics as plain data (stage keys are joined as `"name[stage]"`)"""
+        return {
+            "times": dict(self.times),
+            "calls": dict(self.calls),
+            "stage_times": {f"{name}[{stage}]": val for (name, stage), val in self.stage_times.items()},
+            "draw_times": dict(self.draw_times),
+            "artists": dict(self.artists),
+        }
+
+    def summary(self):
+        """Table of the statistics as text"""
+
+        lines = [f"{'phase':<20} {'calls':>6} {'seconds':>9}"]
+        lines += [f"{name:<20} {self.calls[name]:>6} {val:>9.4f}" for name, val in self.times.items()]
+        lines += [f"  {name}[{stage}]".ljust(27) + f" {val:>9.4f}" for (name, stage), val in self.stage_times.items()]
+        lines += [f"{'draw':<20} {'artists':>6} {'seconds':>9}"]
+        lines += [f"{name:<20} {self.artists[name]:>6} {val:>9.4f}" for name, val in self.draw_times.items()]
+        return "\n".join(lines)
+
+    def __repr__(self):
+        total = sum(val for name, val in self.times.items() if name in ("setup", "plot"))
+        return f"<SankeyStats: {total:.3f} s, {self.total_artists} artists>"
+
+
+###########################################
+
+
+def add_hook(hook, phases=None):
+    """Register a function to be called before and after pipeline phases
+
+    Hooks are process-wide: they apply to all diagrams, including those made concurrently
+    in other threads (e.g. by `AsyncRenderer` or `RenderServer`), so tracing or profiling
+    can be switched on without changing the code that makes the diagrams.
+    Use `context["sankey"]` to tell the diagrams apart.
+
+    Parameters
+    ----------
+    hook : function
+        Called as `hook(when, context)`, with `when` either `"before"` or `"after"`.
+        `context` is a dict, the same one for both calls of the same phase, with keys:
+
+        * `phase`: name of the method, e.g. `"setup"`, `"weight_labels"`, `"subplot"`
+        * `sankey`: the `SankeyLayout` or `Sankey` object
+        * `stage`: stage index of `subplot` and `plot_titles`, otherwise `None`
+        * `rows`: number of rows of the data, as read by `setup`
+          (`None` when not known, e.g. before `setup` or for flow matrices)
+        * `labels`: number of labels in each stage (`None` before they are known)
+        * `seconds`: wall time of the phase, only after
+        * `error`: exception raised by the phase, only after (`None` if successful)
+
+        Other keys can be added by the hook, e.g. to keep a tracing span from before to after.
+
+    phases : list of str
+        Names of the phases to call the hook for. Defaults to all phases.
+
+    Returns
+    -------
+
+    hook : function
+        The hook, for convenience as a decorator.
+    """
+
+    global _HOOKS
+    with _HOOKS_LOCK:
+        others = tuple(item for item in _HOOKS if item[0] != hook)
+        _HOOKS = (*others, (hook, None if phases is None else frozenset(phases)))
+    return hook
+
+
+def remove_hook(hook):
+    """Unregister a hook added with `add_hook`"""
+    global _HOOKS
+    with _HOOKS_LOCK:
+        _HOOKS = tuple(item for item in _HOOKS if item[0] != hook)
+
+
+@contextlib.contextmanager
+def hooked(hook, phases=None):
+    """Context manager registering a hook for the duration of a `with` block; see `add_hook`"""
+    add_hook(hook, phases)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+
+
+def count_rows(obj, data=None):
+    """Number of rows of the data being set up, or else of the stage codes read by `setup`
+
+    `None` when unknown, i.e. for paths and flow matrices before `setup`, and in streaming mode.
+    """
+
+    if data is not None:
+        from .layout import is_matrix
+
+        if isinstance(data, (str, os.PathLike)) or (
+            isinstance(data, (list, tuple)) and data and all(is_matrix(item) for item in data)
+        ):
+            return None
+        return len(data)
+    codes = getattr(obj, "node_codes", None)
+    return len(next(iter(codes.values()))) if codes else None
+
+
+def phase_context(obj, name, stage, args):
+    """Context passed to the hooks of a phase"""
+
+    nodes_uniq = getattr(obj, "nodes_uniq", None)
+    return {
+        "phase": name,
+        "sankey": obj,
+        "stage": stage,
+        "rows": count_rows(obj, args[0] if name == "setup" and args else None),
+        "labels": [len(nodes_uniq[ii]) for ii in sorted(nodes_uniq)] if nodes_uniq else None,
+    }
+
+
+###########################################
+
+
+def phase(staged=False):
+    """Decorator recording the time of a pipeline method in `self.stats` and calling the hooks
+
+    Parameters
+    ----------
+    staged : bool
+        Whether the first argument of the method is a stage index,
+        to also record the time per stage.
+    """
+
+    def decorator(method):
+        name = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            stats = self.stats
+            registered = _HOOKS
+            if stats is None and not registered:
+                return method(self, *args, **kwargs)
+
+            stage = args[0] if staged and args else None
+            hooks = [hook for hook, phases in registered if phases is None or name in phases]
+            context = phase_context(self, name, stage, args) if hooks else None
+            for hook in hooks:
+                hook("before", context)
+
+            start = time.perf_counter()
+            error = None
+            try:
+                return method(self, *args, **kwargs)
+            except BaseException as err:
+                error = err
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                if stats is not None:
+                    stats.add_time(name, seconds, stage)
+                    logger.debug("%s%s: %.4f s", name, "" if stage is None else f"[{stage}]", seconds)
+                if hooks:
+                    context.update(seconds=seconds, error=error)
+                    for hook in hooks:
+                        hook("after", context)
+
+        return wrapper
+
+    return decorator
+
+
+def count_artists(result):
+    """Number of artists returned by a `draw_*` method (an artist, a list of them, or None)"""
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
+
+
+def instrument_draw(obj, stats):
+    """Wrap the `draw_*` methods of an instance to count the artists they create
+
+    The wrappers are set as instance attributes, so the class and other
+    instances are unaffected.
+    """
+
+    for name in dir(type(obj)):
+        if not name.startswith("draw_"):
+            continue
+
+        def counting(method, name=name):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result = method(*args, **kwargs)
+                stats.add_draw(name, time.perf_counter() - start, count_artists(result))
+                return result
+
+            return wrapper
+
+        setattr(obj, name, counting(getattr(obj, name)))
@@ -0,0 +1,285 @@
+"""
+Render small raster images of Sankey Diagrams directly with NumPy.
+
+Intended for generating many preview thumbnails quickly: nodes and flows
+are scan-filled into an RGBA array with coverage-based antialiasing,
+skipping Matplotlib entirely. Text is optional and drawn with Pillow.
+"""
+
+import numpy as np
+
+from .layout import SankeyLayout
+
+###########################################
+
+THUMBNAIL_SIZE = (160, 120)  # pixels
+THUMBNAIL_PAD = 0.02
+
+
+def sankey_thumbnail(data, size=THUMBNAIL_SIZE, text=False, background=(1, 1, 1, 1), **kwargs):
+    """Make Sankey Diagram as an RGBA image array
+
+    Parameters
+    ----------
+    data : DataFrame
+        pandas dataframe of labels and weights in alternating columns
+
+    size : (int, int)
+        Width and height of the image in pixels.
+
+    text : bool
+        Whether to draw labels, values, percentages and titles.
+        Requires Pillow.
+
+    background : color
+        Background colour `[r, g, b, a]`; use an alpha of `0` for a transparent image.
+
+    **kwargs : function arguments
+        See the Sankey class for complete list of arguments.
+
+    Returns
+    -------
+
+    image : np.array
+        `(height, width, 4)` array of `uint8` RGBA values.
+    """
+
+    sky = SankeyLayout(**kwargs)
+    sky.setup(data)
+    sky.calc_colors()
+    return layout_thumbnail(sky, size, text=text, background=background)
+
+
+def layout_thumbnail(sky, size=THUMBNAIL_SIZE, text=False, background=(1, 1, 1, 1)):
+    """Render the layout of a Sankey Diagram as an RGBA image array
+
+    Parameters
+    ----------
+    sky : SankeyLayout
+        Layout after `setup()` and `calc_colors()` have been called.
+
+    See `sankey_thumbnail` for the other arguments.
+
+    Returns
+    -------
+
+    image : np.array
+        `(height, width, 4)` array of `uint8` RGBA values.
+    """
+
+    sky.layout_all()
+    return RasterWriter(sky, size, background).write(text=text)
+
+
+def to_rgba(color):
+    """Convert a colour to a tuple of four floats
+
+    Hex strings `"#rrggbb[aa]"` and `[r, g, b(, a)]` lists are converted directly;
+    other colour names are looked up with Matplotlib.
+    """
+
+    if isinstance(color, str):
+        if color.startswith("#") and len(color) in (7, 9):
+            channels = [int(color[i : i + 2], 16) / 255 for i in range(1, len(color), 2)]
+            return (*channels, 1)[:4]
+
+        from matplotlib.colors import to_rgba as mpl_to_rgba
+
+        return mpl_to_rgba(color)
+
+    color = [float(c) for c in color]
+    return (*color, 1)[:4]
+
+
+def coverage(lo, hi, num):
+    """Fraction of each of `num` unit pixels between `lo` and `hi` (broadcasting over columns)"""
+    pixels = np.arange(num)[:, None]
+    return np.clip(np.minimum(hi, pixels + 1) - np.maximum(lo, pixels), 0, 1)
+
+
+###########################################
+
+
+class RasterWriter:
+    """Scan-fills a Sankey Diagram into an RGBA array
+
+    Colours are accumulated with premultiplied alpha in floating point
+    and converted to `uint8` at the end.
+
+    Parameters
+    ----------
+    sky : SankeyLayout
+        Layout after `setup()` and `calc_colors()` have been called.
+
+    size : (int, int)
+        Width and height of the image in pixels.
+
+    background : color
+        Background colour.
+    """
+
+    def __init__(self, sky, size=THUMBNAIL_SIZE, background=(1, 1, 1, 1)):
+        self.sky = sky
+        self.width, self.height = size
+
+        bg = np.array(to_rgba(background))
+        self.canvas = np.empty((self.height, self.width, 4))
+        self.canvas[:] = [*(bg[:3] * bg[3]), bg[3]]
+
+        # fit the frame extents to the image with a small border
+        x_lim = np.array([0, sky.plot_width])
+        y_lim = np.array(sky.y_frame)
+        self.x_scale = (1 - 2 * THUMBNAIL_PAD) * self.width / np.diff(x_lim)[0]
+        self.y_scale = (1 - 2 * THUMBNAIL_PAD) * self.height / np.diff(y_lim)[0]
+        self.x_offset = THUMBNAIL_PAD * self.width - x_lim[0] * self.x_scale
+        self.y_offset = (1 - THUMBNAIL_PAD) * self.height + y_lim[0] * self.y_scale
+
+        self.rgba = {label: np.array(to_rgba(color)) for label, color in sky.color_dict.items()}
+
+    ###########################################
+
+    def x(self, x):
+        """Horizontal position in pixels"""
+        return self.x_offset + np.asarray(x) * self.x_scale
+
+    def y(self, y):
+        """Vertical position in pixels (downwards)"""
+        return self.y_offset - np.asarray(y) * self.y_scale
+
+    ###########################################
+
+    def write(self, text=False):
+        """Fill all nodes and flows, and optionally the text, and return the image"""
+
+        sky = self.sky
+        for ii in range(sky.num_flow):
+            for node in sky.node_items[ii]:
+                self.node(*node)
+            for flow in sky.flows[ii]:
+                self.flow(sky.x_lr[ii], *flow)
+        self.frame()
+
+        image = self.canvas.copy()
+        alpha = image[:, :, 3:]
+        np.divide(image[:, :, :3], alpha, out=image[:, :, :3], where=alpha > 0)
+        image = np.round(255 * np.clip(image, 0, 1)).astype(np.uint8)
+
+        if text:
+            image = self.text(image)
+        return image
+
+    ###########################################
+
+    def blend(self, rows, cols, color, alpha):
+        """Composite colours over a block of the canvas
+
+        Parameters
+        ----------
+        rows, cols : slice
+            Block of the canvas.
+
+        color : np.array
+            RGB colour of each pixel (or column) in the block, broadcastable to `(rows, cols, 3)`.
+
+        alpha : np.array
+            Opacity of each pixel in the block, `(rows, cols)`.
+        """
+
+        block = self.canvas[rows, cols]
+        alpha = alpha[:, :, None]
+        block[:, :, :3] = color * alpha + block[:, :, :3] * (1 - alpha)
+        block[:, :, 3:] = alpha + block[:, :, 3:] * (1 - alpha)
+
+    def span(self, lo, hi, num):
+        """Range of pixels overlapping the interval from `lo` to `hi`, clipped to the image"""
+        return max(int(np.floor(np.min(lo))), 0), min(int(np.ceil(np.max(hi))), num)
+
+    ###########################################
+
+    def node(self, x, dx, y, dy, label):
+        """Fill a single node"""
+
+        x0, x1 = self.x([x, x + dx])
+        y0, y1 = self.y([y + dy, y])
+        c0, c1 = self.span(x0, x1, self.width)
+        r0, r1 = self.span(y0, y1, self.height)
+        if c0 >= c1 or r0 >= r1:
+            return
+
+        cover = coverage(y0 - r0, y1 - r0, r1 - r0) * coverage(x0 - c0, x1 - c0, c1 - c0).T
+        self.blend(slice(r0, r1), slice(c0, c1), self.rgba[label][:3], self.sky.node_alpha * cover)
+
+    ###########################################
+
+    def flow(self, x_lr, lbl_l, lbl_r, lbot, rbot, llen, rlen):
+        """Fill a single flow using the curve profile of `create_curve`"""
+
+        if llen == 0 or rlen == 0:
+            return
+
+        sky = self.sky
+        ys_d = sky.create_curve(lbot, rbot)
+        ys_u = sky.create_curve(lbot + llen, rbot + rlen)
+        xx = np.linspace(x_lr[0], x_lr[1], len(ys_d))
+
+        x0, x1 = self.x(x_lr)
+        c0, c1 = self.span(x0, x1, self.width)
+        if c0 >= c1:
+            return
+
+        # curve evaluated at the centre of each pixel column
+        centres = (np.arange(c0, c1) + 0.5 - self.x_offset) / self.x_scale
+        y_lo = self.y(np.interp(centres, xx, ys_u))
+        y_hi = self.y(np.interp(centres, xx, ys_d))
+        r0, r1 = self.span(y_lo, y_hi, self.height)
+        if r0 >= r1:
+            return
+
+        cover = coverage(y_lo - r0, y_hi - r0, r1 - r0)
+        cover *= np.clip(np.minimum(x1, np.arange(c0, c1) + 1) - np.maximum(x0, np.arange(c0, c1)), 0, 1)
+
+        frac = np.clip((centres - x_lr[0]) / (x_lr[1] - x_lr[0]), 0, 1)[:, None]
+        color = (1 - frac) * self.rgba[lbl_l][:3] + frac * self.rgba[lbl_r][:3]
+        self.blend(slice(r0, r1), slice(c0, c1), color, sky.flow_alpha * cover)
+
+    ###########################################
+
+    def frame(self):
+        """Draw one pixel frame lines on top/bottom edges, where requested"""
+
+        sky = self.sky
+        color = np.array(to_rgba(sky.frame_color))
+        sides = {"top": [1], "bottom": [0], "both": [0, 1]}.get(sky.frame_side, [])
+        c0, c1 = self.span(*self.x([0, sky.plot_width]), self.width)
+        for side in sides:
+            yy = float(self.y(sky.y_frame[side]))
+            r0, r1 = self.span(yy - 0.5, yy + 0.5, self.height)
+            cover = coverage(yy - 0.5 - r0, yy + 0.5 - r0, r1 - r0) * np.ones(c1 - c0)
+            self.blend(slice(r0, r1), slice(c0, c1), color[:3], color[3] * cover)
+
+    ###########################################
+
+    def text(self, image):
+        """Draw labels, values, percentages and titles with Pillow's default font"""
+
+        from PIL import Image, ImageDraw, ImageFont
+
+        sky = self.sky
+        font = ImageFont.load_default()
+        fill = tuple(round(255 * c) for c in to_rgba(sky.fontcolor))
+        anchors = {"left": "l", "center": "m", "right": "r", "bottom": "d", "top": "a"}
+
+        items = []
+        for ii in range(sky.num_flow):
+            items += [(x, y, sky.label_text(label, val), ha, "center") for x, y, label, ha, val in sky.label_items[ii]]
+            items += [(x, y, sky.percent_text(val), ha, "center") for x, y, val, ha in sky.percent_items[ii]]
+            items += [(x, y, sky.value_text(val), ha, "center") for x, y, val, ha in sky.value_items[ii]]
+            items += [(x, y, title, "center", va) for x, y, title, va in sky.title_items[ii]]
+
+        img = Image.fromarray(image, "RGBA")
+        draw = ImageDraw.Draw(img)
+        for x, y, txt, ha, va in items:
+            xy = (float(self.x(x)), float(self.y(y)))
+            anchor = anchors[ha] + anchors.get(va, "m")
+            draw.multiline_text(xy, str(txt), fill=fill, font=font, anchor=anchor, align=ha)
+        return np.asarray(img)
@@ -0,0 +1,402 @@
+"""
+Long-lived local render service for Sankey Diagrams.
+
+Starting Python and importing Matplotlib and pandas takes far longer than
+rendering a typical diagram. `RenderServer` keeps them imported in one
+process and renders data posted over HTTP to image bytes, caching the layouts
+so that the same data with the same options is only set up once (e.g. when
+rendered in several formats or sizes). `render_remote` is the matching client.
+
+Start the server from the command line with
+
+    python -m ausankey.server --port 8765
+
+The server listens on the local host only by default and has no authentication.
+
+Requests are `POST /render` with either a JSON body
+
+    {"data": ..., "options": {...}, "format": "png"}
+
+where `data` is a list of rows or a dict of columns, or an Arrow IPC stream
+(content type `application/vnd.apache.arrow.stream`) with the options and
+format in the query string, e.g. `/render?format=svg&options={"sort":"top"}`.
+Options are `Sankey` arguments plus `dpi` and `figsize`, as for `render`.
+`GET /health` returns the cache statistics.
+"""
+
+import argparse
+import collections
+import hashlib
+import http.server
+import io
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from .cli import parse_options
+
+###########################################
+
+logger = logging.getLogger("ausankey")
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+}
+
+###########################################
+
+
+class LayoutCache:
+    """Least recently used cache of diagrams after `setup`
+
+    Diagrams are stored by a key of the data and options, and drawn with
+    `Sankey.copy`, so a cached layout can be drawn concurrently into any figure.
+    Safe to use from several threads; a layout missing from the cache may be
+    set up more than once if requested concurrently.
+
+    Parameters
+    ----------
+    maxsize : int
+        Number of layouts to keep.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, make):
+        """Cached diagram of a key, calling `make()` to set it up if missing
+
+        Returns
+        -------
+
+        sky, hit : Sankey, bool
+            The diagram, and whether it was in the cache.
+        """
+
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key], True
+
+        sky = make()
+        with self.lock:
+            self.misses += 1
+            self.items[key] = sky
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+        return sky, False
+
+    def clear(self):
+        """Remove all layouts"""
+        with self.lock:
+            self.items.clear()
+
+    def as_dict(self):
+        """Size and hit counts as plain data"""
+        return {"size": len(self.items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+def render_cached(cache, data_key, load_data, options, fmt="png"):
+    """Render Sankey Diagram to image bytes, reusing a cached layout
+
+    Parameters
+    ----------
+    cache : LayoutCache
+        Cache of layouts, or `None` to always set up the diagram.
+
+    data_key : str
+        Digest identifying the data.
+
+    load_data : function
+        Called without arguments to get the data when it is not cached.
+
+    options : dict
+        Arguments of `render`.
+
+    fmt : str
+        Image format.
+
+    Returns
+    -------
+
+    image, hit : bytes, bool
+        The encoded image, and whether the layout was cached.
+    """
+
+    from matplotlib.figure import Figure
+
+    from .ausankey import Sankey
+
+    options = dict(options)
+    dpi = options.pop("dpi", None)
+    figsize = options.pop("figsize", None)
+    fig = Figure(figsize=figsize, dpi=dpi)
+    ax = fig.add_subplot()
+
+    if cache is None or options.get("streaming"):
+        sky = Sankey(ax=ax, **options)
+        sky.setup(load_data())
+        hit = False
+    else:
+
+        def make():
+            layout = Sankey(**options)
+            layout.setup(load_data())
+            return layout
+
+        key = (data_key, json.dumps(options, sort_keys=True, default=repr))
+        layout, hit = cache.get(key, make)
+        sky = layout.copy(ax)
+
+    sky.plot()
+    buf = io.BytesIO()
+    sky.savefig(buf, format=fmt, dpi=dpi or "figure")
+    return buf.getvalue(), hit
+
+
+###########################################
+
+
+class RenderHandler(http.server.BaseHTTPRequestHandler):
+    """Handler of the requests to a `RenderServer`"""
+
+    server_version = "ausankey"
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path != "/health":
+            self.send_text(404, "Not found")
+            return
+        cache = self.server.cache
+        self.send_body(200, "application/json", json.dumps({"status": "ok", "cache": cache and cache.as_dict()}))
+
+    def do_POST(self):
+        from .ausankey import SankeyError
+
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/render":
+            self.send_text(404, "Not found")
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        start = time.perf_counter()
+        try:
+            data_key, load_data, options, fmt = self.read_request(body, urllib.parse.parse_qs(url.query))
+            image, hit = render_cached(self.server.cache, data_key, load_data, options, fmt)
+        except (SankeyError, ValueError, KeyError, TypeError) as err:
+            self.send_text(400, f"{type(err).__name__}: {err}")
+            return
+        except Exception as err:
+            logger.exception("Render failed")
+            self.send_text(500, f"{type(err).__name__}: {err}")
+            return
+
+        headers = {
+            "X-Ausankey-Cache": "hit" if hit else "miss",
+            "X-Ausankey-Seconds": f"{time.perf_counter() - start:.4f}",
+        }
+        self.send_body(200, CONTENT_TYPES[fmt], image, headers)
+
+    def read_request(self, body, query):
+        """Digest of the data, function loading it, options and format of a render request"""
+
+        if self.headers.get("Content-Type", "").split(";")[0] == ARROW_TYPE:
+            options = json.loads(query.get("options", ["{}"])[0])
+            fmt = query.get("format", ["png"])[0]
+            data_key = hashlib.sha256(body).hexdigest()
+
+            def load_data():
+                import pyarrow as pa
+
+                return pa.ipc.open_stream(body).read_all()
+
+        else:
+            payload = json.loads(body)
+            data = payload["data"]
+            options = payload.get("options", {})
+            fmt = payload.get("format", "png")
+            data_key = hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+            def load_data():
+                import pandas as pd
+
+                return pd.DataFrame(data)
+
+        if fmt not in CONTENT_TYPES:
+            msg = f"Unknown format: {fmt!r}"
+            raise ValueError(msg)
+        return data_key, load_data, parse_options(options, "Render options"), fmt
+
+    def send_body(self, status, content_type, body, headers=None):
+        body = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, status, text):
+        self.send_body(status, "text/plain; charset=utf-8", text)
+
+    def log_message(self, format, *args):
+        logger.info("%s - " + format, self.address_string(), *args)
+
+
+class RenderServer(http.server.ThreadingHTTPServer):
+    """HTTP server rendering Sankey Diagrams, see the module description for the requests
+
+    Can be used as a context manager, which starts the server in a background
+    thread on entry and stops it on exit.
+
+    Parameters
+    ----------
+    host : str
+        Address to listen on, by default the local host only.
+
+    port : int
+        Port to listen on; `0` picks a free port (see `url`).
+
+    cache_size : int
+        Number of layouts to keep in the `LayoutCache`, `0` to disable caching.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=8765, cache_size=32):
+        super().__init__((host, port), RenderHandler)
+        self.cache = LayoutCache(cache_size) if cache_size else None
+        self.thread = None
+
+    @property
+    def url(self):
+        """Base URL of the server, to pass to `render_remote`"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm(self):
+        """Import Matplotlib and pandas and render a small diagram, so that the first request is fast"""
+
+        from .ausankey import render
+
+        render([["a", 1, "a", 1], ["b", 2, "a", 2]], fmt="png")
+
+    def start(self):
+        """Serve requests in a background thread"""
+        self.thread = threading.Thread(target=self.serve_forever, name="ausankey-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+###########################################
+
+
+def render_remote(data, fmt="png", url=DEFAULT_URL, timeout=60, **kwargs):
+    """Render Sankey Diagram to image bytes with a `RenderServer`
+
+    Parameters
+    ----------
+    data : DataFrame, list or pyarrow.Table
+        Labels and weights in alternating columns; DataFrames and lists of rows are sent as JSON,
+        Arrow tables as an Arrow IPC stream.
+
+    fmt : str
+        Image format, `"png"`, `"svg"` or `"pdf"`.
+
+    url : str
+        Base URL of the server.
+
+    timeout : float
+        Seconds to wait for the server.
+
+    **kwargs : function arguments
+        Passed through to `render`, see the Sankey class for complete list of arguments.
+        Must be representable in JSON, with `stages` as a list `[start, stop]` rather than a slice.
+
+    Returns
+    -------
+
+    bytes
+        The encoded image.
+    """
+
+    from .ausankey import SankeyError
+
+    if type(data).__module__.startswith("pyarrow"):
+        import pyarrow as pa
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, data.schema) as writer:
+            writer.write_table(data)
+        query = urllib.parse.urlencode({"format": fmt, "options": json.dumps(kwargs)})
+        request = urllib.request.Request(
+            f"{url}/render?{query}", data=sink.getvalue().to_pybytes(), headers={"Content-Type": ARROW_TYPE}
+        )
+    else:
+        if hasattr(data, "to_dict"):
+            data = {str(name): column.tolist() for name, column in data.items()}
+        body = json.dumps({"data": data, "options": kwargs, "format": fmt}).encode()
+        request = urllib.request.Request(f"{url}/render", data=body, headers={"Content-Type": "application/json"})
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read()
+    except urllib.error.HTTPError as err:
+        if err.code != 400:
+            raise
+        raise SankeyError(err.read().decode()) from None
+
+
+###########################################
+
+
+def main(argv=None):
+    """Entry point of `python -m ausankey.server`"""
+
+    parser = argparse.ArgumentParser(prog="python -m ausankey.server", description="Serve Sankey Diagram renders.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--cache-size", type=int, default=32, help="number of layouts to cache (default: 32)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    with RenderServer(args.host, args.port, args.cache_size) as server:
+        server.warm()
+        logger.info("Serving Sankey renders at %s", server.url)
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
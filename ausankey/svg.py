@@ -0,0 +1,354 @@
+"""
+Write Sankey Diagrams directly as SVG text, without Matplotlib.
+
+The computed layout is emitted as one element per node, flow and label.
+Each flow is a single path filled with a `<linearGradient>` rather than
+the many strips drawn by `Sankey.draw_flow`.
+"""
+
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from .layout import SankeyLayout
+
+###########################################
+
+# Matplotlib defaults reproduced so the output matches `sankey()`
+FIGSIZE = (6.4, 4.8)  # inches
+AXES_POSITION = (0.125, 0.11, 0.775, 0.77)  # left, bottom, width, height
+AXES_MARGIN = 0.05
+POINTS_PER_INCH = 72
+LINE_SPACING = 1.2
+FONT_SIZE_BASE = 10
+FONT_SIZE_NAMES = {
+    "xx-small": 0.579,
+    "x-small": 0.694,
+    "small": 0.833,
+    "medium": 1.0,
+    "large": 1.2,
+    "x-large": 1.44,
+    "xx-large": 1.728,
+}
+
+FONT_ATTRS = {
+    "fontsize": "font-size",
+    "size": "font-size",
+    "fontfamily": "font-family",
+    "family": "font-family",
+    "fontweight": "font-weight",
+    "weight": "font-weight",
+    "fontstyle": "font-style",
+    "style": "font-style",
+    "color": "fill",
+    "c": "fill",
+    "alpha": "fill-opacity",
+}
+
+TEXT_ANCHOR = {"left": "start", "center": "middle", "right": "end"}
+TEXT_BASELINE = {"center": "central", "bottom": "text-after-edge", "top": "text-before-edge"}
+
+
+def sankey_svg(data, figsize=None, **kwargs):
+    """Make Sankey Diagram as SVG text
+
+    Parameters
+    ----------
+    data : DataFrame
+        pandas dataframe of labels and weights in alternating columns
+
+    figsize : (float, float)
+        Width and height of the image in inches. Defaults to Matplotlib's default `(6.4, 4.8)`.
+
+    **kwargs : function arguments
+        See the Sankey class for complete list of arguments.
+
+    Returns
+    -------
+
+    str
+        The SVG document.
+    """
+
+    sky = SankeyLayout(**kwargs)
+    sky.setup(data)
+    sky.calc_colors()
+    return layout_svg(sky, figsize)
+
+
+def layout_svg(sky, figsize=None):
+    """Write the layout of a Sankey Diagram as SVG text
+
+    Parameters
+    ----------
+    sky : SankeyLayout
+        Layout after `setup()` and `calc_colors()` have been called.
+
+    figsize : (float, float)
+        Width and height of the image in inches. Defaults to Matplotlib's default `(6.4, 4.8)`.
+
+    Returns
+    -------
+
+    str
+        The SVG document.
+    """
+
+    sky.layout_all()
+    return SvgWriter(sky, figsize).write()
+
+
+def svg_num(val):
+    """Format a coordinate compactly"""
+    return f"{val:.2f}".rstrip("0").rstrip(".")
+
+
+def svg_color(color):
+    """Split a colour into an SVG paint string and an opacity
+
+    Hex strings `"#rrggbb"` are passed through; other colours (names such as `"C0"`
+    or `"tab:blue"`, `"#rrggbbaa"` strings and `[r, g, b(, a)]` lists) are converted with Matplotlib.
+    """
+    if isinstance(color, str) and color.startswith("#") and len(color) == 7:
+        return color, 1
+
+    from matplotlib.colors import to_hex, to_rgba
+
+    rgba = to_rgba(color)
+    return to_hex(rgba), rgba[3]
+
+
+###########################################
+
+
+class SvgWriter:
+    """Emits the SVG elements of a Sankey Diagram
+
+    Parameters
+    ----------
+    sky : SankeyLayout
+        Layout after `setup()` and `calc_colors()` have been called.
+
+    figsize : (float, float)
+        Width and height of the image in inches.
+    """
+
+    def __init__(self, sky, figsize=None):
+        self.sky = sky
+        figsize = figsize or FIGSIZE
+        self.width = figsize[0] * POINTS_PER_INCH
+        self.height = figsize[1] * POINTS_PER_INCH
+
+        # data limits as autoscaled by Matplotlib: frame extents plus margins
+        x_lim = np.array([0, sky.plot_width])
+        y_lim = np.array(sky.y_frame)
+        x_lim = x_lim + AXES_MARGIN * np.diff(x_lim) * [-1, 1]
+        y_lim = y_lim + AXES_MARGIN * np.diff(y_lim) * [-1, 1]
+
+        left, bottom, width, height = AXES_POSITION
+        self.x_scale = width * self.width / np.diff(x_lim)[0]
+        self.y_scale = height * self.height / np.diff(y_lim)[0]
+        self.x_offset = left * self.width - x_lim[0] * self.x_scale
+        self.y_offset = (1 - bottom) * self.height + y_lim[0] * self.y_scale
+
+        self.gradients = {}
+        self.defs = []
+
+    ###########################################
+
+    def x(self, x):
+        """Horizontal position in SVG units"""
+        return svg_num(self.x_offset + x * self.x_scale)
+
+    def y(self, y):
+        """Vertical position in SVG units (downwards)"""
+        return svg_num(self.y_offset - y * self.y_scale)
+
+    ###########################################
+
+    def write(self):
+        """Assemble the complete SVG document"""
+
+        sky = self.sky
+        patches = []
+        lines = []
+        texts = []
+
+        for ii in range(sky.num_flow):
+            for node in sky.node_items[ii]:
+                patches.append(self.node(*node))
+            x_lr = sky.x_lr[ii]
+            for lbl_l, lbl_r, lbot, rbot, llen, rlen in sky.flows[ii]:
+                if llen == 0 or rlen == 0:
+                    continue
+                patches.append(self.flow(x_lr, lbl_l, lbl_r, lbot, rbot, llen, rlen))
+                if sky.flow_edge:
+                    lines.append(self.flow(x_lr, lbl_l, lbl_r, lbot, rbot, llen, rlen, edge=True))
+
+        lines += self.frame()
+
+        for ii in range(sky.num_flow):
+            for x, y, label, ha, val in sky.label_items[ii]:
+                texts.append(self.text(x, y, sky.label_text(label, val), ha, "center", "l"))
+            for x, y, val, ha in sky.percent_items[ii]:
+                texts.append(self.text(x, y, sky.percent_text(val), ha, "center", "p"))
+            for x, y, val, ha in sky.value_items[ii]:
+                texts.append(self.text(x, y, sky.value_text(val), ha, "center", "v"))
+        for ii in range(sky.num_flow):
+            for x, y, title, va in sky.title_items[ii]:
+                texts.append(self.text(x, y, title, "center", va, "t"))
+
+        width = svg_num(self.width)
+        height = svg_num(self.height)
+        return "\n".join(
+            [
+                (
+                    f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}pt" height="{height}pt" '
+                    f'viewBox="0 0 {width} {height}">'
+                ),
+                "<style>",
+                self.text_style("l", sky.label_font, sky.label_path_effects),
+                self.text_style("p", sky.percent_font or sky.label_font),
+                self.text_style("v", sky.value_font),
+                self.text_style("t", sky.title_font),
+                "</style>",
+                "<defs>",
+                *self.defs,
+                "</defs>",
+                *patches,
+                *lines,
+                *texts,
+                "</svg>",
+                "",
+            ]
+        )
+
+    ###########################################
+
+    def node(self, x, dx, y, dy, label):
+        """Rectangle of a single node"""
+
+        sky = self.sky
+        fill, _ = svg_color(sky.color_dict[label])
+        attrs = f'fill="{fill}"'
+        if sky.node_alpha != 1:
+            attrs += f' fill-opacity="{sky.node_alpha}"'
+        if sky.node_edge:
+            attrs += f' stroke="{fill}" stroke-width="{sky.node_lw}"'
+        return (
+            f'<rect x="{self.x(x)}" y="{self.y(y + dy)}" '
+            f'width="{svg_num(dx * self.x_scale)}" height="{svg_num(dy * self.y_scale)}" {attrs}/>'
+        )
+
+    ###########################################
+
+    def flow(self, x_lr, lbl_l, lbl_r, lbot, rbot, llen, rlen, edge=False):
+        """Path of a single flow, or of its top and bottom edges"""
+
+        sky = self.sky
+        ys_d = sky.create_curve(lbot, rbot)
+        ys_u = sky.create_curve(lbot + llen, rbot + rlen)
+        xx = np.linspace(x_lr[0], x_lr[1], len(ys_d))
+
+        upper = self.polyline(xx, ys_u)
+        lower = self.polyline(xx, ys_d)
+        paint = self.gradient(x_lr, sky.color_dict[lbl_l], sky.color_dict[lbl_r])
+
+        if edge:
+            return f'<path d="M{upper}M{lower}" fill="none" stroke="{paint}" stroke-width="{sky.flow_lw}"/>'
+        lower = self.polyline(xx[::-1], ys_d[::-1])
+        return f'<path d="M{upper} {lower}Z" fill="{paint}" fill-opacity="{sky.flow_alpha}"/>'
+
+    def polyline(self, xx, yy):
+        """Points of a curve, dropping those in the middle of straight horizontal sections"""
+
+        flat = np.r_[False, (np.diff(yy[:-1]) == 0) & (np.diff(yy[1:]) == 0), False]
+        return " ".join(f"{self.x(x)},{self.y(y)}" for x, y in zip(xx[~flat], yy[~flat]))
+
+    def gradient(self, x_lr, c1, c2):
+        """Paint for a flow between two colours, defining a gradient when needed"""
+
+        c1, a1 = svg_color(c1)
+        c2, a2 = svg_color(c2)
+        if (c1, a1) == (c2, a2):
+            return c1
+
+        x1 = self.x(x_lr[0])
+        x2 = self.x(x_lr[1])
+        key = (x1, x2, c1, a1, c2, a2)
+        if key not in self.gradients:
+            self.gradients[key] = f"g{len(self.gradients)}"
+            self.defs.append(
+                f'<linearGradient id="{self.gradients[key]}" gradientUnits="userSpaceOnUse" '
+                f'x1="{x1}" y1="0" x2="{x2}" y2="0">'
+                f'<stop offset="0" stop-color="{c1}" stop-opacity="{a1}"/>'
+                f'<stop offset="1" stop-color="{c2}" stop-opacity="{a2}"/>'
+                "</linearGradient>"
+            )
+        return f"url(#{self.gradients[key]})"
+
+    ###########################################
+
+    def frame(self):
+        """Frame lines on top/bottom edges, where requested"""
+
+        sky = self.sky
+        color, alpha = svg_color(sky.frame_color)
+        sides = {"top": [1], "bottom": [0], "both": [0, 1]}.get(sky.frame_side, [])
+        return [
+            f'<path d="M{self.x(0)},{self.y(sky.y_frame[side])}H{self.x(sky.plot_width)}" '
+            f'stroke="{color}" stroke-opacity="{alpha}" stroke-width="{sky.frame_lw}"/>'
+            for side in sides
+        ]
+
+    ###########################################
+
+    def text_style(self, name, font, path_effects=None):
+        """CSS rule for one class of text"""
+
+        sky = self.sky
+        attrs = {}
+        font = {"fontfamily": sky.fontfamily, "fontsize": sky.fontsize, "color": sky.fontcolor, **font}
+        for key, val in font.items():
+            if key not in FONT_ATTRS:
+                continue
+            if FONT_ATTRS[key] == "font-size":
+                if isinstance(val, str):
+                    val = FONT_SIZE_BASE * FONT_SIZE_NAMES.get(val, 1)
+                val = f"{svg_num(val)}px"  # user units, which are points here
+            if FONT_ATTRS[key] == "fill":
+                val, alpha = svg_color(val)
+                if alpha != 1:
+                    attrs["fill-opacity"] = alpha
+            attrs[FONT_ATTRS[key]] = val
+
+        if path_effects is not None:
+            stroke, alpha = svg_color(path_effects.get("foreground", "black"))
+            attrs["stroke"] = stroke
+            attrs["stroke-opacity"] = alpha
+            attrs["stroke-width"] = path_effects.get("linewidth", 2)
+            attrs["stroke-linejoin"] = "round"
+            attrs["paint-order"] = "stroke"
+
+        rules = ";".join(f"{key}:{val}" for key, val in attrs.items())
+        return f".{name}{{{rules}}}"
+
+    def text(self, x, y, text, ha, va, cls):
+        """A single text element, split into lines if needed"""
+
+        lines = str(text).split("\n")
+        attrs = (
+            f'x="{self.x(x)}" y="{self.y(y)}" class="{cls}" '
+            f'text-anchor="{TEXT_ANCHOR[ha]}" dominant-baseline="{TEXT_BASELINE[va]}"'
+        )
+        if len(lines) == 1:
+            return f"<text {attrs}>{escape(lines[0])}</text>"
+
+        # shift the first line so the block is aligned as a whole
+        shift = {"center": (len(lines) - 1) / 2, "bottom": len(lines) - 1, "top": 0}[va]
+        tspans = "".join(
+            f'<tspan x="{self.x(x)}" dy="{svg_num(-shift * LINE_SPACING if nn == 0 else LINE_SPACING)}em">'
+            f"{escape(line)}</tspan>"
+            for nn, line in enumerate(lines)
+        )
+        return f"<text {attrs}>{tspans}</text>"
@@ -0,0 +1,158 @@
+"""
+Benchmarks of the layout calculations, without any drawing.
+"""
+
+import tracemalloc
+
+import numpy as np
+
+import ausankey as sky
+from ausankey.generate import generate_data
+from ausankey.hittest import HitIndex
+from ausankey.layout import SankeyLayout
+
+
+class Layout:
+    """Time and memory of `Sankey.setup` and its weighting step"""
+
+    params = (
+        [1_000, 100_000, 1_000_000],  # rows
+        [2, 5],  # stages
+        [5, 50],  # labels per stage
+        [0.0, 0.2],  # probability of starting or stopping mid-diagram
+        [0, 0.05],  # other_thresh_ofsum
+    )
+    param_names = ("rows", "stages", "labels", "gaps", "other")
+    timeout = 300
+
+    def setup(self, rows, stages, labels, gaps, other):
+        self.data = generate_data(rows, stages, labels, gaps=gaps, seed=0)
+        self.kwargs = {"other_thresh_ofsum": other}
+        self.sky = sky.Sankey(**self.kwargs)
+        self.sky.setup(self.data)
+
+    def time_setup(self, rows, stages, labels, gaps, other):
+        sky.Sankey(**self.kwargs).setup(self.data)
+
+    def time_weight_labels(self, rows, stages, labels, gaps, other):
+        self.sky.weight_labels()
+
+    def peakmem_setup(self, rows, stages, labels, gaps, other):
+        sky.Sankey(**self.kwargs).setup(self.data)
+
+
+class Memory:
+    """Peak memory allocated by `SankeyLayout.setup` relative to the size of the input"""
+
+    params = (
+        [100_000, 1_000_000],  # rows
+        [True, False],  # categorical labels
+        [0, 0.05],  # other_thresh_ofsum
+    )
+    param_names = ("rows", "categorical", "other")
+    timeout = 300
+
+    def setup(self, rows, categorical, other):
+        self.data = generate_data(rows, stages=4, labels=50, gaps=0.2, seed=0, categorical=categorical)
+
+    def track_peak_ratio(self, rows, categorical, other):
+        tracemalloc.start()
+        try:
+            SankeyLayout(other_thresh_ofsum=other).setup(self.data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak / self.data.memory_usage(deep=True).sum()
+
+    track_peak_ratio.unit = "ratio"
+
+
+class Streaming:
+    """Memory of laying out diagrams with many stages, all at once or one section at a time
+
+    When streaming, the peak should stay close to the items retained, as the data of only a few stages is held.
+    """
+
+    params = (
+        [100, 500],  # stages
+        [False, True],  # streaming
+    )
+    param_names = ("stages", "streaming")
+    timeout = 300
+
+    def setup(self, stages, streaming):
+        self.data = generate_data(20_000, stages=stages, labels=8, gaps=0.05, seed=0)
+
+    def track_peak_bytes(self, stages, streaming):
+        tracemalloc.start()
+        try:
+            layout = SankeyLayout(streaming=streaming)
+            layout.setup(self.data)
+            for _ in layout.layout_sections():
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    track_peak_bytes.unit = "bytes"
+
+    def track_retained_bytes(self, stages, streaming):
+        # the laid-out items kept after the pass, which grow with the stages when streaming
+        tracemalloc.start()
+        try:
+            layout = SankeyLayout(streaming=streaming)
+            layout.setup(self.data)
+            for _ in layout.layout_sections():
+                pass
+            retained, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return retained
+
+    track_retained_bytes.unit = "bytes"
+
+
+class HitTest:
+    """Time of building a hit-testing index and of querying it at random positions"""
+
+    params = (
+        [5, 50],  # labels per stage
+        [2, 5],  # stages
+    )
+    param_names = ("labels", "stages")
+
+    def setup(self, labels, stages):
+        self.layout = SankeyLayout(flow_batch=True)
+        self.layout.setup(generate_data(100_000, stages, labels, gaps=0.2, seed=0))
+        rng = np.random.default_rng(0)
+        self.points = np.column_stack(
+            [rng.uniform(0, self.layout.plot_width, 1000), rng.uniform(*self.layout.y_frame, 1000)]
+        ).tolist()
+        self.index = HitIndex(self.layout)
+        for x, y in self.points:
+            self.index.query(x, y)  # build the trees of all strips queried
+
+    def time_build(self, labels, stages):
+        HitIndex(self.layout)
+
+    def time_query(self, labels, stages):
+        for x, y in self.points:
+            self.index.query(x, y)
+
+
+class Generate:
+    """Time and memory of creating synthetic datasets"""
+
+    params = (
+        [1_000_000, 10_000_000],  # rows
+        [True, False],  # categorical labels
+    )
+    param_names = ("rows", "categorical")
+    timeout = 300
+
+    def time_generate(self, rows, categorical):
+        generate_data(rows, stages=4, labels=20, gaps=0.1, seed=0, categorical=categorical)
+
+    def peakmem_generate(self, rows, categorical):
+        generate_data(rows, stages=4, labels=20, gaps=0.1, seed=0, categorical=categorical)
@@ -0,0 +1,79 @@
+"""
+Benchmarks of drawing with Matplotlib and saving the figure.
+
+Each flow is drawn as many strips, so the number of labels is kept small.
+"""
+
+import io
+
+from matplotlib.figure import Figure
+
+import ausankey as sky
+from ausankey.generate import generate_data
+
+
+class Plot:
+    """Time, memory and artist count of drawing and saving"""
+
+    params = (
+        [1_000, 100_000],  # rows
+        [2, 4],  # stages
+        [3, 6],  # labels per stage
+        [0.0, 0.2],  # probability of starting or stopping mid-diagram
+        [False, True],  # flow_batch
+    )
+    param_names = ("rows", "stages", "labels", "gaps", "batch")
+    number = 1  # a fresh axis for each sample
+    timeout = 600
+
+    def setup(self, rows, stages, labels, gaps, batch):
+        self.data = generate_data(rows, stages, labels, gaps=gaps, seed=0)
+        self.fig = Figure()
+        self.sky = sky.Sankey(ax=self.fig.add_subplot(), flow_batch=batch)
+        self.sky.setup(self.data)
+        self.sky.plot_init()
+        self.sky.plot_frame()
+
+    def time_subplot(self, rows, stages, labels, gaps, batch):
+        for ii in range(self.sky.num_flow):
+            self.sky.subplot(ii)
+
+    def peakmem_plot(self, rows, stages, labels, gaps, batch):
+        self.sky.plot()
+
+    def track_artists(self, rows, stages, labels, gaps, batch):
+        self.sky.plot()
+        return len(self.sky.ax.get_children())
+
+    track_artists.unit = "artists"
+
+
+class Savefig:
+    """Time and memory of saving a drawn figure"""
+
+    params = (
+        [2, 4],  # stages
+        [3, 6],  # labels per stage
+        ["png", "svg", "pdf"],  # format
+    )
+    param_names = ("stages", "labels", "fmt")
+    timeout = 600
+
+    def setup(self, stages, labels, fmt):
+        self.fig = Figure()
+        self.sky = sky.Sankey(ax=self.fig.add_subplot())
+        self.sky.setup(generate_data(1_000, stages, labels, seed=0))
+        self.sky.plot()
+
+    def time_savefig(self, stages, labels, fmt):
+        self.fig.savefig(io.BytesIO(), format=fmt)
+
+    def peakmem_savefig(self, stages, labels, fmt):
+        self.fig.savefig(io.BytesIO(), format=fmt)
+
+    def track_bytes(self, stages, labels, fmt):
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format=fmt)
+        return buf.tell()
+
+    track_bytes.unit = "bytes"
@@ -0,0 +1,76 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from ausankey import SankeyError
+from ausankey.animate import SankeyAnimation
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitAnimate(TestFruit):
+    def test_animation_frames(self):
+        frames = [
+            self.data,
+            self.data[self.data["Label1"] != "lime"],
+            self.data.assign(Weight2=self.data["Weight2"] / 2),
+        ]
+        fig, ax = plt.subplots()
+        anim = SankeyAnimation(frames, ax=ax, steps=4, titles=["Summer", "Winter"], flow_batch=True)
+        assert anim.num_frames == 9
+        assert len({sky.plot_height_nom for sky in anim.layouts}) == 1
+
+        artists = anim.init()
+        assert anim.flow_collection in artists
+        assert anim.node_collection in artists
+        for step in range(anim.num_frames):
+            assert anim.update(step) is artists  # updated in place
+
+        # nodes at each dataset match its layout, with missing ones collapsed and transparent
+        for nn, sky in enumerate(anim.layouts):
+            anim.update(nn * anim.steps)
+            paths = anim.node_collection.get_paths()
+            alpha = anim.node_collection.get_facecolor()[:, 3]
+            nodes = {(nd["stage"], nd["label"]): nd for nd in sky.geometry()["nodes"]}
+            for key, path, aa in zip(anim.node_keys, paths, alpha):
+                if key in nodes:
+                    node = nodes[key]
+                    assert path.vertices[0] == pytest.approx([node["x"], node["y"]])
+                    assert path.vertices[2] == pytest.approx([node["x"] + node["width"], node["y"] + node["height"]])
+                    assert aa > 0
+                else:
+                    assert np.ptp(path.vertices[:, 1]) == 0
+                    assert aa == 0
+
+        # halfway between datasets
+        anim.update(2)
+        lime = anim.node_keys.index((0, "lime"))
+        assert anim.node_collection.get_facecolor()[lime, 3] == pytest.approx(0.5)
+        plt.close(fig)
+
+    def test_animation_edges_titles(self):
+        frames = [self.data, self.data[self.data["Label2"] != "apple"]]
+        fig, ax = plt.subplots()
+        anim = SankeyAnimation(frames, ax=ax, titles=["Fruit", "Fruit"], flow_edge=True, node_edge=True)
+        artists = anim.init()
+        assert anim.edge_collection in artists
+        assert len(anim.edge_collection.get_segments()) == 2 * len(anim.flow_collection.get_paths())
+        assert (anim.node_collection.get_linewidth() > 0).all()
+
+        # the same title over each stage is one artist per stage
+        assert sorted(key[0] for key in anim.title_keys) == [0, 1]
+        assert len(anim.title_artists) == 2
+
+        anim.update(1)
+        gone = [nn for nn, (_, _, target) in enumerate(anim.flow_keys) if target == "apple"]
+        strips = len(anim.curve) - 1
+        edge_alpha = anim.edge_collection.get_edgecolor()[:, 3].reshape(2, -1, strips)
+        assert (edge_alpha[:, gone] == 0).all()
+        assert (np.delete(edge_alpha, gone, axis=1) > 0).all()
+        plt.close(fig)
+
+    def test_animation_errors(self):
+        with self.assertRaises(SankeyError):
+            SankeyAnimation([])
+        with self.assertRaises(SankeyError):
+            SankeyAnimation([self.data], streaming=True)
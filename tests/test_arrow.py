@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+from ausankey.generate import generate_data
+from ausankey.layout import SankeyLayout
+
+from .test_fruit_setup import TestFruit
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+class TestFruitArrow(TestFruit):
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def write_parquet(self, data, **kwargs):
+        path = os.path.join(self.tmp_dir, "flows.parquet")
+        pq.write_table(pa.Table.from_pandas(data.rename(columns=str), preserve_index=False), path, **kwargs)
+        return path
+
+    def test_fruits_arrow(self):
+        sky_df = SankeyLayout()
+        sky_df.setup(self.data)
+        sky_pa = SankeyLayout()
+        sky_pa.setup(pa.Table.from_pandas(self.data, preserve_index=False))
+        assert sky_pa.geometry() == sky_df.geometry()
+
+    def test_arrow_table(self):
+        data = generate_data(500, stages=3, labels=8, gaps=0.2, seed=0)
+        data.iloc[::9, 3] = np.nan
+        sky_df = SankeyLayout()
+        sky_df.setup(data)
+
+        table = pa.Table.from_pandas(data.rename(columns=str), preserve_index=False)
+        assert pa.types.is_dictionary(table.schema.field(0).type)
+        sky_pa = SankeyLayout()
+        sky_pa.setup(table)
+        assert sky_pa.geometry() == sky_df.geometry()
+
+        types = [pa.string() if nn % 2 == 0 else pa.float64() for nn in range(table.num_columns)]
+        plain = table.cast(pa.schema(list(zip(table.column_names, types))))
+        sky_plain = SankeyLayout()
+        sky_plain.setup(plain)
+        assert sky_plain.geometry() == sky_df.geometry()
+
+    def test_parquet(self):
+        data = generate_data(500, stages=2, labels=8, seed=1, categorical=False)
+        path = self.write_parquet(data, row_group_size=100)
+
+        sky_df = SankeyLayout()
+        sky_df.setup(data)
+        sky_pq = SankeyLayout()
+        sky_pq.setup(path)
+        assert sky_pq.geometry() == sky_df.geometry()
+
+    def test_parquet_stage_window(self):
+        data = generate_data(500, stages=5, labels=8, gaps=0.3, seed=2)
+        path = self.write_parquet(data)
+
+        sky_subset = SankeyLayout()
+        sky_subset.setup(data.iloc[:, 2:8])
+        sky_window = SankeyLayout(stages=slice(1, 4))
+        sky_window.setup(path)
+        assert sky_window.geometry() == sky_subset.geometry()
+
+    def test_parquet_streaming(self):
+        data = generate_data(500, stages=4, labels=8, gaps=0.3, seed=3)
+        path = self.write_parquet(data)
+
+        sky_df = SankeyLayout()
+        sky_df.setup(data)
+        sky_pq = SankeyLayout(streaming=True)
+        sky_pq.setup(path)
+        for ii in sky_pq.layout_sections():
+            assert sky_pq.flows[ii] == sky_df.flows[ii]
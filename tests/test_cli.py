@@ -0,0 +1,102 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+from ausankey import SankeyError, render
+from ausankey.cli import find_inputs, main, parse_options, read_input, render_files
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitCli(TestFruit):
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def tmp_path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def run_main(self, argv):
+        """Run the command line, returning the exit status and what it printed"""
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = main(argv)
+        return status, out.getvalue(), err.getvalue()
+
+    def read_bytes(self, name):
+        with open(self.tmp_path(name), "rb") as file:
+            return file.read()
+
+    def test_cli_render(self):
+        for name in ("a", "b"):
+            shutil.copy("tests/fruit.csv", self.tmp_path(f"{name}.csv"))
+        options = self.tmp_path("options.json")
+        with open(options, "w") as file:
+            json.dump({"sort": "top", "titles": ["Summer", "Winter"], "figsize": [4, 3]}, file)
+
+        out_dir = self.tmp_path("out")
+        status, out, _ = self.run_main(
+            [self.tmp_path("*.csv"), "--options", options, "--format", "svg", "--out-dir", out_dir]
+        )
+        assert status == 0
+        assert sorted(os.listdir(out_dir)) == ["a.svg", "b.svg"]
+        assert "2 of 2 files rendered" in out
+
+        image = render(self.data, sort="top", titles=["Summer", "Winter"], figsize=[4, 3], dpi=40)
+        status, _, _ = self.run_main([self.tmp_path("a.csv"), "--dpi", "40", "--options", options])
+        assert status == 0
+        assert self.read_bytes("a.png") == image
+
+    def test_cli_toml_workers(self):
+        shutil.copy("tests/fruit.csv", self.tmp_path("fruit.csv"))
+        options = self.tmp_path("options.toml")
+        with open(options, "w") as file:
+            file.write('sort = "top"\ndpi = 40\n')
+
+        status, _, err = self.run_main(
+            [self.tmp_path("fruit.csv"), self.tmp_path("missing.csv"), "-c", options, "-j", "2"]
+        )
+        assert status == 1
+        assert self.read_bytes("fruit.png") == render(self.data, sort="top", dpi=40)
+        assert "missing.csv: failed: FileNotFoundError" in err
+
+    def test_cli_inputs(self):
+        for name in ("b", "a"):
+            open(self.tmp_path(f"{name}.csv"), "w").close()
+        pattern = self.tmp_path("*.csv")
+        assert find_inputs([pattern, self.tmp_path("b.csv")]) == [self.tmp_path("a.csv"), self.tmp_path("b.csv")]
+        assert self.run_main([self.tmp_path("*.parquet")])[0] == 2
+
+    def test_cli_duplicate_outputs(self):
+        os.mkdir(self.tmp_path("sub"))
+        paths = [self.tmp_path("fruit.csv"), self.tmp_path("fruit.parquet"), self.tmp_path("sub/fruit.csv")]
+        for path in paths:
+            open(path, "w").close()
+
+        # inputs with the same name are written next to each input, but clash in one output directory
+        status, _, err = self.run_main([*paths, "--out-dir", self.tmp_path("out"), "-j", "2"])
+        assert status == 2
+        assert f"would be written by each of {', '.join(paths)}" in err
+        assert not os.path.exists(self.tmp_path("out"))
+
+        status, _, err = self.run_main(paths[::2])
+        assert status == 1
+        assert "would be written" not in err
+
+        with self.assertRaisesRegex(SankeyError, "would all be written to"):
+            next(render_files(paths[:2]))
+
+    def test_cli_errors(self):
+        with self.assertRaisesRegex(TypeError, "object/table of arguments"):
+            parse_options(["sort", "top"])
+
+        missing = mock.patch.dict(sys.modules, {"pyarrow.parquet": None})
+        message = r"Parquet files requires the 'pyarrow' package.*ausankey\[cli\]"
+        with missing, self.assertRaisesRegex(SankeyError, message):
+            read_input("data.parquet")
@@ -0,0 +1,58 @@
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from ausankey import Sankey, SankeyError
+from ausankey.facet import sankey_facets
+
+from .test_fruit_setup import TestFruit
+
+
+def regions(fruit):
+    north = fruit.assign(Weight1=fruit["Weight1"] * 2, Weight2=fruit["Weight2"] * 2)
+    south = fruit[fruit["Label1"] != "lime"]
+    return pd.concat([north.assign(region="north"), south.assign(region="south")], ignore_index=True)
+
+
+class TestFruitFacet(TestFruit):
+    def test_facets_shared(self):
+        data = regions(self.data)
+        fig, diagrams = sankey_facets(data.groupby("region"), figsize=(8, 4), flow_batch=True)
+        assert list(diagrams) == ["north", "south"]
+        assert len(fig.axes) == len(diagrams)
+
+        north, south = diagrams.values()
+        assert north.plot_height_nom == south.plot_height_nom == 2 * self.data["Weight2"].sum()
+        assert north.color_dict is south.color_dict
+        assert north.ax.get_ylim() == south.ax.get_ylim()
+        assert north.ax.get_title() == "north"
+
+        # without sharing, each group is laid out as on its own
+        sky = Sankey(flow_batch=True)
+        sky.setup(self.data[self.data["Label1"] != "lime"])
+        _, diagrams = sankey_facets(data, by="region", share_scale=False, flow_batch=True, max_workers=1)
+        assert diagrams["south"].geometry() == sky.geometry()
+        plt.close("all")
+
+    def test_facets_scale_drawn_totals(self):
+        # weights of rows without a label are not drawn, so do not set the scale
+        gaps = pd.DataFrame([("apple", 5, "apple", 5), ("lime", 1, None, 100)], columns=self.data.columns)
+        _, diagrams = sankey_facets({"fruit": self.data, "gaps": gaps}, flow_batch=True)
+        height = max(self.data["Weight1"].sum(), self.data["Weight2"].sum())
+        assert diagrams["gaps"].plot_height_nom == height
+
+        sky = Sankey(flow_batch=True, plot_height_nom=height)
+        sky.setup(gaps)
+        assert diagrams["gaps"].geometry() == sky.geometry()
+        plt.close("all")
+
+    def test_facets_colors(self):
+        color_dict = {"apple": "#f71b1b"}
+        groups = {"a": self.data, "b": self.data[self.data["Label1"] != "apple"], "c": self.data}
+        fig, diagrams = sankey_facets(groups, ncols=2, color_dict=color_dict, flow_batch=True)
+        assert len(fig.axes) == 3
+        assert diagrams["b"].color_dict["apple"] == "#f71b1b"
+        assert list(diagrams["a"].color_dict) == list(diagrams["b"].color_dict)
+        plt.close("all")
+
+        with self.assertRaises(SankeyError):
+            sankey_facets(self.data)
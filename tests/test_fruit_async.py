@@ -0,0 +1,51 @@
+import asyncio
+
+import ausankey as sky
+
+from .test_fruit_setup import TestFruit
+
+PNG_MAGIC = b"\x89PNG"
+
+
+class TestFruitAsync(TestFruit):
+    def test_fruits_render(self):
+        img = sky.render(self.data, titles=["Summer", "Winter"])
+        assert img.startswith(PNG_MAGIC)
+
+        img = sky.render(self.data, fmt="svg")
+        assert b"<svg" in img
+
+    def test_fruits_render_async(self):
+        img = asyncio.run(sky.render_async(self.data, sort="top"))
+        assert img.startswith(PNG_MAGIC)
+
+    def test_fruits_renderer_threads(self):
+        async def main():
+            async with sky.AsyncRenderer(max_workers=2) as renderer:
+                return await asyncio.gather(*[renderer.render(self.data, sort=s) for s in ("top", "bottom", "none")])
+
+        imgs = asyncio.run(main())
+        assert all(img.startswith(PNG_MAGIC) for img in imgs)
+
+    def test_fruits_renderer_processes(self):
+        async def main():
+            async with sky.AsyncRenderer(kind="process", max_workers=1) as renderer:
+                return await renderer.render(self.data)
+
+        assert asyncio.run(main()).startswith(PNG_MAGIC)
+
+    def test_fruits_renderer_cancel(self):
+        async def main():
+            async with sky.AsyncRenderer(max_workers=1) as renderer:
+                first = asyncio.ensure_future(renderer.render(self.data))
+                waiting = asyncio.ensure_future(renderer.render(self.data))
+                await asyncio.sleep(0)
+                waiting.cancel()
+                img = await first
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiting
+                return img, renderer.semaphore.locked()
+
+        img, locked = asyncio.run(main())
+        assert img.startswith(PNG_MAGIC)
+        assert not locked
@@ -0,0 +1,59 @@
+import matplotlib.pyplot as plt
+
+import ausankey as sky
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitBudget(TestFruit):
+    def test_fruits_estimate(self):
+        for opts in ({}, {"flow_edge": True}, {"flow_batch": True}, {"flow_points": 10, "node_edge": True}):
+            plt.figure()
+            diagram = sky.sankey(self.data, stats=True, titles=["Summer", "Winter"], **opts)
+            num_frame = 2
+            assert diagram.estimate_artists() == diagram.stats.total_artists + num_frame
+            plt.close()
+
+    def test_fruits_within_budget(self):
+        plt.figure()
+        diagram = sky.sankey(self.data, max_artists=1000)
+        assert diagram.degradations == []
+        plt.close()
+
+    def test_fruits_over_budget(self):
+        plt.figure()
+        with self.assertLogs("ausankey", level="WARNING"):
+            diagram = sky.sankey(self.data, max_artists=100, stats=True)
+        assert diagram.degradations == [("flow_points", 16), ("flow_batch", True)]
+        assert diagram.stats.total_artists <= 100
+        plt.close()
+
+    def test_fruits_budget_setup_again(self):
+        diagram = sky.Sankey(max_artists=100, other_thresh_ofmax=0)
+        data = sky.generate_data(2000, stages=3, labels=40, seed=0)
+        diagram.setup(data)
+        assert diagram.flow_batch
+        assert diagram.configured["flow_batch"] is False
+
+        # the next layout starts from the options as given
+        diagram.max_artists = None
+        diagram.setup(self.data)
+        assert diagram.degradations == []
+        assert diagram.configured == {}
+        assert (diagram.flow_batch, diagram.flow_points, diagram.other_thresh_ofmax) == (False, None, 0)
+
+    def test_fruits_other_budget(self):
+        data = sky.generate_data(2000, stages=3, labels=40, seed=0)
+        diagram = sky.Sankey(max_artists=200)
+        diagram.setup(data)
+
+        names = [name for name, _ in diagram.degradations]
+        assert names[:3] == ["flow_points", "flow_batch", "drop_labels"]
+        assert "other_thresh_ofmax" in names
+        assert diagram.estimate_artists() <= 200
+        assert "Other" in diagram.all_labels
+
+    def test_fruits_time_budget(self):
+        diagram = sky.Sankey(time_budget=0.1)
+        diagram.setup(self.data)
+        assert ("flow_batch", True) in diagram.degradations
@@ -0,0 +1,80 @@
+import numpy as np
+
+import ausankey as sky
+from ausankey import profiling
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitHooks(TestFruit):
+    def test_fruits_hooks(self):
+        calls = []
+
+        def hook(when, context):
+            calls.append((when, context["phase"], context["stage"]))
+            if when == "after":
+                assert context["seconds"] >= 0
+                assert context["error"] is None
+            if context["phase"] == "subplot":
+                assert context["rows"] == len(self.data)
+                assert context["labels"] == [5, 5]
+
+        with sky.hooked(hook):
+            sky.render(self.data, titles=["Summer", "Winter"])
+
+        for name in ("setup", "weight_labels", "calc_plot_height", "plot", "savefig"):
+            assert ("before", name, None) in calls
+            assert ("after", name, None) in calls
+        assert ("after", "subplot", 0) in calls
+        assert ("after", "plot_titles", 0) in calls
+        assert calls[0] == ("before", "setup", None)
+
+        # removed on exit
+        num_calls = len(calls)
+        sky.render(self.data)
+        assert len(calls) == num_calls
+
+    def test_fruits_hooks_phases(self):
+        contexts = []
+
+        def hook(when, context):
+            if when == "before":
+                context["span"] = context["phase"]  # carried to "after"
+            else:
+                contexts.append(context)
+
+        sky.add_hook(hook, phases=["weight_labels"])
+        try:
+            layout = sky.SankeyLayout()
+            layout.setup(self.data)
+        finally:
+            sky.remove_hook(hook)
+
+        assert len(contexts) == 2  # weighed again after reclassification
+        assert all(context["span"] == "weight_labels" for context in contexts)
+        assert contexts[0]["sankey"] is layout
+
+    def test_matrices_hooks_rows(self):
+        rows = {}
+
+        def hook(when, context):
+            rows[context["phase"]] = context["rows"]
+
+        with sky.hooked(hook):
+            layout = sky.SankeyLayout()
+            layout.setup([np.array([[1, 2], [0, 3]]), np.array([[1, 0], [2, 3]])])
+
+        assert rows["setup"] is None  # not a table of rows
+        assert rows["weight_labels"] == len(layout.node_codes[0])
+
+    def test_hooks_copy_on_write(self):
+        # phases running in other threads keep iterating the hooks they started with
+        def hook(when, context):
+            pass
+
+        running = profiling._HOOKS
+        with sky.hooked(hook):
+            assert profiling._HOOKS is not running
+            assert hook not in dict(running)
+            assert hook in dict(profiling._HOOKS)
+        assert hook not in dict(profiling._HOOKS)
@@ -0,0 +1,18 @@
+import ausankey as sky
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitRasterized(TestFruit):
+    def test_fruits_vector(self):
+        img = sky.render(self.data, fmt="svg")
+        assert b"<image" not in img
+
+    def test_fruits_flow_rasterized(self):
+        img = sky.render(self.data, fmt="svg", flow_rasterized=True)
+        assert img.count(b"<image") == 1
+        assert b"<path" in img  # text is still drawn as vectors
+
+    def test_fruits_node_rasterized(self):
+        img = sky.render(self.data, fmt="svg", flow_rasterized=True, node_rasterized=True)
+        assert img.count(b"<image") == 1
@@ -0,0 +1,47 @@
+import logging
+
+import matplotlib.pyplot as plt
+
+import ausankey as sky
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitStats(TestFruit):
+    def test_fruits_stats_off(self):
+        plt.figure()
+        diagram = sky.sankey(self.data)
+        assert diagram.stats is None
+        assert "draw_flow" not in vars(diagram)  # no wrappers
+        plt.close()
+
+    def test_fruits_stats(self):
+        plt.figure()
+        diagram = sky.sankey(self.data, stats=True, titles=["Summer", "Winter"])
+        stats = diagram.stats
+
+        for name in ("setup", "weight_labels", "calc_flows", "plot", "subplot"):
+            assert stats.times[name] > 0
+        assert stats.calls["weight_labels"] == 2
+        assert ("subplot", 0) in stats.stage_times
+
+        assert stats.artists["draw_node"] == 10
+        assert stats.artists["draw_titles"] == 2
+        ax = diagram.ax
+        num_frame = 2
+        assert stats.total_artists == len(ax.collections) + len(ax.texts) + len(ax.lines) - num_frame
+        assert "draw_flow" in stats.summary()
+        plt.close()
+
+    def test_fruits_stats_accumulate(self):
+        stats = sky.SankeyStats()
+        sky.render(self.data, stats=stats)
+        sky.render(self.data, stats=stats)
+        assert stats.calls["plot"] == 2
+        assert stats.calls["savefig"] == 2
+        assert stats.as_dict()["stage_times"]["subplot[0]"] > 0
+
+    def test_fruits_stats_logging(self):
+        with self.assertLogs("ausankey", level=logging.DEBUG) as logs:
+            sky.render(self.data, stats=True, verbose=2)
+        assert any("weight_labels:" in line for line in logs.output)
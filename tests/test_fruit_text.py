@@ -0,0 +1,60 @@
+import matplotlib.pyplot as plt
+
+import ausankey as sky
+from ausankey.layout import format_value
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitText(TestFruit):
+    def test_fruits_text_props(self):
+        plt.figure()
+        diagram = sky.sankey(
+            self.data,
+            fontsize=9,
+            label_font={"fontweight": "bold", "color": "red"},
+            label_path_effects={"linewidth": 2, "foreground": "white"},
+            titles=["Summer", "Winter"],
+        )
+        texts = diagram.ax.texts
+        labels = [text for text in texts if text.get_text() in ("apple", "lime")]
+        assert labels
+        for text in labels:
+            assert text.get_fontsize() == 9
+            assert text.get_fontweight() == "bold"
+            assert text.get_color() == "red"
+            assert len(text.get_path_effects()) == 2
+        assert {text.get_text() for text in texts} >= {"Summer", "Winter"}
+        plt.close()
+
+    def test_fruits_text_aliases(self):
+        plt.figure()
+        diagram = sky.sankey(self.data, value_font={"size": 7, "family": "serif"})
+        values = diagram.ax.texts[-1]
+        assert values.get_fontsize() == 7
+        assert values.get_fontfamily() == ["serif"]
+        plt.close()
+
+    def test_fruits_single_text_deprecated(self):
+        plt.figure()
+        diagram = sky.sankey(self.data, label_font={"color": "red"})
+        num_texts = len(diagram.ax.texts)
+        with self.assertWarns(DeprecationWarning):
+            label = diagram.draw_label(0, 1, "apple", "left", 12)
+        with self.assertWarns(DeprecationWarning):
+            value = diagram.draw_value(0, 2, 3.5, "right", font={"fontsize": 5})
+        with self.assertWarns(DeprecationWarning):
+            diagram.draw_percent(0, 3, "10%", "left")
+        with self.assertWarns(DeprecationWarning):
+            title = diagram.draw_title(0, 4, "Summer", "bottom")
+        assert len(diagram.ax.texts) == num_texts + 4
+        assert label.get_text() == "apple" and label.get_color() == "red"
+        assert value.get_text() == diagram.value_text(3.5) and value.get_fontsize() == 5
+        assert title.get_verticalalignment() == "bottom"
+        plt.close()
+
+    def test_format_cache(self):
+        format_value.cache_clear()
+        for _ in range(3):
+            assert format_value(1.25, ".1f") == "1.2"
+        assert format_value.cache_info().hits == 2
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+import ausankey as sky
+
+
+class TestGenerate(unittest.TestCase):
+    def test_generate_shape(self):
+        data = sky.generate_data(500, stages=4, labels=[3, 5, 5, 2], seed=1)
+        assert data.shape == (500, 8)
+        assert data.iloc[:, 2].nunique() <= 5
+        assert data.iloc[:, 6].nunique() <= 2
+        assert not data.isna().any().any()
+
+    def test_generate_reproducible(self):
+        data1 = sky.generate_data(200, gaps=0.5, seed=3)
+        assert data1.equals(sky.generate_data(200, gaps=0.5, seed=3))
+
+        data2 = sky.generate_data(200, gaps=0.5, seed=3, categorical=False)
+        labels1 = data1.iloc[:, 2].astype(object)
+        labels2 = data2.iloc[:, 2].astype(object)
+        assert ((labels1 == labels2) | (labels1.isna() & labels2.isna())).all()
+
+    def test_generate_gaps(self):
+        data = sky.generate_data(1000, stages=5, gaps=0.5, seed=4)
+        present = data.iloc[:, 1::2].notna().to_numpy()
+
+        # each row is present in one contiguous run of stages
+        assert present.any(axis=1).all()
+        assert (np.abs(np.diff(present.astype(int), axis=1)).sum(axis=1) <= 2).all()
+        assert (data.iloc[:, 0::2].isna().to_numpy() == ~present).all()
+
+    def test_generate_weight_skew(self):
+        for skew in (1, 0.5, float("nan")):
+            with self.assertRaisesRegex(ValueError, "weight_skew must be greater than 1"):
+                sky.generate_data(10, weight_skew=skew)
+
+    def test_generate_layout(self):
+        layout = sky.SankeyLayout()
+        layout.setup(sky.generate_data(1000, stages=3, gaps=0.2, seed=5))
+        assert layout.num_flow == 2
+        assert None in layout.all_labels
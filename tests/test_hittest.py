@@ -0,0 +1,59 @@
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+
+import ausankey as sky
+from ausankey.hittest import IntervalTree
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitHitTest(TestFruit):
+    def test_interval_tree(self):
+        rng = np.random.default_rng(0)
+        lo = rng.random(500)
+        hi = lo + rng.random(500) * 0.2
+        tree = IntervalTree(lo, hi)
+        for yy in [*rng.random(50), lo[7], hi[7], -1, 2]:
+            assert sorted(tree.query(yy)) == list(np.flatnonzero((lo <= yy) & (yy <= hi)))
+
+    def test_item_at(self):
+        fig, ax = plt.subplots()
+        diagram = sky.sankey(self.data, ax=ax, flow_batch=True)
+        geom = diagram.geometry()
+
+        for node in geom["nodes"]:
+            item = diagram.item_at(node["x"] + node["width"] / 2, node["y"] + node["height"] / 2)
+            assert item == {"kind": "node", **node}
+
+        for flow in geom["flows"]:
+            if min(flow["value"]) > 0:
+                # the ends of the flow, inside the curve as drawn
+                for lr, xx in enumerate(flow["x"]):
+                    yy = (flow["y0"][lr] + flow["y1"][lr]) / 2
+                    assert diagram.item_at(xx + (0.001 if lr == 0 else -0.001), yy)["source"] == flow["source"]
+
+        assert diagram.item_at(-1, 0) is None
+        assert diagram.item_at(diagram.plot_width / 2, diagram.y_frame[1]) is None
+
+        # the nodes and flows of all sections are kept when streaming
+        streamed = sky.sankey(self.data, ax=ax, flow_batch=True, streaming=True)
+        for node in geom["nodes"]:
+            assert streamed.item_at(node["x"], node["y"]) == diagram.item_at(node["x"], node["y"])
+        plt.close(fig)
+
+    def test_hover(self):
+        calls = []
+        fig, ax = plt.subplots()
+        diagram = sky.sankey(self.data, ax=ax, flow_batch=True, hover=lambda item, event: calls.append(item))
+        node = diagram.geometry()["nodes"][0]
+
+        def move(x, y):
+            px, py = ax.transData.transform((x, y))
+            fig.canvas.callbacks.process("motion_notify_event", MouseEvent("motion_notify_event", fig.canvas, px, py))
+
+        move(node["x"] + node["width"] / 2, node["y"] + node["height"] / 2)
+        move(node["x"] + node["width"] / 2, node["y"] + node["height"] / 3)  # same node: no call
+        move(diagram.plot_width / 2, diagram.y_frame[1])
+        assert calls == [{"kind": "node", **node}, None]
+        plt.close(fig)
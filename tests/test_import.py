@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import unittest
+
+# Generous bound: importing matplotlib or pandas alone takes several times longer
+IMPORT_TIME_MAX = 0.1
+
+IMPORT_SCRIPT = """
+import sys, time
+tic = time.perf_counter()
+import ausankey
+print(time.perf_counter() - tic)
+print(",".join(m for m in ("matplotlib", "pandas", "numpy") if m in sys.modules))
+"""
+
+
+class TestImport(unittest.TestCase):
+    """Benchmark the package import time in a fresh interpreter"""
+
+    def import_fresh(self, script):
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        return out.stdout.split("\n")
+
+    def test_import_time(self):
+        times = []
+        for _ in range(3):
+            import_time, heavy = self.import_fresh(IMPORT_SCRIPT)[:2]
+            assert heavy == ""
+            times.append(float(import_time))
+        assert min(times) < IMPORT_TIME_MAX
+
+    def test_import_lazy_names(self):
+        script = "import ausankey; print(ausankey.sankey.__module__, ausankey.AsyncRenderer.__module__)"
+        assert self.import_fresh(script)[0] == "ausankey.ausankey ausankey.aio"
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.import_fresh("import ausankey; ausankey.not_a_name")
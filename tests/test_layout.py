@@ -0,0 +1,125 @@
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ausankey.generate import generate_data
+from ausankey.layout import SankeyLayout, factorize
+
+from .test_fruit_setup import TestFruit
+
+LAYOUT_SCRIPT = """
+import sys
+sys.modules["pandas"] = None  # pretend pandas is not installed
+from ausankey.layout import SankeyLayout
+rows = [("a", 1, "a", 1.0), ("b", 2, None, None), (None, None, "c", 0.5), ("a", 1, "c", 2)]
+sky = SankeyLayout()
+sky.setup(rows)
+geom = sky.geometry()
+print(len(geom["nodes"]), len(geom["flows"]), "matplotlib" in sys.modules)
+"""
+
+
+class TestFruitLayout(TestFruit):
+    def test_fruits_geometry(self):
+        sky = SankeyLayout(titles=["Summer", "Winter"], value_loc="both")
+        sky.setup(self.data)
+        geom = json.loads(json.dumps(sky.geometry()))
+
+        assert len(geom["nodes"]) == 10
+        assert len(geom["flows"]) == 5
+        assert len(geom["titles"]) == 2
+        assert {node["label"] for node in geom["nodes"]} == set(self.color_dict)
+        for flow in geom["flows"]:
+            assert flow["source"] == flow["target"]
+            assert np.allclose(np.subtract(flow["y1"], flow["y0"]), flow["value"])
+
+    def test_fruits_layout_array(self):
+        sky_df = SankeyLayout()
+        sky_df.setup(self.data)
+        sky_arr = SankeyLayout()
+        sky_arr.setup(self.data.to_numpy().tolist())
+        assert sky_df.geometry() == sky_arr.geometry()
+
+    def test_layout_without_pandas(self):
+        out = subprocess.run([sys.executable, "-c", LAYOUT_SCRIPT], capture_output=True, text=True, check=True)
+        assert out.stdout.split() == ["4", "2", "False"]
+
+    def test_factorize(self):
+        codes, uniques = factorize(np.array(["b", None, "a", "b", np.nan], dtype=object))
+        assert codes.tolist() == [0, -1, 1, 0, -1]
+        assert uniques.tolist() == ["b", "a"]
+
+    def test_fruits_masks(self):
+        sky = SankeyLayout(value_thresh=1, label_thresh=2, value_duplicate=False)
+        sky.setup(self.data)
+
+        assert sky.label_mask[0].shape == (5,)
+        assert sky.value_mask[0].shape == (len(sky.flows[0]), 2)
+        assert sum(sky.label_mask[0]) + sum(sky.label_mask[1]) == len(sky.label_items[0])
+        assert sky.value_mask[0].sum() == len(sky.value_items[0])
+        assert all(val >= 1 for _, _, val, _ in sky.value_items[0])
+
+    def test_fruits_flow_matrix(self):
+        sky = SankeyLayout()
+        sky.setup(self.data)
+
+        matrix = sky.flow_matrix(0, "right")
+        assert matrix.shape == (len(sky.node_sizes[0]), len(sky.node_sizes[1]))
+        for lbl_l, lbl_r, _, _, _, rlen in sky.flows[0]:
+            row = list(sky.node_sizes[0]).index(lbl_l)
+            col = list(sky.node_sizes[1]).index(lbl_r)
+            assert matrix[row, col] == rlen
+        assert np.isclose(matrix.sum(), sum(flow[5] for flow in sky.flows[0]))
+
+        pytest.importorskip("scipy")
+        sparse = sky.flow_matrix(0, "right", sparse=True)
+        assert np.array_equal(sparse.toarray(), matrix)
+
+    def test_matrix_input(self):
+        first = pd.DataFrame([[1, 3], [0, 2]], index=["a", "b"], columns=["a", "c"])
+        second = (np.array([[4, 0], [1, 2.5]]), ["a", "c"], ["d", "a"])
+        sky_mat = SankeyLayout()
+        sky_mat.setup([first, second])
+
+        rows = [
+            ("a", 1, "a", 1, None, None),
+            ("a", 3, "c", 3, None, None),
+            ("b", 2, "c", 2, None, None),
+            (None, None, "a", 4, "d", 4),
+            (None, None, "c", 1, "d", 1),
+            (None, None, "c", 2.5, "a", 2.5),
+        ]
+        sky_rows = SankeyLayout()
+        sky_rows.setup(rows)
+        assert sky_mat.geometry() == sky_rows.geometry()
+
+    def test_zero_copy(self):
+        data = generate_data(100, stages=2, gaps=0.2, seed=0)
+        before = data.copy()
+        sky = SankeyLayout(other_thresh_ofsum=0.1)
+        sky.setup(data)
+        assert np.shares_memory(sky.weights[0], data.iloc[:, 1].to_numpy())
+        pd.testing.assert_frame_equal(data, before)
+
+    def test_stage_window(self):
+        data = generate_data(1000, stages=8, labels=6, gaps=0.3, seed=2)
+        sky_window = SankeyLayout(stages=slice(3, 6))
+        sky_window.setup(data)
+        sky_subset = SankeyLayout()
+        sky_subset.setup(data.iloc[:, 6:12])
+        assert sky_window.num_stages == 3
+        assert sky_window.geometry() == sky_subset.geometry()
+
+        sky_full = SankeyLayout()
+        sky_full.setup(data)
+        matrices = [sky_full.flow_matrix(ii) for ii in range(sky_full.num_flow)]
+        sky_window = SankeyLayout(stages=slice(2, 5))
+        sky_window.setup(matrices)
+        sky_subset = SankeyLayout()
+        sky_subset.setup(matrices[2:4])
+        assert sky_window.num_stages == 3
+        assert sky_window.geometry() == sky_subset.geometry()
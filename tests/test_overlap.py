@@ -0,0 +1,42 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+import ausankey as sky
+from ausankey import generate_data
+from ausankey.layout import cull_overlaps, spread_overlaps
+
+from .test_fruit_setup import TestFruit
+
+
+def label_extents(diagram):
+    diagram.ax.figure.canvas.draw()
+    columns = {}
+    for text in diagram.ax.texts:
+        if text.get_text():
+            bbox = text.get_window_extent()
+            columns.setdefault((round(bbox.x0), round(bbox.x1)), []).append((bbox.y0, bbox.y1))
+    return columns
+
+
+class TestFruitOverlap(TestFruit):
+    def test_cull_overlaps(self):
+        keep = cull_overlaps([0, 0.5, 2, 2.5], [1, 1.5, 3, 3.5], [1, 2, 4, 3])
+        assert keep.tolist() == [False, True, True, False]
+
+    def test_spread_overlaps(self):
+        centers = spread_overlaps([0, 0.5, 5], [1, 1, 1])
+        assert centers.tolist() == [0, 1, 5]
+
+    def test_label_overlap(self):
+        data = generate_data(200, stages=2, labels=60, seed=1)
+        counts = {}
+        for overlap in ("none", "drop", "offset"):
+            plt.figure(figsize=(4, 3))
+            diagram = sky.sankey(data, label_overlap=overlap, flow_batch=True)
+            counts[overlap] = len(diagram.ax.texts)
+            if overlap == "offset":
+                for extents in label_extents(diagram).values():
+                    extents = np.array(sorted(extents))
+                    assert np.all(extents[1:, 0] >= extents[:-1, 1] - 1)
+            plt.close()
+        assert counts["drop"] < counts["none"] == counts["offset"]
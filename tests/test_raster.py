@@ -0,0 +1,37 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from ausankey.layout import SankeyLayout
+from ausankey.raster import RasterWriter, sankey_thumbnail, to_rgba
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitRaster(TestFruit):
+    def test_fruits_thumbnail(self):
+        img = sankey_thumbnail(self.data, background=(1, 1, 1, 0))
+        assert img.shape == (120, 160, 4)
+        assert img.dtype == np.uint8
+        assert img[0, 0, 3] == 0
+        assert img[:, :, 3].max() == 255
+
+    def test_fruits_thumbnail_colors(self):
+        sky = SankeyLayout(color_dict=self.color_dict)
+        sky.setup(self.data)
+        sky.calc_colors()
+        writer = RasterWriter(sky, size=(200, 150))
+        img = writer.write()
+
+        x, dx, y, dy, label = sky.node_items[0][0]
+        col = int(writer.x(x + dx / 2))
+        row = int(writer.y(y + dy / 2))
+        expected = np.round(255 * np.array(to_rgba(self.color_dict[label])))
+        assert np.array_equal(img[row, col], expected)
+
+    @unittest.skipUnless(importlib.util.find_spec("PIL"), "requires Pillow")
+    def test_fruits_thumbnail_text(self):
+        plain = sankey_thumbnail(self.data, titles=["Summer", "Winter"])
+        text = sankey_thumbnail(self.data, titles=["Summer", "Winter"], text=True)
+        assert (plain != text).any()
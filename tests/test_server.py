@@ -0,0 +1,52 @@
+import json
+import urllib.request
+
+import pytest
+
+from ausankey import SankeyError, render
+from ausankey.server import RenderServer, render_remote
+
+from .test_fruit_setup import TestFruit
+
+
+class TestFruitServer(TestFruit):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = RenderServer(port=0, cache_size=4).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def health(self):
+        with urllib.request.urlopen(f"{self.server.url}/health") as response:
+            return json.load(response)["cache"]
+
+    def test_render_remote(self):
+        url = self.server.url
+        options = {"sort": "top", "titles": ["Summer", "Winter"], "label_overlap": "drop", "dpi": 40}
+        image = render(self.data, **options)
+        assert render_remote(self.data, url=url, **options) == image
+
+        # the layout is cached, and drawn again for other formats and sizes
+        hits = self.health()["hits"]
+        assert render_remote(self.data, url=url, **options) == image
+        assert render_remote(self.data, url=url, fmt="svg", **options).startswith(b"<?xml")
+        assert render_remote(self.data, url=url, figsize=[4, 3], **options) == render(
+            self.data, figsize=[4, 3], **options
+        )
+        assert self.health()["hits"] == hits + 3
+
+        rows = self.data.to_numpy().tolist()
+        assert render_remote(rows, url=url, **options) == image
+
+    def test_render_remote_arrow(self):
+        pa = pytest.importorskip("pyarrow")
+        table = pa.Table.from_pandas(self.data, preserve_index=False)
+        assert render_remote(table, url=self.server.url, stages=[0, 2], dpi=40) == render(self.data, dpi=40)
+
+    def test_render_remote_errors(self):
+        with self.assertRaisesRegex(SankeyError, "unexpected keyword argument 'bogus'"):
+            render_remote(self.data, url=self.server.url, bogus=1)
+        with self.assertRaisesRegex(SankeyError, "Unknown format"):
+            render_remote(self.data, url=self.server.url, fmt="bmp")
@@ -0,0 +1,60 @@
+import numpy as np
+
+import ausankey as sky
+from ausankey.generate import generate_data
+from ausankey.layout import SankeyLayout
+
+from .test_fruit_setup import TestFruit
+
+OPTIONS = {
+    "flow_batch": True,
+    "other_thresh_ofmax": 0.05,
+    "label_largest": True,
+    "titles": ["A", "B", "C", "D", "E"],
+}
+
+
+class TestFruitStreaming(TestFruit):
+    def setUp(self):
+        super().setUp()
+        self.wide = generate_data(2000, stages=5, labels=10, gaps=0.3, seed=3)
+
+    def test_streaming_same_image(self):
+        assert sky.render(self.wide, streaming=True, **OPTIONS) == sky.render(self.wide, **OPTIONS)
+
+    def test_streaming_releases_stages(self):
+        data = generate_data(500, stages=6, labels=5, gaps=0.2, seed=4)
+        layout = SankeyLayout(streaming=True, other_thresh_ofsum=0.1)
+        layout.setup(data)
+        assert layout.node_codes == {}
+
+        full = SankeyLayout(other_thresh_ofsum=0.1)
+        full.setup(data)
+        assert layout.all_labels == full.all_labels
+        for ii in layout.layout_sections():
+            assert set(layout.node_codes) <= set(range(ii - 1, ii + 3))
+            assert list(layout.node_items) == [ii]
+            assert layout.node_items[ii] == full.node_items[ii]
+            assert layout.flows[ii] == full.flows[ii]
+        assert layout.node_codes == {}
+        assert layout.geometry() == full.geometry()
+
+    def test_streaming_geometry(self):
+        layout = SankeyLayout(streaming=True, **OPTIONS)
+        layout.setup(self.wide)
+        full = SankeyLayout(**OPTIONS)
+        full.setup(self.wide)
+        assert layout.geometry() == full.geometry()
+        assert layout.node_codes == {}
+
+    def test_streaming_svg(self):
+        svg = sky.sankey_svg(self.wide, streaming=True, **OPTIONS)
+        assert svg == sky.sankey_svg(self.wide, **OPTIONS)
+
+    def test_streaming_thumbnail(self):
+        image = sky.sankey_thumbnail(self.wide, streaming=True, **OPTIONS)
+        assert np.array_equal(image, sky.sankey_thumbnail(self.wide, **OPTIONS))
+
+    def test_streaming_matrices(self):
+        with self.assertRaisesRegex(ValueError, "Streaming"):
+            SankeyLayout(streaming=True).setup([[[1, 2], [3, 4]]])
@@ -0,0 +1,47 @@
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+from ausankey.svg import sankey_svg
+
+from .test_fruit_setup import TestFruit
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+class TestFruitSvg(TestFruit):
+    def test_fruits_svg(self):
+        root = ET.fromstring(sankey_svg(self.data, titles=["Summer", "Winter"], frame_side="both"))
+        assert len(root.findall(f"{SVG}rect")) == 10
+        assert len(root.findall(f"{SVG}path")) == 5 + 2  # flows and frame lines
+        assert len(root.findall(f"{SVG}text")) == 10 + 10 + 2  # labels, values and titles
+        assert root.findall(f"{SVG}defs/{SVG}linearGradient") == []
+
+    def test_fruits_svg_options(self):
+        svg = sankey_svg(
+            self.data,
+            color_dict=self.color_dict,
+            label_values=True,
+            label_path_effects={"linewidth": 3, "foreground": "white"},
+            percent_loc="center",
+            flow_edge=True,
+            node_edge=True,
+        )
+        root = ET.fromstring(svg)
+        assert "#f71b1b" in svg
+        assert "paint-order:stroke" in svg
+        assert len(root.findall(f"{SVG}text/{SVG}tspan")) == 2 * 10
+
+    def test_svg_gradients(self):
+        data = pd.DataFrame([("a", 1, "b", 1), ("a", 2, "a", 2), ("b", 1, "b", 1), ("c", 3, "b", 3)])
+        root = ET.fromstring(sankey_svg(data))
+        gradients = root.findall(f"{SVG}defs/{SVG}linearGradient")
+        assert len(gradients) == 2
+        assert {ref.get("fill") for ref in root.findall(f"{SVG}path")} >= {"url(#g0)", "url(#g1)"}
+
+    def test_svg_colors(self):
+        svg = sankey_svg(self.data, colormap="tab10", color_dict={"apple": "C0", "banana": "tab:orange"})
+        assert 'fill="#1f77b4"' in svg
+        assert 'fill="#ff7f0e"' in svg
+        assert "C0" not in svg
+        assert "tab:" not in svg